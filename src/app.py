@@ -1,4 +1,10 @@
 from controller.product_manager_controller import ProductManagerController
+from service.product_manager_service import ProductManagerService
+from utility.file_snapshot import SNAPSHOT_SUFFIX
+from utility.result_export import EXPORT_PREFIX
+from utility import metrics
+from urllib.parse import unquote_plus
+import logging
 
 
 def lambda_handler(event, context):
@@ -17,13 +23,18 @@ def lambda_handler(event, context):
         API Gateway Lambda Proxy Output Format: dict
     """
 
+    if 'Records' in event:
+        return analyze_uploaded_files(event.get('Records'))
+
     request_path = event.get('resource')
     request_method = event.get('httpMethod')
     request = {
         'body': event.get('body'), 
         'path_params': event.get('pathParameters'), 
         'query_params': event.get('queryStringParameters'),
-        'header': event.get('headers')
+        'header': event.get('headers'),
+        'body_base64': bool(event.get('isBase64Encoded')),
+        'request_id': getattr(context, 'aws_request_id', None)
     }
     if 'authorizer' in event['requestContext']:
         request['user_context'] = event.get('requestContext').get('authorizer')
@@ -53,3 +64,40 @@ def route(request_path, request_method, request):
     """
 
     return ProductManagerController(request, request_method, request_path).invoke()
+
+
+
+def analyze_uploaded_files(records):
+    """ 
+    Analyses files uploaded to s3 through presigned posts. Invoked by
+    s3 ObjectCreated notifications on the upload bucket.
+
+    Parameters
+    ----------
+    records: list, required
+        Records of the s3 event notification
+
+    Returns
+    -------
+    list of the updated file details
+    """
+
+    service = ProductManagerService({})
+    results = []
+    for record in records:
+        if record.get('eventSource') != 'aws:s3':
+            continue
+        s3_key = unquote_plus(record['s3']['object']['key'])
+        #snapshots and job result exports are written to the same bucket by the service itself
+        if s3_key.endswith(SNAPSHOT_SUFFIX) or s3_key.startswith(EXPORT_PREFIX):
+            continue
+        metrics.start_request('S3 ObjectCreated')
+        try:
+            results.append(service.analyze_uploaded_file(s3_key))
+        except Exception as error:
+            #one file that can't be analysed or updated does not stop the others of the event
+            logging.exception('Could not analyze uploaded file. S3 key: %s. Error: %s', s3_key, error)
+            results.append(None)
+        finally:
+            metrics.finish_request(S3Key=s3_key)
+    return results
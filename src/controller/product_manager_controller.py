@@ -7,14 +7,72 @@ from datamodel.custom_exceptions import UserAuthenticationError
 from datamodel.custom_exceptions import HeaderRowNotFoundError
 from datamodel.custom_exceptions import WrongFileFormat
 from datamodel.custom_exceptions import EmptySheetError
+from utility import metrics
+from utility import response_body
 from http import HTTPStatus
+import base64
+import binascii
 import logging
-import json
 
 logging.basicConfig(level=logging.INFO)
 
+DEFAULT_HEADERS = {
+    "Access-Control-Allow-Headers" : "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
+}
+
+# (exception types, status, errorCode of the body) of the errors routes map to a
+# response, the first match wins. Errors no route maps are internal server errors.
+COMMON_ERRORS = (
+    (IllegalArgumentError, HTTPStatus.BAD_REQUEST, None),
+)
+FILE_ERRORS = (
+    (EmptySheetError, HTTPStatus.BAD_REQUEST, 'NO_PRODUCT_FOUND'),
+    (HeaderRowNotFoundError, HTTPStatus.BAD_REQUEST, 'HEADER_NOT_FOUND'),
+    (WrongFileFormat, HTTPStatus.BAD_REQUEST, 'WRONG_FILE_FORMAT'),
+)
+UNAVAILABLE_ERRORS = (
+    ((DataAccessError, ShopifyUnauthorizedError), HTTPStatus.SERVICE_UNAVAILABLE, None),
+)
+
+
+class Route:
+    """
+    A route of the api: the controller method handling it, the request context
+    it needs and the errors it maps to a response besides the common ones.
+
+    Parameters
+    ----------
+    handler: function, required
+        controller method called with the service, returns the http response
+
+    errors: tuple, optional
+        (exception types, status, errorCode) of the errors of the route
+
+    path_params: tuple, optional
+        path parameters the route needs, requests without them are bad requests
+
+    user_context: bool, optional
+        whether the route needs the userId of the authorizer
+
+    base64_body: bool, optional
+        whether the route takes the body base64 encoded, other routes get
+        bodies the api gateway base64 encoded decoded
+    """
+
+    __slots__ = ('handler', 'errors', 'path_params', 'user_context', 'base64_body')
+
+    def __init__(self, handler, errors=(), path_params=(), user_context=True, base64_body=False):
+        self.handler = handler
+        self.errors = tuple(errors) + COMMON_ERRORS
+        self.path_params = tuple(path_params)
+        self.user_context = user_context
+        self.base64_body = base64_body
+
+
 class ProductManagerController:
-    """ 
+    """
     Class to invoke service to perform request action
     and return http response to app
 
@@ -28,185 +86,200 @@ class ProductManagerController:
         self._request = request
         self._method = method
         self._path = path
-        self._product_manager_service = ProductManagerService(request)
+        self._product_manager_service = None
+
 
-    
     def invoke(self):
-        """ 
+        """
         calls the appropraite method to perform request action
         and return http response to app
         """
 
-        if self._path == '/upload' and self._method == HTTPMethod.POST.name:
-            response = self.__get_file_details()
-        elif self._path == '/run' and self._method == HTTPMethod.POST.name:
-            response = self.__put_job()
-        elif self._path == '/users' and self._method == HTTPMethod.POST.name:
-            response = self.__get_user_details()
-        elif self._path == '/jobs' and self._method == HTTPMethod.POST.name:
-            response = self.__get_jobs()
-        elif self._path == '/jobs/{jobId}' and self._method == HTTPMethod.GET.name:
-            response = self.__get_job_details()
-        elif self._path == '/jobs/{jobId}/results' and self._method == HTTPMethod.GET.name:
-            response = self.__get_job_results()
-        else:
+        metrics.start_request(self._method + ' ' + self._path)
+        response = {'statusCode': HTTPStatus.INTERNAL_SERVER_ERROR}
+        try:
+            response = self.__respond()
+            return response
+        finally:
+            metrics.finish_request(StatusCode=int(response['statusCode']), RequestId=self._request.get('request_id'))
+
+
+    def __respond(self):
+        route = self._routes.get((self._path, self._method))
+        if route is None:
             logging.error('Invalid Path. Path: ' + self._path)
             response = {
                 'statusCode': HTTPStatus.NOT_FOUND
             }
+        else:
+            response = self.__call(route)
         if 'headers' not in response:
-            response['headers'] = {
-            "Access-Control-Allow-Headers" : "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "OPTIONS,POST,GET"
-        }
-        return response
+            response['headers'] = dict(DEFAULT_HEADERS)
+        return response_body.encode(response, self._request.get('header'))
 
-    
-    def __get_file_details(self):
-        """
-        Decodes and gets the details of an excel or 
-        csv file to be used for bulk import
-        """
+
+    def __call(self, route):
+        """Calls the handler of a route and maps its errors, the service is only built for requests that have the route's context"""
 
         try:
-            file_details = self._product_manager_service.get_file_details()
-            return {
-                'statusCode': HTTPStatus.OK,
-                'body': json.dumps(file_details)
-            }
-        except IllegalArgumentError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST
-            }
-        except EmptySheetError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST,
-                'body': json.dumps({'errorCode': 'NO_PRODUCT_FOUND'})
-            }
-        except HeaderRowNotFoundError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST,
-                'body': json.dumps({'errorCode': 'HEADER_NOT_FOUND'})
-            }
-        except WrongFileFormat as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST,
-                'body': json.dumps({'errorCode': 'WRONG_FILE_FORMAT'})
-            }
-        except (DataAccessError, ShopifyUnauthorizedError) as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.SERVICE_UNAVAILABLE
-            }
+            self.__check_context(route)
+            self.__decode_body(route)
+            self._product_manager_service = ProductManagerService(self._request)
+            return route.handler(self, self._product_manager_service)
         except Exception as error:
             logging.exception(error)
+            for error_types, status, error_code in route.errors:
+                if isinstance(error, error_types):
+                    response = {'statusCode': status}
+                    if error_code is not None:
+                        response['body'] = response_body.dumps({'errorCode': error_code})
+                    return response
             return {
                 'statusCode': HTTPStatus.INTERNAL_SERVER_ERROR
             }
 
 
-    def __put_job(self):
-        """Create job from task details and returns job details to user"""
+    def __check_context(self, route):
+        if route.user_context and 'userId' not in (self._request.get('user_context') or {}):
+            raise IllegalArgumentError('UserId not present in request')
+        path_params = self._request.get('path_params') or {}
+        for name in route.path_params:
+            if not path_params.get(name):
+                raise IllegalArgumentError(name + ' not present in request path')
 
-        try:
-            job_details = self._product_manager_service.create_job()
-            return {
-                'statusCode': HTTPStatus.OK,
-                'body': json.dumps(job_details)
-            }
-        except IllegalArgumentError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST
-            }
-        except Exception as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.INTERNAL_SERVER_ERROR
-            }
 
+    def __decode_body(self, route):
+        """
+        Decodes the body of a request the api gateway base64 encoded (it encodes
+        every body once */* is a binary media type), unless the route takes it encoded
+        """
 
-    def __get_user_details(self):
+        body = self._request.get('body')
+        if route.base64_body or not self._request.get('body_base64') or body is None:
+            return
         try:
-            user_details = self._product_manager_service.get_user()
-            return {
-                'statusCode': HTTPStatus.OK,
-                'body': json.dumps(user_details)
-            }
-        except IllegalArgumentError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST
-            }
-        except UserAuthenticationError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.UNAUTHORIZED
-            }
-        except Exception as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.INTERNAL_SERVER_ERROR
-            }
+            self._request['body'] = base64.b64decode(body, validate=True).decode('utf-8')
+        except (binascii.Error, UnicodeDecodeError):
+            raise IllegalArgumentError('Request body is not valid base64 encoded utf-8')
+        self._request['body_base64'] = False
 
 
-    def __get_jobs(self):
-        try:
-            jobs = self._product_manager_service.get_jobs()
-            return {
-                'statusCode': HTTPStatus.OK,
-                'body': json.dumps(jobs)
-            }
-        except IllegalArgumentError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST
-            }
-        except Exception as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.INTERNAL_SERVER_ERROR
-            }
+    def __ok(self, body):
+        return {
+            'statusCode': HTTPStatus.OK,
+            'body': response_body.dumps(body)
+        }
 
 
-    def __get_job_details(self):
-        try:
-            job = self._product_manager_service.get_job_details()
-            return {
-                'statusCode': HTTPStatus.OK,
-                'body': json.dumps(job)
-            }
-        except IllegalArgumentError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST
-            }
-        except Exception as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.INTERNAL_SERVER_ERROR
-            }
+    def __get_file_details(self, service):
+        """
+        Decodes and gets the details of an excel or
+        csv file to be used for bulk import
+        """
 
+        return self.__ok(service.get_file_details())
 
-    def __get_job_results(self):
-        try:
-            job_results = self._product_manager_service.get_job_results()
-            return {
-                'statusCode': HTTPStatus.OK,
-                'body': json.dumps(job_results)
-            }
-        except IllegalArgumentError as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.BAD_REQUEST
-            }
-        except Exception as error:
-            logging.exception(error)
-            return {
-                'statusCode': HTTPStatus.INTERNAL_SERVER_ERROR
-            }
\ No newline at end of file
+
+    def __get_upload_url(self, service):
+        """Creates a file record and returns a presigned post for uploading the file to s3"""
+
+        return self.__ok(service.create_upload_url())
+
+
+    def __get_file_analysis(self, service):
+        """Returns the analysis status and details of a file uploaded through a presigned post"""
+
+        return self.__ok(service.get_file_analysis())
+
+
+    def __put_job(self, service):
+        """Create job from task details and returns job details to user"""
+
+        return self.__ok(service.create_job())
+
+
+    def __get_user_details(self, service):
+        return self.__ok(service.get_user())
+
+
+    def __get_jobs(self, service):
+        return self.__ok(service.get_jobs())
+
+
+    def __get_job_statuses(self, service):
+        return self.__ok(service.get_job_statuses())
+
+
+    def __get_job_details(self, service):
+        if self.__get_if_none_match():
+            etag = service.get_job_etag()
+            if self.__is_not_modified(etag):
+                return self.__not_modified(etag)
+        job = service.get_job_details()
+        return {
+            'statusCode': HTTPStatus.OK,
+            'headers': self.__etag_headers(service.get_job_etag(job)),
+            'body': response_body.dumps(job)
+        }
+
+
+    def __get_job_results(self, service):
+        #the etag is read before the results, so results saved in between only make the next poll miss
+        etag = service.get_job_results_etag()
+        if self.__is_not_modified(etag):
+            return self.__not_modified(etag)
+        response = self.__ok(service.get_job_results())
+        if etag is not None:
+            response['headers'] = self.__etag_headers(etag)
+        return response
+
+
+    def __get_if_none_match(self):
+        """Returns the etags of the If-None-Match header of the request"""
+
+        headers = self._request.get('header') or {}
+        value = next((value for name, value in headers.items() if name.lower() == 'if-none-match'), None)
+        if not value:
+            return []
+        #weak etags compare like strong ones for If-None-Match
+        return [etag.strip()[2:] if etag.strip().startswith('W/') else etag.strip() for etag in value.split(',')]
+
+
+    def __is_not_modified(self, etag):
+        if etag is None:
+            return False
+        if_none_match = self.__get_if_none_match()
+        return etag in if_none_match or '*' in if_none_match
+
+
+    def __not_modified(self, etag):
+        return {
+            'statusCode': HTTPStatus.NOT_MODIFIED,
+            'headers': self.__etag_headers(etag)
+        }
+
+
+    def __etag_headers(self, etag):
+        return dict(DEFAULT_HEADERS, **{'ETag': etag, 'Access-Control-Expose-Headers': 'ETag'})
+
+
+    # (path, method) -> Route, resolved with a single lookup per request
+    _routes = {
+        ('/upload', HTTPMethod.POST.name): Route(
+            __get_file_details, FILE_ERRORS + UNAVAILABLE_ERRORS, base64_body=True
+        ),
+        ('/upload/presigned', HTTPMethod.POST.name): Route(
+            __get_upload_url, ((WrongFileFormat, HTTPStatus.BAD_REQUEST, 'WRONG_FILE_FORMAT'),) + UNAVAILABLE_ERRORS
+        ),
+        ('/files/{fileId}', HTTPMethod.GET.name): Route(
+            __get_file_analysis, UNAVAILABLE_ERRORS, path_params=('fileId',)
+        ),
+        ('/run', HTTPMethod.POST.name): Route(__put_job),
+        ('/users', HTTPMethod.POST.name): Route(
+            __get_user_details, ((UserAuthenticationError, HTTPStatus.UNAUTHORIZED, None),)
+        ),
+        ('/jobs', HTTPMethod.POST.name): Route(__get_jobs),
+        ('/jobs/status', HTTPMethod.POST.name): Route(__get_job_statuses, UNAVAILABLE_ERRORS),
+        ('/jobs/{jobId}', HTTPMethod.GET.name): Route(__get_job_details, path_params=('jobId',)),
+        ('/jobs/{jobId}/results', HTTPMethod.GET.name): Route(__get_job_results, path_params=('jobId',)),
+    }
@@ -0,0 +1,104 @@
+import threading
+import boto3
+from utility import metrics
+
+HTTP_POOL_COUNT = 4
+HTTP_POOL_SIZE = 10
+
+_lock = threading.RLock()
+_session = None
+_instances = {}
+
+
+def get_client(service_name):
+    """Returns the boto3 client for a service, creating it once per container"""
+
+    return _get_or_create(('client', service_name), lambda: _get_session().client(service_name))
+
+
+def get_resource(service_name):
+    """Returns the boto3 resource for a service, creating it once per thread (resources are not thread safe)"""
+
+    return _get_or_create(('resource', service_name), lambda: _get_session().resource(service_name), per_thread=True)
+
+
+def get_table(table_name):
+    """Returns the dynamodb Table for a table name, creating it once per thread (resources are not thread safe)"""
+
+    return _get_or_create(('table', table_name), lambda: get_resource('dynamodb').Table(table_name), per_thread=True)
+
+
+def get_http_session():
+    """Returns the http session used for outbound api calls (keeps connections alive between invocations)"""
+
+    def create_session():
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        # retries are done by the callers (see shopify_client), the adapter only pools
+        # connections: one pool per host, sized for the task graph's threads
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=HTTP_POOL_COUNT, pool_maxsize=HTTP_POOL_SIZE, max_retries=0))
+        return session
+
+    return _get_or_create(('http', 'session'), create_session)
+
+
+def register(kind, name, instance):
+    """
+    Replaces the instance held for a (kind, name) pair. Used by tests and
+    benchmarks to swap in local stand-ins for AWS and Shopify.
+
+    Parameters
+    ----------
+    kind: string, required
+        one of 'client', 'resource', 'table' or 'http'
+
+    name: string, required
+        service name, table name, or 'session' for the http session
+
+    instance: object, required
+        object to return for the pair
+    """
+
+    with _lock:
+        _instances[(kind, name)] = instance
+
+
+def reset():
+    """Drops every cached instance so the next call creates new ones"""
+
+    global _session
+    with _lock:
+        _instances.clear()
+        _session = None
+
+
+def _get_session():
+    # boto3's default session is not safe to create from several threads,
+    # so the registry keeps its own session guarded by the registry lock.
+    global _session
+    if _session is None:
+        _session = boto3.session.Session()
+        metrics.register_aws_hooks(_session.events)
+    return _session
+
+
+def _get_or_create(key, factory, per_thread=False):
+    instance = _instances.get(key)
+    if instance is not None:
+        return instance
+
+    # registered instances are shared, created ones are kept per thread when asked
+    if per_thread:
+        key = key + (threading.get_ident(),)
+        instance = _instances.get(key)
+        if instance is not None:
+            return instance
+
+    with _lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = factory()
+            _instances[key] = instance
+    return instance
@@ -1,203 +1,148 @@
 from utility import utils
+from dataaccess.entity_schema import Entity
+from dataaccess.entity_schema import Key
 import json
 
+# error codes longer than this are cut when counted in a job summary
+ERROR_CODE_LENGTH = 100
+
+# attributes read by each read path, so items are not fetched whole for a few fields
+USER_PROFILE_ATTRIBUTES = [
+    'PK', 'SK1', 'SK2', 'owner', 'email', 'reviewed', 'shop_name', 'time_zone', 'active', 'job_count',
+    'active_job_count'
+]
+USER_SHOP_ATTRIBUTES = ['PK', 'SK1', 'access_token']
+FILE_KEY_ATTRIBUTES = ['PK', 's3_key', 'snapshot_key']
+FILE_ANALYSIS_ATTRIBUTES = [
+    'PK', 'user_id', 'file_name', 'file_type', 'actual_row_count', 'header_option', 'analysis_status',
+    'column_details', 'error_code'
+]
+JOB_KEY_ATTRIBUTES = ['PK', 'SK']
+JOB_LIST_ATTRIBUTES = [
+    'PK', 'SK', 'SK1', 'SK2', 'status', 'total_products', 'total_success', 'total_failed', 'current_batch',
+    'options', 'duration'
+]
+JOB_STATUS_ATTRIBUTES = [
+    'PK', 'SK', 'status', 'total_products', 'total_success', 'total_failed', 'current_batch', 'duration'
+]
+
+# attributes of a job that change whenever its details or results do
+JOB_VERSION_ATTRIBUTES = [
+    'status', 'version', 'total_products', 'total_success', 'total_failed', 'current_batch', 'duration'
+]
+
+# attributes of a result item each job result field is extracted from
+JOB_RESULT_ATTRIBUTES = {
+    'id': ['PK'],
+    'job_id': ['SK'],
+    'status': ['status'],
+    'messages': ['errors', 'warnings'],
+    'product_id': ['data'],
+    'product_title': ['data'],
+    'featured_image': ['data']
+}
+
+# the items each kind of object is saved as, file and upload analyses are made with pandas
+# (e.g. dates in sample data) so values json can not encode are saved as strings
+FILE_ENTITY = Entity(
+    keys={'PK': 'file#{id}', 'SK': 'file', 'SK1': 'idle#{idle}'},
+    fields=[
+        'file_name', 'file_type', 's3_key', 'actual_row_count', 'header_row', 'user_id', 'analysis_status',
+        'error_code', 'snapshot_key'
+    ],
+    json_fields=['field_details', 'header_option', 'column_details'],
+    json_default=str
+)
+UPLOAD_HASH_ENTITY = Entity(
+    keys={'PK': 'user#{user_id}', 'SK': 'hash#{hash}'},
+    fields=['file_id', 'file_type', 's3_key', 'snapshot_key'],
+    int_fields=['actual_row_count', 'header_row', 'expires_at'],
+    json_fields=['column_details'],
+    json_default=str
+)
+SHOP_LOCATIONS_ENTITY = Entity(
+    keys={'PK': 'shop#{domain}', 'SK': 'locations'},
+    int_fields=['expires_at'],
+    json_fields=['locations']
+)
+JOB_ENTITY = Entity(
+    keys={
+        'PK': 'job#{id}', 'SK': 'user#{user_id}', 'SK1': '{start_time}',
+        'SK2': Key('{type}#{start_time}', start_time='--')
+    },
+    fields=['input_products', 'status', 'duration'],
+    int_fields=['total_products', 'total_success', 'total_failed', 'current_batch', 'version'],
+    json_fields=['edit_rules', 'options'],
+    read_only=['start_time']
+)
+USER_ENTITY = Entity(
+    keys={'PK': 'user#{id}', 'SK': 'user', 'SK1': 'domain#{domain}', 'SK2': 'subscribtion#{subscribtion}'},
+    fields=[
+        'authenticated', 'reviewed', 'settings', 'access_token', 'email', 'owner', 'time_zone', 'shop_name', 'active'
+    ],
+    int_fields=['job_count', 'active_job_count']
+)
+# the messages and product fields of a job result are read from its json (see extract_job_result_details)
+JOB_RESULT_ENTITY = Entity(
+    keys={'PK': 'result#{id}', 'SK': 'job#{job_id}'},
+    fields=['status'],
+    json_fields=['errors', 'warnings', 'data']
+)
+
+
 def convert_to_db_file (file_obj):
     """Converts file object into object that can be used in database"""
-    
-    db_file = {'SK': 'file'}
-
-    db_file['PK'] = utils.join_str('file#', file_obj['id'])
-    if 'idle' in file_obj:
-        db_file['SK1'] = utils.join_str('idle#', file_obj['idle'])
-    if 'file_name' in file_obj:
-        db_file['file_name'] = file_obj['file_name']
-    if 'file_type' in file_obj:
-        db_file['file_type'] = file_obj['file_type']
-    if 's3_key' in file_obj:
-        db_file['s3_key'] = file_obj['s3_key']
-    if 'actual_row_count' in file_obj:
-        db_file['actual_row_count'] = file_obj['actual_row_count']
-    if 'header_row' in file_obj:
-        db_file['header_row'] = file_obj['header_row']
-    if 'field_details' in file_obj:
-        db_file['field_details'] = json.dumps(file_obj['field_details'])
-
-    return db_file
+
+    return FILE_ENTITY.encode(file_obj)
 
 
 def extract_file_details(db_file):
-    delimeter = '#'
-    file = {}
-    file['id'] = utils.extract_str(db_file['PK'], delimeter, 1)
-    if 'SK1' in db_file:
-        file['idle'] = utils.extract_str(db_file['SK1'], delimeter, 1)
-    if 'file_name' in db_file:
-        file['file_name'] = db_file['file_name']
-    if 'file_type' in db_file:
-        file['file_type'] = db_file['file_type']
-    if 's3_key' in db_file:
-        file['s3_key'] = db_file['s3_key']
-    if 'actual_row_count' in db_file:
-        file['actual_row_count'] = db_file['actual_row_count']
-    if 'header_row' in db_file:
-        file['header_row'] = db_file['header_row']
-    if 'field_details' in db_file:
-        file['field_details'] = json.loads(db_file['field_details'])
-    
-    return file
+    return FILE_ENTITY.decode(db_file)
+
+
+def convert_to_db_upload_hash (upload_hash):
+    """Converts an upload hash (a cached file analysis of a user) into object that can be used in database"""
+
+    return UPLOAD_HASH_ENTITY.encode(upload_hash)
+
+
+def extract_upload_hash_details(db_upload_hash):
+    return UPLOAD_HASH_ENTITY.decode(db_upload_hash)
+
+
+def convert_to_db_shop_locations (shop_locations):
+    """Converts the cached locations of a shop into object that can be used in database"""
+
+    return SHOP_LOCATIONS_ENTITY.encode(shop_locations)
+
+
+def extract_shop_locations_details(db_shop_locations):
+    return SHOP_LOCATIONS_ENTITY.decode(db_shop_locations)
 
 
 def convert_to_db_job (job):
     """Converts job object into object that can be used in database"""
-    
-    db_job = {'SK': 'file'}
-
-    db_job['PK'] = utils.join_str('job#', job['id'])
-    db_job['SK'] = utils.join_str('user#', job['user_id'])
-    if 'start_time' in job:
-        db_job['SK1'] = utils.join_str(job['start_time'])
-    if 'type' in job:
-        start = '--'
-        if 'start_time' in job: start = job['start_time']
-        db_job['SK2'] = utils.join_str(job['type'], '#', start)
-    if 'total_products' in job:
-        db_job['total_products'] = job['total_products']
-    if 'total_success' in job:
-        db_job['total_success'] = job['total_success']
-    if 'total_failed' in job:
-        db_job['total_failed'] = job['total_failed']
-    if 'edit_rules' in job:
-        db_job['edit_rules'] = json.dumps(job['edit_rules'])
-    if 'current_batch' in job:
-        db_job['current_batch'] = job['current_batch']
-    if 'input_products' in job:
-        db_job['input_products'] = job['input_products']
-    if 'options' in job:
-        db_job['options'] = json.dumps(job['options'])
-    if 'status' in job:
-        db_job['status'] = job['status']
-    if 'duration' in job:
-        db_job['duration'] = job['duration']
-
-    return db_job
+
+    return JOB_ENTITY.encode(job)
 
 
 def extract_job_details(db_job):
-    delimeter = '#'
-    job = {}
-    job['id'] = utils.extract_str(db_job['PK'], delimeter, 1)
-    job['user_id'] = utils.extract_str(db_job['SK'], delimeter, 1)
-    if 'SK1' in db_job:
-        job['start_time'] = db_job['SK1']
-    if 'SK2' in db_job:
-        job['type'] = utils.extract_str(db_job['SK2'], delimeter, 0)
-    if 'total_products' in db_job:
-        job['total_products'] = int(db_job['total_products'])
-    if 'total_success' in db_job:
-        job['total_success'] = int(db_job['total_success'])
-    if 'total_failed' in db_job:
-        job['total_failed'] = int(db_job['total_failed'])
-    if 'edit_rules' in db_job:
-        job['edit_rules'] = json.loads(db_job['edit_rules'])
-    if 'start_time' in db_job:
-        job['start_time'] = db_job['start_time']
-    if 'current_batch' in db_job:
-        job['current_batch'] = int(db_job['current_batch'])
-    if 'input_products' in db_job:
-        job['input_products'] = db_job['input_products']
-    if 'options' in db_job:
-        job['options'] = json.loads(db_job['options'])
-    if 'status' in db_job:
-        job['status'] = db_job['status']
-    if 'duration' in db_job:
-        job['duration'] = db_job['duration']
-    
-    return job
+    return JOB_ENTITY.decode(db_job)
 
 
 def extract_user_details(db_user):
-    delimeter = '#'
-    user = {}
-    user['id'] = utils.extract_str(db_user['PK'], delimeter, 1)
-    if 'SK1' in db_user:
-        user['domain'] = utils.extract_str(db_user['SK1'], delimeter, 1)
-    if 'SK2' in db_user:
-        user['subscribtion'] = utils.extract_str(db_user['SK2'], delimeter, 1)
-    if 'authenticated' in db_user:
-        user['authenticated'] = db_user['authenticated']
-    if 'reviewed' in db_user:
-        user['reviewed'] = db_user['reviewed']
-    if 'settings' in db_user:
-        user['settings'] = db_user['settings']
-    if 'access_token' in db_user:
-        user['access_token'] = db_user['access_token']
-    if 'email' in db_user:
-        user['email'] = db_user['email']
-    if 'owner' in db_user:
-        user['owner'] = db_user['owner']
-    if 'time_zone' in db_user:
-        user['time_zone'] = db_user['time_zone']
-    if 'shop_name' in db_user:
-        user['shop_name'] = db_user['shop_name']
-    if 'active' in db_user:
-        user['active'] = db_user['active']
-    if 'job_count' in db_user:
-        user['job_count'] = int(db_user['job_count'])
-    if 'active_job_count' in db_user:
-        user['active_job_count'] = int(db_user['active_job_count'])
-    
-    return user
+    return USER_ENTITY.decode(db_user)
+
 
 def convert_to_db_user (user):
-    db_user = {'SK': 'user'}
-
-    db_user['PK'] = utils.join_str('user#', user['id'])
-    if 'domain' in user:
-        db_user['SK1'] = utils.join_str('domain#', user['domain'])
-    if 'subscribtion' in user:
-        db_user['SK2'] = utils.join_str('subscribtion#', user['subscribtion'])
-    if 'authenticated' in user:
-        db_user['authenticated'] = user['authenticated']
-    if 'reviewed' in user:
-        db_user['reviewed'] = user['reviewed']
-    if 'authenticated' in user:
-        db_user['authenticated'] = user['authenticated']
-    if 'settings' in user:
-        db_user['settings'] = user['settings']
-    if 'access_token' in user:
-        db_user['access_token'] = user['access_token']
-    if 'email' in user:
-        db_user['email'] = user['email']
-    if 'owner' in user:
-        db_user['owner'] = user['owner']
-    if 'time_zone' in user:
-        db_user['time_zone'] = user['time_zone']
-    if 'shop_name' in user:
-        db_user['shop_name'] = user['shop_name']
-    if 'active' in user:
-        db_user['active'] = user['active']
-    if 'job_count' in user:
-        db_user['job_count'] = user['job_count']
-    if 'active_job_count' in user:
-        db_user['active_job_count'] = user['active_job_count']
-
-    return db_user
+    return USER_ENTITY.encode(user)
 
 
 def extract_job_result_details(db_result):
-    delimeter = '#'
-    job_result = {}
-    job_result['id'] = utils.extract_str(db_result['PK'], delimeter, 1)
-    job_result['job_id'] = utils.extract_str(db_result['SK'], delimeter, 1)
-    if 'status' in db_result:
-        job_result['status'] = db_result['status']
-    job_result['messages'] = []
-    if 'errors' in db_result:
-        job_result['messages'].extend(json.loads(db_result['errors']))
-    if 'warnings' in db_result:
-        job_result['messages'].extend(json.loads(db_result['warnings']))
-    if 'data' in db_result:
-        job_data = json.loads(db_result['data'])
+    job_result = JOB_RESULT_ENTITY.decode(db_result)
+    job_result['messages'] = job_result.pop('errors', []) + job_result.pop('warnings', [])
+    job_data = job_result.pop('data', None)
+    if job_data is not None:
         if 'id' in job_data:
             job_result['product_id'] = utils.extract_str(job_data['id'], '/', -1)
         if 'title' in job_data:
@@ -212,4 +157,72 @@ def extract_job_result_details(db_result):
                 job_result['featured_image'] = job_data['images'][0]['src']
             else:
                 job_result['featured_image'] = ''
-    return job_result
\ No newline at end of file
+    return job_result
+
+def summarize_job_results(db_results, max_failures, summary=None):
+    """
+    Adds result items to a job summary (a new one when summary is None): the
+    count of results by status, the count of errors by error code and the
+    first max_failures results that have errors
+    """
+
+    if summary is None:
+        summary = {'total': 0, 'status_counts': {}, 'error_codes': {}, 'failures': []}
+    for db_result in db_results:
+        summary['total'] += 1
+        status = db_result.get('status', 'UNKNOWN')
+        summary['status_counts'][status] = summary['status_counts'].get(status, 0) + 1
+        errors = json.loads(db_result['errors']) if db_result.get('errors') else []
+        for error in errors:
+            error_code = get_error_code(error)
+            summary['error_codes'][error_code] = summary['error_codes'].get(error_code, 0) + 1
+        if errors and len(summary['failures']) < max_failures:
+            failure = extract_job_result_details(db_result)
+            del failure['job_id']
+            summary['failures'].append(failure)
+    return summary
+
+
+def get_error_code(error):
+    """Returns the code an error of a job result is counted under"""
+
+    if isinstance(error, dict):
+        error = error.get('code') or error.get('message') or json.dumps(error, sort_keys=True)
+    return str(error)[:ERROR_CODE_LENGTH]
+
+
+def convert_to_db_job_summary (job_id, summary):
+    """Converts job summary object into object that can be used in database"""
+
+    db_summary = {'SK': 'summary'}
+
+    db_summary['PK'] = utils.join_str('job#', job_id)
+    db_summary['total'] = summary['total']
+    for status, count in summary['status_counts'].items():
+        db_summary[utils.join_str('status#', status)] = count
+    for error_code, count in summary['error_codes'].items():
+        db_summary[utils.join_str('error#', error_code)] = count
+    db_summary['failures'] = summary['failures']
+
+    return db_summary
+
+
+def extract_job_summary_details(db_summary, max_failures):
+    summary = {'total': int(db_summary.get('total', 0)), 'status_counts': {}, 'error_codes': {}}
+    for name, value in db_summary.items():
+        if name.startswith('status#'):
+            summary['status_counts'][name[len('status#'):]] = int(value)
+        elif name.startswith('error#'):
+            summary['error_codes'][name[len('error#'):]] = int(value)
+    # concurrent writers can append a few failures past the limit
+    summary['failures'] = list(db_summary.get('failures', []))[:max_failures]
+    return summary
+
+
+def get_job_result_attributes(fields):
+    """Returns the attributes of the result items to read for the given job result fields (the keys are always read)"""
+
+    attributes = ['PK', 'SK', 'SK1']
+    for field in fields:
+        attributes.extend(attribute for attribute in JOB_RESULT_ATTRIBUTES[field] if attribute not in attributes)
+    return attributes
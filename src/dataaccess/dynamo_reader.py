@@ -0,0 +1,182 @@
+import random
+import time
+from decimal import Decimal
+from boto3.dynamodb.conditions import ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeSerializer
+from datamodel.custom_exceptions import DataAccessError
+
+_serializer = TypeSerializer()
+
+#keys dynamodb takes in one BatchGetItem request
+BATCH_GET_SIZE = 100
+#requests sent for the keys a BatchGetItem request left unprocessed, after the first one
+BATCH_GET_RETRIES = 5
+#backoff between them is drawn from [0, min(BATCH_BACKOFF_CAP, BATCH_BACKOFF_BASE * 2^attempt)] seconds
+BATCH_BACKOFF_BASE = 0.05
+BATCH_BACKOFF_CAP = 1.0
+
+
+class DynamoReader:
+    """
+    Reads items of a table through the low level dynamodb client. Conditions are
+    the boto3 Key/Attr conditions used with Table resources, but items are
+    decoded by decode_item instead of the resource's TypeDeserializer, and each
+    read only returns the attributes it asks for.
+
+    Methods
+    -------
+    get_item(key, attributes): returns an item, None if it does not exist
+    batch_get_items(keys, attributes): returns the items of several keys
+    query(key_condition, ...): returns a page of items and the key to continue from
+    """
+
+    def __init__(self, client, table_name):
+        self._client = client
+        self._table_name = table_name
+
+
+    def get_item(self, key, attributes=None):
+        request = {'TableName': self._table_name, 'Key': encode_item(key)}
+        _add_projection(request, attributes)
+        response = self._client.get_item(**request)
+        return decode_item(response['Item']) if 'Item' in response else None
+
+
+    def batch_get_items(self, keys, attributes=None):
+        """
+        Reads the items of several keys with BatchGetItem requests of up to
+        BATCH_GET_SIZE keys. Keys dynamodb leaves unprocessed (when a request is
+        throttled or its response too large) are sent again with jittered
+        exponential backoff, up to BATCH_GET_RETRIES times.
+
+        Returns
+        -------
+        list of the decoded items that exist, in no particular order
+        """
+
+        items = []
+        encoded_keys = [encode_item(key) for key in keys]
+        for start in range(0, len(encoded_keys), BATCH_GET_SIZE):
+            request = {'Keys': encoded_keys[start:start + BATCH_GET_SIZE]}
+            _add_projection(request, attributes)
+            attempt = 0
+            while True:
+                response = self._client.batch_get_item(RequestItems={self._table_name: request})
+                items.extend(decode_item(item) for item in response['Responses'].get(self._table_name, []))
+                unprocessed = response.get('UnprocessedKeys', {}).get(self._table_name)
+                if not unprocessed:
+                    break
+                if attempt >= BATCH_GET_RETRIES:
+                    raise DataAccessError(
+                        str(len(unprocessed['Keys'])) + ' keys still unprocessed after '
+                        + str(attempt + 1) + ' batch get requests'
+                    )
+                time.sleep(random.uniform(0, min(BATCH_BACKOFF_CAP, BATCH_BACKOFF_BASE * 2 ** attempt)))
+                attempt += 1
+                #the unprocessed keys come back with the projection of the request
+                request = unprocessed
+        return items
+
+
+    def query(self, key_condition, index_name=None, filter_condition=None, attributes=None,
+              limit=None, scan_forward=True, exclusive_start_key=None):
+        """
+        Runs one query request.
+
+        Returns
+        -------
+        dict with the decoded 'items' and the 'last_evaluated_key' to continue
+        from (None on the last page)
+        """
+
+        builder = ConditionExpressionBuilder()
+        names, values = {}, {}
+        key_expression = builder.build_expression(key_condition, is_key_condition=True)
+        names.update(key_expression.attribute_name_placeholders)
+        values.update(key_expression.attribute_value_placeholders)
+        request = {
+            'TableName': self._table_name,
+            'KeyConditionExpression': key_expression.condition_expression,
+            'ScanIndexForward': scan_forward
+        }
+        if filter_condition is not None:
+            filter_expression = builder.build_expression(filter_condition)
+            names.update(filter_expression.attribute_name_placeholders)
+            values.update(filter_expression.attribute_value_placeholders)
+            request['FilterExpression'] = filter_expression.condition_expression
+        if index_name is not None:
+            request['IndexName'] = index_name
+        if limit is not None:
+            request['Limit'] = limit
+        if exclusive_start_key is not None:
+            request['ExclusiveStartKey'] = encode_item(exclusive_start_key)
+        _add_projection(request, attributes, names)
+        request['ExpressionAttributeNames'] = names
+        request['ExpressionAttributeValues'] = encode_item(values)
+
+        response = self._client.query(**request)
+        last_evaluated_key = response.get('LastEvaluatedKey')
+        return {
+            'items': [decode_item(item) for item in response['Items']],
+            'last_evaluated_key': decode_item(last_evaluated_key) if last_evaluated_key else None
+        }
+
+
+def decode_item(item):
+    """
+    Decodes an item in the low level dynamodb format ({'S': ...}, {'N': ...}) to
+    python values. Integers decode to int, other numbers to Decimal.
+    """
+
+    decoded = {}
+    for name, value in item.items():
+        string = value.get('S')
+        if string is not None:
+            decoded[name] = string
+        else:
+            decoded[name] = _decode_value(value)
+    return decoded
+
+
+def encode_item(item):
+    return {name: _serializer.serialize(value) for name, value in item.items()}
+
+
+def _decode_value(value):
+    for type_code, data in value.items():
+        return _DECODERS[type_code](data)
+
+
+def _decode_number(number):
+    if '.' in number or 'e' in number or 'E' in number:
+        return Decimal(number)
+    return int(number)
+
+
+def _decode_list(values):
+    return [_decode_value(value) for value in values]
+
+
+_DECODERS = {
+    'S': str,
+    'N': _decode_number,
+    'BOOL': bool,
+    'B': bytes,
+    'NULL': lambda data: None,
+    'M': decode_item,
+    'L': _decode_list,
+    'SS': set,
+    'BS': set,
+    'NS': lambda numbers: set(_decode_number(number) for number in numbers)
+}
+
+
+def _add_projection(request, attributes, names=None):
+    if not attributes:
+        return
+    projection_names = {'#p' + str(index): attribute for index, attribute in enumerate(attributes)}
+    request['ProjectionExpression'] = ', '.join(projection_names.keys())
+    if names is None:
+        request['ExpressionAttributeNames'] = projection_names
+    else:
+        names.update(projection_names)
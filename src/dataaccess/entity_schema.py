@@ -0,0 +1,182 @@
+import json
+from string import Formatter
+
+# the attributes that make the primary key of an item, the other keys are index keys
+TABLE_KEYS = ('PK', 'SK')
+
+
+class Key:
+    """
+    A key attribute composed from fields of an object, e.g. Key('job#{id}') or
+    Key('{type}#{start_time}', start_time='--'). A template without fields is a
+    constant attribute. Index keys are written when all their fields (or their
+    defaults) are there, fields read back equal to their default are skipped.
+    """
+
+    def __init__(self, template, **defaults):
+        self.template = template
+        self.defaults = defaults
+        #the literal before each field and the one after the last field
+        self.literals = ['']
+        self.fields = []
+        for literal, field, _, _ in Formatter().parse(template):
+            self.literals[-1] += literal
+            if field is not None:
+                if not field or len(self.literals) > 1 and not self.literals[-1]:
+                    raise ValueError('Fields of key templates must be named and apart: ' + template)
+                self.fields.append(field)
+                self.literals.append('')
+
+
+class Entity:
+    """
+    Declarative schema of the items one kind of object is saved as, compiled
+    once into straight-line encode(obj) -> item and decode(item) -> obj
+    functions (the code a hand-written converter would have).
+
+    Parameters
+    ----------
+    keys: dict of key attribute -> Key (or template string), in the order they are read
+    fields: attributes saved as they are
+    int_fields: attributes saved as they are and read back as int (dynamodb numbers read as Decimal)
+    json_fields: attributes saved as json strings
+    read_only: attributes read from older items that are no longer written
+    json_default: passed to json.dumps for values json can not encode
+    """
+
+    def __init__(self, keys, fields=(), int_fields=(), json_fields=(), read_only=(), json_default=None):
+        self.keys = {attribute: key if isinstance(key, Key) else Key(key) for attribute, key in keys.items()}
+        self.fields = tuple(fields)
+        self.int_fields = tuple(int_fields)
+        self.json_fields = tuple(json_fields)
+        self.read_only = tuple(read_only)
+        self.json_default = json_default
+        self.encode = self.__compile_encode()
+        self.decode = self.__compile_decode()
+        self.key = self.__compile_key()
+
+
+    def __compile_encode(self):
+        namespace = {'dumps': json.dumps}
+        if self.json_default is not None:
+            namespace['dumps'] = lambda value, default=self.json_default: json.dumps(value, default=default)
+        lines = self.__encode_keys(self.keys, namespace)
+        for name in self.fields + self.int_fields:
+            lines.append('if {0!r} in obj: item[{0!r}] = obj[{0!r}]'.format(name))
+        for name in self.json_fields:
+            lines.append('if {0!r} in obj: item[{0!r}] = dumps(obj[{0!r}])'.format(name))
+        return _compile('encode', 'obj', lines, 'item', namespace)
+
+
+    def __compile_decode(self):
+        namespace = {'loads': json.loads}
+        lines = ['obj = {}']
+        for attribute, key in self.keys.items():
+            if not key.fields:
+                continue
+            if _is_prefixed(key):
+                lines.append('if {0!r} in item: obj[{1!r}] = item[{0!r}][{2}:]'.format(
+                    attribute, key.fields[0], len(key.literals[0])
+                ))
+            else:
+                lines.extend(_decode_key_lines(attribute, key))
+        for name in self.fields:
+            lines.append('if {0!r} in item: obj[{0!r}] = item[{0!r}]'.format(name))
+        for name in self.int_fields:
+            lines.append('if {0!r} in item: obj[{0!r}] = int(item[{0!r}])'.format(name))
+        #most json lists saved are empty (e.g. the errors of a result), they are not parsed
+        for name in self.json_fields:
+            lines.append('if {0!r} in item:'.format(name))
+            lines.append('    value = item[{0!r}]'.format(name))
+            lines.append("    obj[{0!r}] = [] if value == '[]' else loads(value)".format(name))
+        #read last, so they win over the keys older items are read from now
+        for name in self.read_only:
+            lines.append('if {0!r} in item: obj[{0!r}] = item[{0!r}]'.format(name))
+        return _compile('decode', 'item', lines, 'obj', namespace)
+
+
+    def __compile_key(self):
+        namespace = {}
+        lines = self.__encode_keys({attribute: self.keys[attribute] for attribute in TABLE_KEYS}, namespace)
+        return _compile('key', 'obj', lines, 'item', namespace)
+
+
+    def __encode_keys(self, keys, namespace):
+        constants = {attribute: key.template for attribute, key in keys.items() if not key.fields}
+        lines = ['item = {!r}'.format(constants)]
+        for attribute, key in keys.items():
+            if not key.fields:
+                continue
+            required = attribute in TABLE_KEYS
+            if _is_prefixed(key):
+                prefix, field = key.literals[0], key.fields[0]
+                line = 'item[{0!r}] = {1!r} + str(obj[{2!r}])'.format(attribute, prefix, field)
+                lines.append(line if required else 'if {0!r} in obj: {1}'.format(field, line))
+            else:
+                namespace['encode_' + attribute] = _key_encoder(key, required)
+                lines.append('{0} = encode_{0}(obj)'.format(attribute))
+                lines.append('if {0} is not None: item[{0!r}] = {0}'.format(attribute))
+        return lines
+
+
+def _compile(name, argument, lines, result, namespace):
+    source = 'def {}({}):\n'.format(name, argument)
+    source += ''.join('    ' + line + '\n' for line in lines)
+    source += '    return ' + result + '\n'
+    exec(source, namespace)
+    return namespace[name]
+
+
+def _is_prefixed(key):
+    """True for keys that are a prefix and a single field, e.g. 'job#{id}'"""
+    return len(key.fields) == 1 and not key.literals[1] and not key.defaults
+
+
+def _key_encoder(key, required):
+    literals, fields, defaults = key.literals, key.fields, key.defaults
+
+    def encode_key(obj):
+        parts = [literals[0]]
+        for index, field in enumerate(fields):
+            if field in obj:
+                value = obj[field]
+            elif field in defaults:
+                value = defaults[field]
+            elif required:
+                raise KeyError(field)
+            else:
+                return None
+            parts.append(str(value))
+            parts.append(literals[index + 1])
+        return ''.join(parts)
+
+    return encode_key
+
+
+def _decode_key_lines(attribute, key):
+    """
+    Lines reading the fields of a composite key, each field is cut at the
+    literal that follows it. Fields read from an earlier key are kept.
+    """
+
+    lines = ['if {!r} in item:'.format(attribute), '    value = item[{!r}]'.format(attribute)]
+    indent = '    '
+    position = str(len(key.literals[0]))
+    for index, field in enumerate(key.fields):
+        literal = key.literals[index + 1]
+        if literal:
+            lines.append(indent + 'end = value.find({!r}, {})'.format(literal, position))
+            lines.append(indent + 'if end >= 0:')
+            indent += '    '
+            part = 'value[{}:end]'.format(position)
+        else:
+            part = 'value[{}:]'.format(position)
+        condition = '{!r} not in obj'.format(field)
+        if field in key.defaults:
+            condition += ' and {} != {!r}'.format(part, key.defaults[field])
+        lines.append(indent + 'if {}: obj[{!r}] = {}'.format(condition, field, part))
+        if literal and index < len(key.fields) - 1:
+            #the next field starts after the literal
+            lines.append(indent + 'start = end + {}'.format(len(literal)))
+            position = 'start'
+    return lines
@@ -1,18 +1,26 @@
 from datamodel.custom_exceptions import DataAccessError
+from datamodel.custom_exceptions import IllegalArgumentError
+from datamodel.custom_enums import ResultFilter
 import dataaccess.data_model_utils as data_utils
+from dataaccess import client_registry
+from dataaccess.shopify_client import ShopifyClient
+from dataaccess.dynamo_reader import DynamoReader
+from dataaccess.dynamo_reader import encode_item
 from utility import utils
-import boto3
+from utility.buffer_reader import BufferReader
+from utility.file_snapshot import SnapshotReader
+from utility import metrics
 from botocore.exceptions import ClientError
 from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.conditions import Attr
 import os
+import time
 import logging
 import json
-import requests
-from http import HTTPStatus
-from datamodel.custom_exceptions import ShopifyUnauthorizedError
 
 logging.basicConfig(level=logging.INFO)
 
+@metrics.timed_methods('dataaccess')
 class ProductManagerDataAccess:
     """ 
     Class for getting data and adding data to database and other sources
@@ -21,36 +29,145 @@ class ProductManagerDataAccess:
 
     def __init__(self):
         self._upload_bucket = os.environ.get('s3_file_upload_bucket')
-        self._s3_client = boto3.client('s3')
-        self._dynamo_client = boto3.client('dynamodb')
-        bulk_manager_table = os.environ.get('bulk_manager_table')
-        self._dynamodb = boto3.resource('dynamodb')
-        self._bulk_manager_table =  self._dynamodb.Table(bulk_manager_table) 
-        self._sns_client = boto3.client('sns')
+        self._bulk_manager_table_name = os.environ.get('bulk_manager_table')
         self._api_version = os.environ.get('shopify_api_version')
+        self._max_upload_size = int(os.environ.get('max_upload_file_size', 100 * 1024 * 1024))
+        self._upload_url_expiration = int(os.environ.get('upload_url_expiration', 900))
+        #seconds an upload analysis is reused for identical uploads of a user (0 turns the cache off)
+        self._file_analysis_cache_ttl = int(os.environ.get('file_analysis_cache_ttl', 7 * 24 * 3600))
+        #seconds the locations of a shop are cached for
+        self._locations_cache_ttl = int(os.environ.get('locations_cache_ttl', 6 * 3600))
+        #seconds the presigned url of a job results export is valid for
+        self._export_url_expiration = int(os.environ.get('result_export_url_expiration', 3600))
+        #failed results kept on the summary item of a job
+        self._summary_failure_count = int(os.environ.get('job_summary_failure_count', 20))
+
+
+    # Clients come from the client registry so they are created once per container
+    # and reused across warm invocations instead of being rebuilt on every request.
+    @property
+    def _s3_client(self):
+        return client_registry.get_client('s3')
+
+
+    @property
+    def _dynamo_client(self):
+        return client_registry.get_client('dynamodb')
+
+
+    @property
+    def _bulk_manager_table(self):
+        return client_registry.get_table(self._bulk_manager_table_name)
+
+
+    @property
+    def _reader(self):
+        return DynamoReader(self._dynamo_client, self._bulk_manager_table_name)
+
+
+    @property
+    def _sns_client(self):
+        return client_registry.get_client('sns')
+
     
     
-    def save_to_s3 (self, file_key, file_content):
+    def save_to_s3 (self, file_key, file_content, metadata=None):
         try:
             response = self._s3_client.put_object (
                 Bucket=self._upload_bucket,
-                Body=file_content,
+                Body=BufferReader(file_content),
+                Key=file_key,
+                Metadata=metadata or {}
+            )
+            return True
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def delete_from_s3(self, file_key):
+        try:
+            response = self._s3_client.delete_object(
+                Bucket=self._upload_bucket,
+                Key=file_key
+            )
+            return True
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def get_from_s3(self, file_key):
+        try:
+            response = self._s3_client.get_object(
+                Bucket=self._upload_bucket,
+                Key=file_key
+            )
+            return response['Body'].read()
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def get_from_s3_with_metadata(self, file_key):
+        """Returns the content of an s3 object and the user metadata it was saved with"""
+
+        try:
+            response = self._s3_client.get_object(
+                Bucket=self._upload_bucket,
+                Key=file_key
+            )
+            return response['Body'].read(), response.get('Metadata') or {}
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def exists_in_s3(self, file_key):
+        try:
+            self._s3_client.head_object(
+                Bucket=self._upload_bucket,
                 Key=file_key
             )
             return True
+        except ClientError as error:
+            if error.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise DataAccessError(error)
+
+
+    def get_snapshot(self, snapshot_key):
+        """Returns a SnapshotReader streaming a file snapshot from s3 (see FileReader.write_snapshot)"""
+
+        try:
+            response = self._s3_client.get_object(
+                Bucket=self._upload_bucket,
+                Key=snapshot_key
+            )
+            return SnapshotReader(response['Body'])
         except ClientError as error:
             raise DataAccessError(error)
 
 
-    def get_user_by_id(self, user_id):
-        user_to_get = {'id': user_id}
-        db_user = data_utils.convert_to_db_user(user_to_get)
+    def get_presigned_upload(self, file_key):
+        """Returns the url and form fields of a presigned post for uploading a file to the upload bucket"""
 
         try:
-            response = self._bulk_manager_table.get_item(Key=db_user)
+            return self._s3_client.generate_presigned_post(
+                Bucket=self._upload_bucket,
+                Key=file_key,
+                Conditions=[['content-length-range', 1, self._max_upload_size]],
+                ExpiresIn=self._upload_url_expiration
+            )
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def get_user_by_id(self, user_id, attributes=None):
+        """Returns a user with only the given attributes (all of them when attributes is None)"""
+
+        db_user = data_utils.USER_ENTITY.key({'id': user_id})
+
+        try:
+            db_user = self._reader.get_item(db_user, attributes)
             user = None
-            if 'Item' in response:
-                db_user = response['Item']
+            if db_user is not None:
                 user = data_utils.extract_user_details(db_user)
 
             return user
@@ -74,21 +191,56 @@ class ProductManagerDataAccess:
             raise DataAccessError(error)
 
 
-    def get_file_by_id(self, file_id):
-        file_to_get = {'id': file_id}
-        db_file = data_utils.convert_to_db_file(file_to_get)
+    def get_file_by_id(self, file_id, attributes=None):
+        """Returns a file with only the given attributes (all of them when attributes is None)"""
+
+        db_file = data_utils.FILE_ENTITY.key({'id': file_id})
 
         try:
-            response = self._bulk_manager_table.get_item(Key=db_file)
+            db_file = self._reader.get_item(db_file, attributes)
             file_obj = None
-            if 'Item' in response:
-                db_file = response['Item']
+            if db_file is not None:
                 file_obj = data_utils.extract_file_details(db_file)
             return file_obj
         except ClientError as error:
             raise DataAccessError(error)
 
 
+    def get_upload_hash(self, user_id, upload_hash):
+        """Returns the cached analysis of an earlier upload with the same hash, None if there is none or it expired"""
+
+        if self._file_analysis_cache_ttl <= 0:
+            return None
+        db_upload_hash = data_utils.UPLOAD_HASH_ENTITY.key({'user_id': user_id, 'hash': upload_hash})
+
+        try:
+            db_upload_hash = self._reader.get_item(db_upload_hash)
+            cached_upload = None
+            #items past their ttl can still be read until dynamodb deletes them
+            if db_upload_hash is not None and db_upload_hash.get('expires_at', 0) > time.time():
+                cached_upload = data_utils.extract_upload_hash_details(db_upload_hash)
+            return cached_upload
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def put_upload_hash(self, upload_hash):
+        """Saves the analysis of an upload under its hash, it expires after the file analysis cache ttl"""
+
+        if self._file_analysis_cache_ttl <= 0:
+            return False
+        upload_hash['expires_at'] = int(time.time()) + self._file_analysis_cache_ttl
+        db_upload_hash = data_utils.convert_to_db_upload_hash(upload_hash)
+
+        try:
+            response = self._bulk_manager_table.put_item(
+                Item=db_upload_hash
+            )
+            return True
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
     def basic_file_update(self, file_obj):
         if 'id' not in file_obj:
             raise KeyError('\'id\' value for file cannot be null')
@@ -137,41 +289,32 @@ class ProductManagerDataAccess:
 
     def perform_create_job_transaction(self, job, updated_file):
         expression_attr_values = {':details': { 'S': json.dumps(updated_file['field_details'])}}
+        update_expression = 'SET field_details=:details'
+        if updated_file.get('snapshot_key') is not None:
+            expression_attr_values[':snapshot'] = {'S': updated_file['snapshot_key']}
+            update_expression += ', snapshot_key=:snapshot'
         try:
             response = self._dynamo_client.transact_write_items(
                 TransactItems=[
                     {
                         'Put': {
                             'TableName': os.environ.get('bulk_manager_table'),
-                            'Item': {
-                                'PK': { 'S': utils.join_str('job#', job['id']) },
-                                'SK': { 'S': utils.join_str('user#', job['user_id']) },
-                                'SK1': { 'S': utils.join_str(job['start_time']) },
-                                'SK2': { 'S': utils.join_str(job['type'], '#', job['start_time']) },
-                                'status': { 'S': job['status'] },
-                                'options': {'S': json.dumps(job['options'])}
-                            },
+                            'Item': encode_item(data_utils.convert_to_db_job(job)),
                             'ConditionExpression': 'attribute_not_exists(PK)'
                         }
                     },
                     {
                         'Update': {
                             'TableName': os.environ.get('bulk_manager_table'),
-                            'Key': {
-                                'PK': { 'S': utils.join_str('file#', updated_file['id']) },
-                                'SK': { 'S': 'file' },
-                            },
-                            'UpdateExpression': 'SET field_details=:details',
+                            'Key': encode_item(data_utils.FILE_ENTITY.key(updated_file)),
+                            'UpdateExpression': update_expression,
                             'ExpressionAttributeValues': expression_attr_values
                         }
                     },
                     {
                         'Update': {
                             'TableName': os.environ.get('bulk_manager_table'),
-                            'Key': {
-                                'PK': { 'S': utils.join_str('user#', job['user_id']) },
-                                'SK': { 'S': 'user' },
-                            },
+                            'Key': encode_item(data_utils.USER_ENTITY.key({'id': job['user_id']})),
                             'UpdateExpression': 'SET job_count = job_count + :incr',
                             'ExpressionAttributeValues': {
                                 ':incr': { 'N': '1' }
@@ -188,53 +331,75 @@ class ProductManagerDataAccess:
             raise DataAccessError(error)
 
 
-    def get_jobs(self, user_id):
-        # The maximum size of data that can be retrieved from dynamodb is 1MB so we will be retrieving data in batches.
+    def get_jobs(self, user_id, page_size, exclusive_start_key=None, job_filter=None):
+        """
+        Returns one page of a user's jobs, newest first, with the LastEvaluatedKey
+        to continue from (None on the last page).
+
+        A task type becomes a key condition on SK2 (type#start_time) of GSI2, and a
+        start time range one on SK2 or on SK1 (start_time) of GSI1, so only matching
+        jobs are read. Statuses are a filter expression, which is applied after
+        page_size items are read, so a page can hold fewer jobs than page_size
+        and still be followed by another one.
+        """
+
+        job_filter = job_filter or {}
+        index_name, range_key, range_condition = self.__get_jobs_range_condition(job_filter)
+        if exclusive_start_key is not None and range_key not in exclusive_start_key:
+            raise IllegalArgumentError('Continuation token does not match the filters of the request')
+
         user_id = utils.join_str('user#', user_id)
-        limit = 500
-        response_items = []
-        lastEvaluatedKey = None
+        key_condition = Key('SK').eq(user_id)
+        if range_condition is not None:
+            key_condition = key_condition & range_condition
+        filter_condition = None
+        if job_filter.get('status'):
+            filter_condition = Attr('status').is_in(job_filter['status'])
 
         try:
-            response = self._bulk_manager_table.query(
-                IndexName = 'GSI2',
-                KeyConditionExpression=Key('SK').eq(user_id),
-                ScanIndexForward=False,
-                Limit=limit,
+            response = self._reader.query(
+                key_condition,
+                index_name=index_name,
+                filter_condition=filter_condition,
+                attributes=data_utils.JOB_LIST_ATTRIBUTES,
+                limit=page_size,
+                scan_forward=False,
+                exclusive_start_key=exclusive_start_key
             )
-            # The 'Item' property should always exist in the query response.
-            if 'Items' not in response: 
-                raise DataAccessError('Error occurred whiles querying for user jobs. Details: user_id: ' + user_id + ' response: ' + response)  
-            response_items.extend(response['Items'])   
-            
-            # LastEvaluatedKey indicates that there is still data to be retrieved from the query,
-            # we will keep on querying until there is not lastevaluatedkey in the response.
-            if 'LastEvaluatedKey' in response: lastEvaluatedKey = response['LastEvaluatedKey']  
-            while lastEvaluatedKey is not None:
-                response = self._bulk_manager_table.query(
-                    IndexName = 'GSI2',
-                    KeyConditionExpression=Key('SK').eq(user_id),
-                    ScanIndexForward=False,
-                    Limit=limit,
-                    ExclusiveStartKey=lastEvaluatedKey
-                )
-                if 'Items' not in response: 
-                    raise DataAccessError('Error occurred whiles in user jobs query. Details: user_id: ' + user_id + ' response: ' + response)  
-                response_items.extend(response['Items'])  
-                if 'LastEvaluatedKey' in response: 
-                    lastEvaluatedKey = response['LastEvaluatedKey']
-                else:
-                    lastEvaluatedKey = None  
-
-            if len(response_items) == 0: return []
-            jobs = [data_utils.extract_job_details(item) for item in response_items]
-            return jobs
+            return {
+                'jobs': [data_utils.extract_job_details(item) for item in response['items']],
+                'last_evaluated_key': response['last_evaluated_key']
+            }
         except ClientError as error:
             raise DataAccessError(error)
         except Exception as error:
             raise DataAccessError(error)
 
 
+    def __get_jobs_range_condition(self, job_filter):
+        """Returns the index, its sort key and the sort key condition for the filters of a jobs query"""
+
+        start_time_from = job_filter.get('start_time_from')
+        start_time_to = job_filter.get('start_time_to')
+        if 'type' in job_filter:
+            prefix = utils.join_str(job_filter['type'], '#')
+            if start_time_from is None and start_time_to is None:
+                return 'GSI2', 'SK2', Key('SK2').begins_with(prefix)
+            #'~' sorts after every character of a start time, so an open range ends after the last job of the type
+            return 'GSI2', 'SK2', Key('SK2').between(
+                prefix + (start_time_from or ''), prefix + (start_time_to or '~')
+            )
+
+        if start_time_from is not None and start_time_to is not None:
+            return 'GSI1', 'SK1', Key('SK1').between(start_time_from, start_time_to)
+        if start_time_from is not None:
+            return 'GSI1', 'SK1', Key('SK1').gte(start_time_from)
+        if start_time_to is not None:
+            return 'GSI1', 'SK1', Key('SK1').lte(start_time_to)
+        #without a type, SK2 would group the jobs by type, SK1 keeps them in start time order
+        return 'GSI1', 'SK1', None
+
+
     def get_job_results(self, job_id):
         # The maximum size of data that can be retrieved from dynamodb is 1MB so we will be retrieving data in batches.
         job_id = utils.join_str('job#', job_id)
@@ -243,34 +408,16 @@ class ProductManagerDataAccess:
         lastEvaluatedKey = None
 
         try:
-            response = self._bulk_manager_table.query(
-                IndexName = 'GSI1',
-                KeyConditionExpression=Key('SK').eq(job_id),
-                Limit=limit,
-            )
-            # The 'Item' property should always exist in the query response.
-            if 'Items' not in response: 
-                raise DataAccessError('Error occurred whiles querying for job results. Details: job_id: ' + job_id + ' response: ' + response)  
-            response_items.extend(response['Items'])   
-            
             # LastEvaluatedKey indicates that there is still data to be retrieved from the query,
             # we will keep on querying until there is not lastevaluatedkey in the response.
-            if 'LastEvaluatedKey' in response: lastEvaluatedKey = response['LastEvaluatedKey']  
-            while lastEvaluatedKey is not None:
-                response = self._bulk_manager_table.query(
-                    IndexName = 'GSI1',
-                    KeyConditionExpression=Key('SK').eq(job_id),
-                    Limit=limit,
-                    ExclusiveStartKey=lastEvaluatedKey
+            while True:
+                response = self._reader.query(
+                    Key('SK').eq(job_id), index_name='GSI1', limit=limit, exclusive_start_key=lastEvaluatedKey
                 )
-                if 'Items' not in response: 
-                    raise DataAccessError('Error occurred whiles querying for job results. Details: job_id: ' + job_id + ' response: ' + response)  
-                response_items.extend(response['Items'])  
-                if 'LastEvaluatedKey' in response: 
-                    lastEvaluatedKey = response['LastEvaluatedKey']
-                else:
-                    lastEvaluatedKey = None  
-            if len(response_items) == 0: return []
+                response_items.extend(response['items'])
+                lastEvaluatedKey = response['last_evaluated_key']
+                if lastEvaluatedKey is None:
+                    break
             job_results = [data_utils.extract_job_result_details(item) for item in response_items]
             return job_results
         except ClientError as error:
@@ -279,20 +426,172 @@ class ProductManagerDataAccess:
             raise DataAccessError(error)
 
 
-    def get_job_details(self, jobObject):
-        db_job = data_utils.convert_to_db_job(jobObject)
+    def get_job_results_page(self, job_id, page_size, exclusive_start_key=None, result_filter=None, fields=None):
+        """
+        Returns one page of the results of a job with the LastEvaluatedKey to
+        continue from (None on the last page).
+
+        result_filter keeps only the results with errors or with warnings, and
+        fields reads and returns only those fields of each result. The filter is
+        applied after page_size items are read, so a page can be short.
+        """
+
+        job_id = utils.join_str('job#', job_id)
+        filter_condition = None
+        if result_filter == ResultFilter.ERRORS:
+            filter_condition = Attr('errors').exists() & Attr('errors').ne('[]')
+        elif result_filter == ResultFilter.WARNINGS:
+            filter_condition = Attr('warnings').exists() & Attr('warnings').ne('[]')
+
+        try:
+            response = self._reader.query(
+                Key('SK').eq(job_id),
+                index_name='GSI1',
+                filter_condition=filter_condition,
+                attributes=data_utils.get_job_result_attributes(fields) if fields else None,
+                limit=page_size,
+                exclusive_start_key=exclusive_start_key
+            )
+            job_results = [data_utils.extract_job_result_details(item) for item in response['items']]
+            if fields:
+                job_results = [{field: result[field] for field in fields if field in result} for result in job_results]
+            return {'results': job_results, 'last_evaluated_key': response['last_evaluated_key']}
+        except ClientError as error:
+            raise DataAccessError(error)
+        except Exception as error:
+            raise DataAccessError(error)
+
+
+    def get_job_summary(self, job_id):
+        """Returns the summary item of a job, None for jobs created before job summaries"""
+
+        try:
+            db_summary = self._reader.get_item({'PK': utils.join_str('job#', job_id), 'SK': 'summary'})
+            if db_summary is None:
+                return None
+            return data_utils.extract_job_summary_details(db_summary, self._summary_failure_count)
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def build_job_summary(self, job_id):
+        """
+        Builds the summary of a job from its result items and saves it, unless
+        another request saved one in the meantime
+        """
+
+        attributes = data_utils.get_job_result_attributes(['status', 'messages', 'product_title', 'product_id'])
+        summary = None
+        last_evaluated_key = None
+        try:
+            while True:
+                response = self._reader.query(
+                    Key('SK').eq(utils.join_str('job#', job_id)),
+                    index_name='GSI1',
+                    attributes=attributes,
+                    limit=1000,
+                    exclusive_start_key=last_evaluated_key
+                )
+                summary = data_utils.summarize_job_results(response['items'], self._summary_failure_count, summary)
+                last_evaluated_key = response['last_evaluated_key']
+                if last_evaluated_key is None:
+                    break
+            summary = summary or data_utils.summarize_job_results([], self._summary_failure_count)
+
+            self._bulk_manager_table.put_item(
+                Item=data_utils.convert_to_db_job_summary(job_id, summary),
+                ConditionExpression=Attr('PK').not_exists()
+            )
+            return summary
+        except ClientError as error:
+            if error.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return self.get_job_summary(job_id)
+            raise DataAccessError(error)
+
+
+    def save_export(self, export_key, export_file):
+        """Saves a gzip compressed export file to the upload bucket"""
+
+        try:
+            # no Content-Encoding, so the download stays the .gz file it is named as
+            self._s3_client.put_object(
+                Bucket=self._upload_bucket,
+                Key=export_key,
+                Body=export_file,
+                ContentType='application/gzip'
+            )
+            return True
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def get_export_url(self, export_key):
+        """Returns a presigned url for downloading an export, with how long it is valid for"""
 
         try:
-            response = self._bulk_manager_table.get_item(Key=db_job)
+            url = self._s3_client.generate_presigned_url(
+                'get_object',
+                Params={'Bucket': self._upload_bucket, 'Key': export_key},
+                ExpiresIn=self._export_url_expiration
+            )
+            return {'url': url, 'expires_in': self._export_url_expiration}
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def get_job_details(self, jobObject, attributes=None):
+        """Returns a job of a user with only the given attributes (all of them when attributes is None)"""
+
+        db_job = data_utils.JOB_ENTITY.key(jobObject)
+
+        try:
+            db_job = self._reader.get_item(db_job, attributes)
             job = None
-            if 'Item' in response:
-                db_job = response['Item']
+            if db_job is not None:
                 job = data_utils.extract_job_details(db_job)
             return job
         except ClientError as error:
             raise DataAccessError(error)
 
 
+    def get_jobs_by_ids(self, user_id, job_ids, attributes=None):
+        """
+        Returns the jobs of a user with the given ids, read with batch gets
+        instead of one get_item per job. Ids of jobs the user does not have are
+        left out.
+        """
+
+        keys = [data_utils.JOB_ENTITY.key({'id': job_id, 'user_id': user_id}) for job_id in job_ids]
+        try:
+            return [data_utils.extract_job_details(db_job) for db_job in self._reader.batch_get_items(keys, attributes)]
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def get_job_version(self, job_id, user_id):
+        """
+        Reads only the attributes a job's etag is made of: those of the job and
+        the total of its summary (as job['summary'], None without one), with a
+        single batch get. None if the user has no such job.
+        """
+
+        job_key = data_utils.JOB_ENTITY.key({'id': job_id, 'user_id': user_id})
+        summary_key = {'PK': job_key['PK'], 'SK': 'summary'}
+        attributes = ['PK', 'SK'] + data_utils.JOB_VERSION_ATTRIBUTES + ['total']
+        try:
+            items = {item['SK']: item for item in self._reader.batch_get_items([job_key, summary_key], attributes)}
+        except ClientError as error:
+            raise DataAccessError(error)
+        if job_key['SK'] not in items:
+            return None
+        db_job = items[job_key['SK']]
+        db_job.pop('total', None)
+        job = data_utils.extract_job_details(db_job)
+        db_summary = items.get('summary')
+        job['summary'] = {'total': int(db_summary.get('total', 0))} if db_summary is not None else None
+        return job
+
+
     def publish_to_product_generator(self, message):
         import_topic = os.environ.get('import_topic_arn')
         try:
@@ -312,10 +611,40 @@ class ProductManagerDataAccess:
             raise Exception('Could not publish message successfully. Error:' + str(error))
 
 
-    def get_locations(self, domain, access_token):
-        url = 'https://' + domain + '/admin/api/' + self._api_version + '/graphql.json'
-        headers = {'Content-Type': 'application/json', 'X-Shopify-Access-Token': access_token}
+    def get_cached_locations(self, domain):
+        """Returns the cached locations of a shop as {'domain', 'locations', 'expires_at'}, None if there are none or they expired"""
+
+        db_shop_locations = data_utils.SHOP_LOCATIONS_ENTITY.key({'domain': domain})
+
+        try:
+            db_shop_locations = self._reader.get_item(db_shop_locations)
+            shop_locations = None
+            #items past their ttl can still be read until dynamodb deletes them
+            if db_shop_locations is not None and db_shop_locations.get('expires_at', 0) > time.time():
+                shop_locations = data_utils.extract_shop_locations_details(db_shop_locations)
+            return shop_locations
+        except ClientError as error:
+            raise DataAccessError(error)
+
 
+    def put_cached_locations(self, domain, locations):
+        """Saves the locations of a shop for the locations cache ttl and returns the unix time they expire at"""
+
+        expires_at = int(time.time()) + self._locations_cache_ttl
+        db_shop_locations = data_utils.convert_to_db_shop_locations(
+            {'domain': domain, 'locations': locations, 'expires_at': expires_at}
+        )
+
+        try:
+            response = self._bulk_manager_table.put_item(
+                Item=db_shop_locations
+            )
+            return expires_at
+        except ClientError as error:
+            raise DataAccessError(error)
+
+
+    def get_locations(self, domain, access_token):
         query =  """query {
                     locations(first:5) {
                         edges {
@@ -326,12 +655,4 @@ class ProductManagerDataAccess:
                         }
                     }
                 }"""
-        response = None
-        response = requests.post(url, json={'query': query}, headers=headers)
-        if response.status_code == HTTPStatus.OK:
-            result = response.json()
-            return result
-        elif response.status_code == HTTPStatus.UNAUTHORIZED:
-            raise ShopifyUnauthorizedError("Shopify graphql request did not have the necessary credentials")
-        else:
-            raise DataAccessError('Product create request failed. Status Code: ' + str(response.status_code))
+        return ShopifyClient(domain, access_token, self._api_version).graphql(query)
@@ -0,0 +1,182 @@
+import os
+import json
+import time
+import random
+import logging
+from http import HTTPStatus
+from dataaccess import client_registry
+from datamodel.custom_exceptions import DataAccessError
+from datamodel.custom_exceptions import ShopifyUnauthorizedError
+
+RETRY_STATUS_CODES = {
+    HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.INTERNAL_SERVER_ERROR, HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.GATEWAY_TIMEOUT
+}
+#backoff between attempts is drawn from [0, min(BACKOFF_CAP, BACKOFF_BASE * 2^attempt)] seconds
+BACKOFF_BASE = 0.25
+BACKOFF_CAP = 4.0
+
+
+class ShopifyClient:
+    """
+    Client for the graphql admin api of a shop. Requests go through the http session
+    of the client registry, so connections are kept alive across warm invocations.
+
+    Failed calls (connection errors, timeouts, 429 and 5xx responses, graphql
+    THROTTLED errors) are retried with jittered exponential backoff. Throttled calls
+    wait for as long as Shopify's cost based throttle status (or the Retry-After
+    header) says the query needs before it can run again. A call fails instead of
+    waiting when its retry would not be over within shopify_max_retry_time seconds
+    of the first attempt, which keeps it within the function's timeout.
+
+    Methods
+    -------
+    graphql(query, variables): runs a query and returns the decoded response
+    """
+
+    def __init__(self, domain, access_token, api_version):
+        self._domain = domain
+        self._url = 'https://' + domain + '/admin/api/' + api_version + '/graphql.json'
+        self._headers = {'Content-Type': 'application/json', 'X-Shopify-Access-Token': access_token}
+        self._timeout = (
+            float(os.environ.get('shopify_connect_timeout', 3.05)),
+            float(os.environ.get('shopify_read_timeout', 10))
+        )
+        self._max_retries = int(os.environ.get('shopify_max_retries', 3))
+        self._max_retry_time = float(os.environ.get('shopify_max_retry_time', 15))
+        self.last_call = None
+
+
+    def graphql(self, query, variables=None):
+        """
+        Runs a graphql query, retrying it when Shopify is throttling or unavailable.
+
+        Parameters
+        ----------
+        query: string, required
+            graphql query or mutation
+
+        variables: dict, optional
+            variables of the query
+
+        Returns
+        -------
+        dict of the decoded graphql response
+        """
+
+        payload = {'query': query}
+        if variables is not None:
+            payload['variables'] = variables
+        metrics = {'shop': self._domain, 'attempts': 0, 'retryWaitMs': 0}
+        start = time.perf_counter()
+        timeout = self._timeout
+        out_of_time = False
+        while True:
+            attempt = metrics['attempts']
+            metrics['attempts'] += 1
+            response, result, error = None, None, None
+            try:
+                response = client_registry.get_http_session().post(
+                    self._url, json=payload, headers=self._headers, timeout=timeout
+                )
+                if response.status_code == HTTPStatus.OK:
+                    result = response.json()
+            except Exception as request_error:
+                if not _is_connection_error(request_error):
+                    raise
+                error = request_error
+
+            delay = self.__get_retry_delay(response, result, error, attempt)
+            if delay is None or attempt >= self._max_retries:
+                break
+            #the retry has to be over by the time the call may take, so it reads for the time left at most
+            time_left = self._max_retry_time - (time.perf_counter() - start) - delay
+            if time_left <= 0:
+                out_of_time = True
+                break
+            timeout = (self._timeout[0], min(self._timeout[1], time_left))
+            metrics['retryWaitMs'] += int(delay * 1000)
+            time.sleep(delay)
+
+        metrics['statusCode'] = response.status_code if response is not None else None
+        metrics['elapsedMs'] = int((time.perf_counter() - start) * 1000)
+        metrics.update(_get_cost(result))
+        self.last_call = metrics
+        logging.info('Shopify graphql call: %s', json.dumps(metrics))
+
+        if out_of_time:
+            raise DataAccessError(
+                'Shopify graphql request failed after ' + str(metrics['attempts']) +
+                ' attempts: retrying would take longer than ' + str(self._max_retry_time) + ' seconds'
+            )
+        if error is not None:
+            raise DataAccessError(
+                'Shopify graphql request failed after ' + str(metrics['attempts']) + ' attempts: ' + str(error)
+            )
+        if response.status_code == HTTPStatus.UNAUTHORIZED:
+            raise ShopifyUnauthorizedError('Shopify graphql request did not have the necessary credentials')
+        if response.status_code != HTTPStatus.OK:
+            raise DataAccessError(
+                'Shopify graphql request failed after ' + str(metrics['attempts']) + ' attempts. Status Code: ' +
+                str(response.status_code)
+            )
+        if _is_throttled(result):
+            raise DataAccessError('Shopify graphql request throttled after ' + str(metrics['attempts']) + ' attempts')
+        return result
+
+
+    def __get_retry_delay(self, response, result, error, attempt):
+        """Returns how long to wait before retrying a call, None if it should not be retried"""
+
+        if error is not None:
+            return _backoff(attempt)
+        if response.status_code == HTTPStatus.OK:
+            if not _is_throttled(result):
+                return None
+            wait = _get_throttle_wait(result)
+            return wait + random.uniform(0, BACKOFF_BASE) if wait is not None else _backoff(attempt)
+        if response.status_code not in RETRY_STATUS_CODES:
+            return None
+
+        retry_after = response.headers.get('Retry-After')
+        try:
+            return float(retry_after) + random.uniform(0, BACKOFF_BASE)
+        except (TypeError, ValueError):
+            return _backoff(attempt)
+
+
+def _backoff(attempt):
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _is_connection_error(error):
+    # requests is only imported when a call fails, so routes whose Shopify calls are
+    # served by a registered session don't load it on cold starts
+    import requests
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def _is_throttled(result):
+    errors = (result or {}).get('errors') or []
+    return any((error.get('extensions') or {}).get('code') == 'THROTTLED' for error in errors)
+
+
+def _get_throttle_wait(result):
+    """Seconds until the shop's cost bucket has restored enough points for the query"""
+
+    cost = ((result or {}).get('extensions') or {}).get('cost') or {}
+    throttle_status = cost.get('throttleStatus') or {}
+    restore_rate = throttle_status.get('restoreRate')
+    if not restore_rate or 'requestedQueryCost' not in cost or 'currentlyAvailable' not in throttle_status:
+        return None
+    return max(cost['requestedQueryCost'] - throttle_status['currentlyAvailable'], 0) / restore_rate
+
+
+def _get_cost(result):
+    cost = ((result or {}).get('extensions') or {}).get('cost') or {}
+    throttle_status = cost.get('throttleStatus') or {}
+    return {
+        'requestedQueryCost': cost.get('requestedQueryCost'),
+        'actualQueryCost': cost.get('actualQueryCost'),
+        'currentlyAvailable': throttle_status.get('currentlyAvailable')
+    }
@@ -55,4 +55,32 @@ class JobStatus(Enum):
     RUNNING = 'RUNNING'
     COMPLETED = 'COMPLETED'
     PARTIAL_COMPLETE = 'PARTIALLY COMPLETED'
-    FAILED = 'FAILED'
\ No newline at end of file
+    FAILED = 'FAILED'
+
+class FileAnalysisStatus(Enum):
+    """Enum with the states of a file uploaded for asynchronous analysis"""
+
+    PENDING = 'PENDING'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+
+
+class FileReaderEngine(Enum):
+    """Enum with the engines the file reader can parse xlsx files with"""
+
+    STREAM = 'STREAM'
+    PANDAS = 'PANDAS'
+
+
+class ResultFilter(Enum):
+    """Enum with the filters of job results"""
+
+    ERRORS = 'ERRORS'
+    WARNINGS = 'WARNINGS'
+
+
+class ExportFormat(Enum):
+    """Enum with the formats job results can be exported in"""
+
+    CSV = 'CSV'
+    NDJSON = 'NDJSON'
@@ -1,22 +1,70 @@
 from datetime import datetime
+from datetime import timezone
 import json
-import email
 import base64
+import io
+import hashlib
+import tempfile
 from datamodel.custom_exceptions import IllegalArgumentError
 from datamodel.custom_exceptions import UserAuthenticationError
+from datamodel.custom_exceptions import EmptySheetError
+from datamodel.custom_exceptions import HeaderRowNotFoundError
+from datamodel.custom_exceptions import WrongFileFormat
 from dataaccess.product_manager_data_access import ProductManagerDataAccess
 from datamodel.custom_enums import FileType
 from datamodel.custom_enums import HeaderOption
 from datamodel.custom_enums import TaskType
 from datamodel.custom_enums import JobStatus
 from datamodel.custom_enums import ExecutionType
-from utility.file_reader_util import FileReader
+from datamodel.custom_enums import FileAnalysisStatus
+from datamodel.custom_enums import ResultFilter
+from datamodel.custom_enums import ExportFormat
+from dataaccess.data_model_utils import JOB_RESULT_ATTRIBUTES
+from dataaccess.data_model_utils import JOB_VERSION_ATTRIBUTES
+from dataaccess.data_model_utils import JOB_STATUS_ATTRIBUTES
+from dataaccess.data_model_utils import USER_PROFILE_ATTRIBUTES
+from dataaccess.data_model_utils import USER_SHOP_ATTRIBUTES
+from dataaccess.data_model_utils import FILE_KEY_ATTRIBUTES
+from dataaccess.data_model_utils import FILE_ANALYSIS_ATTRIBUTES
+from dataaccess.data_model_utils import JOB_KEY_ATTRIBUTES
+from utility import multipart_parser
+from utility import metrics
+from utility.file_snapshot import SNAPSHOT_SUFFIX
+from utility.ttl_cache import TTLCache
+from utility.task_graph import TaskGraph
+from utility import pagination
+from utility.result_export import ResultExportWriter
+from utility.result_export import EXPORT_PREFIX
+from utility.result_export import EXPORT_EXTENSIONS
 import logging
 import uuid
 
 logging.basicConfig(level=logging.INFO)
 
-
+HASH_BLOCK_SIZE = 1024 * 1024
+LOCATIONS_CACHE_SIZE = 128
+JOBS_PAGE_SIZE = 25
+MAX_JOBS_PAGE_SIZE = 100
+#job ids a batch status request takes
+MAX_JOB_STATUS_IDS = 100
+#changed when the json of jobs or job results changes, so etags of the old format stop matching
+ETAG_VERSION = 2
+JOB_STATUS_VALUES = {status.value for status in JobStatus}
+FINISHED_JOB_STATUSES = {JobStatus.COMPLETED.value, JobStatus.FAILED.value, JobStatus.PARTIAL_COMPLETE.value}
+JOB_RESULTS_PAGE_SIZE = 100
+MAX_JOB_RESULTS_PAGE_SIZE = 1000
+EXPORT_PAGE_SIZE = 1000
+#exports larger than this are spooled to /tmp instead of memory
+EXPORT_SPOOL_SIZE = 8 * 1024 * 1024
+#s3 metadata of files saved by /upload, their snapshot is read with it
+UPLOAD_TYPE_METADATA = 'file-type'
+UPLOAD_HEADER_METADATA = 'header-option'
+
+# shop locations by domain, shared by the invocations of a warm container
+_locations_cache = TTLCache(LOCATIONS_CACHE_SIZE)
+
+
+@metrics.timed_methods('service')
 class ProductManagerService:
     """ 
     Class to perform request actions
@@ -45,91 +93,275 @@ class ProductManagerService:
     def get_file_details(self):
         """Decodes excel or csv binary file and returns the details for import"""
 
-        multi_form_data = base64.b64decode(self._request_body)
+        with metrics.timer('upload.base64_decode'):
+            multi_form_data = base64.b64decode(self._request_body)
+        metrics.count('upload.request_bytes', len(multi_form_data), 'Bytes')
         content_type = None
         if self._header.get('content-type') is not None:
             content_type = self._header.get('content-type')
         elif self._header.get('Content-Type') is not None:
             content_type = self._header.get('Content-Type')
-        content_type = 'Content-Type: ' + content_type + '\n'
-        form_data = email.message_from_bytes(content_type.encode() + multi_form_data)
         user_id = self._user_context.get('userId')
-        user_details = self._pm_access.get_user_by_id(user_id)
 
-        if not form_data.is_multipart():
-            raise IllegalArgumentError('Form data could not be processed. Multipart is False')
+        # the user lookup and the Shopify locations call that depends on it do not need
+        # the file, so they run on the task graph while the file is parsed and saved.
+        graph = TaskGraph()
+        graph.add('user', lambda: self._pm_access.get_user_by_id(user_id, USER_SHOP_ATTRIBUTES))
+        graph.add('locations', self.__get_locations, requires=('user',))
+        try:
+            return self.__upload_file(graph, multi_form_data, content_type, user_id)
+        finally:
+            # nothing is left running (or frozen with the container) once the request ends
+            graph.wait()
 
-        form_content = {}
-        for part in form_data.get_payload():
-            name = part.get_param('name', header='content-disposition')
-            should_decode_payload = False
-            if not name:
-                continue
-            if name == 'file':
-                should_decode_payload = True
-            part_payload = {
-                'content': part.get_payload(decode=should_decode_payload),
-                'content_type': part.get_content_type()
-            }
-            if name == 'file':
-                part_payload['file_name'] = part.get_filename()
-            form_content[name] = part_payload
+
+    def __upload_file(self, graph, multi_form_data, content_type, user_id):
+        """Reads and saves an uploaded file, the network calls that can overlap run on the task graph"""
+
+        # the file reader (pandas) is only needed by uploads, so it is imported
+        # here to keep it off the cold start of every other route.
+        from utility.file_reader_util import FileReader
+
+        # the file part comes back as a memoryview over multi_form_data, so the
+        # spreadsheet is never copied on its way to the file reader and s3.
+        with metrics.timer('upload.multipart_parse'):
+            form_content = multipart_parser.parse_form_data(multi_form_data, content_type)
+        if 'file' not in form_content:
+            raise IllegalArgumentError('Form data could not be processed. File part is missing')
         
-        file_type = None
-        if form_content['file']['content_type'] == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' or form_content['file']['content_type'] =='application/vnd.ms-excel':
-            file_type = FileType.EXCEL
-        elif form_content['file']['content_type'] == 'text/csv':
-            file_type = FileType.CSV
-        else:
-            if form_content['file']['file_name'] is not None or form_content['file']['file_name'] != '':
-                file_name = form_content['file']['file_name']
-                file_ext = file_name.split('.')[-1]
-                if file_ext == 'xlsx' or file_ext == 'xls':
-                    file_type = FileType.EXCEL
-                elif file_ext == 'csv':
-                   file_type = FileType.CSV 
-    
+        file_type = self.__get_file_type(form_content['file']['content_type'], form_content['file']['file_name'])
         if file_type == None: logging.error('Does not recognize media type. File details: %s', form_content['file'])
 
-        reader_info = {
-            'file': form_content['file']['content'],
-            'type': file_type,
-            'header': {
-                'option': HeaderOption[form_content['header-option']['content']]
-            }
+        header_details = self.__get_header_details(
+            form_content['header-option']['content'],
+            form_content.get('column-name', {}).get('content'),
+            form_content.get('header-row', {}).get('content')
+        )
+        file_name = form_content['file']['file_name']
+        file_content = form_content['file']['content']
+        metrics.count('upload.file_bytes', len(file_content), 'Bytes')
+        file_id = '' + str(uuid.uuid4())
+        file_obj = {
+            'id': file_id,
+            'idle': 'false',
+            'user_id': user_id,
+            'file_name': file_name
         }
-    
-        if form_content['header-option']['content'] == 'FIND' or form_content['header-option']['content'] == 'EXACT':
-            if form_content['header-option']['content'] == 'FIND':
-                reader_info['header']['value'] = form_content['column-name']['content'] 
-            elif form_content['header-option']['content'] == 'EXACT':
-                reader_info['header']['value'] = int(form_content['header-row']['content']) - 1
-        
-        file_reader = FileReader(file_reader_info=reader_info)
-        file_details = file_reader.get_file_details()
-        locations_response = self._pm_access.get_locations(user_details.get('domain'), user_details.get('access_token'))
-        locations = self.__parse_locations(locations_response)
+        writes = ['file_put']
+        # objects saved for this upload, removed if it fails (objects of a reused analysis are not)
+        saved_keys = []
+
+        # merchants upload the same file again while they work on their mappings, so the
+        # analysis of an identical upload (same content and header option) is reused
+        # together with its s3 object instead of parsing and saving the file again.
+        with metrics.timer('upload.hash'):
+            upload_hash = self.__get_upload_hash(file_content, file_type, header_details)
+        cached_upload = self._pm_access.get_upload_hash(user_id, upload_hash)
+        if cached_upload is not None:
+            logging.info('Reusing analysis of file %s for identical upload', cached_upload['file_id'])
+            file_details = {
+                'fileType': cached_upload['file_type'],
+                'actualRowCount': cached_upload['actual_row_count'],
+                'columnDetails': cached_upload['column_details']
+            }
+            file_obj['s3_key'] = cached_upload['s3_key']
+            file_obj['header_row'] = cached_upload['header_row']
+            if 'snapshot_key' in cached_upload:
+                file_obj['snapshot_key'] = cached_upload['snapshot_key']
+        else:
+            file_s3_key = file_id + '_' + file_name
+            file_obj['s3_key'] = file_s3_key
+            # the file is saved to s3 while it is parsed, its snapshot is written off the
+            # request when the object lands in s3 (see analyze_uploaded_file)
+            upload_metadata = self.__get_upload_metadata(file_type, header_details)
+            graph.add('file_saved', lambda: self._pm_access.save_to_s3(file_s3_key, file_content, upload_metadata))
+            try:
+                with metrics.timer('upload.file_reader'):
+                    reader_info = self.__get_reader_info(file_content, file_type, header_details)
+                    file_reader = FileReader(file_reader_info=reader_info)
+                    file_details = file_reader.get_file_details()
+            except Exception:
+                # the file of an upload that can't be read is not kept
+                graph.add('file_removed', lambda saved: self._pm_access.delete_from_s3(file_s3_key), requires=('file_saved',))
+                raise
+            file_obj['header_row'] = file_details['headerRow']
+            del file_details['headerRow']
+
+            # the file item and the hash item may only point at objects that were saved
+            graph.result('file_saved')
+            cached_upload = {
+                'user_id': user_id,
+                'hash': upload_hash,
+                'file_id': file_id,
+                'file_type': file_details['fileType'],
+                's3_key': file_s3_key,
+                'actual_row_count': file_details['actualRowCount'],
+                'header_row': file_obj['header_row'],
+                'column_details': file_details['columnDetails']
+            }
+            # like the file item, only saved once the user gets locations, the objects are removed otherwise
+            graph.add(
+                'upload_hash_saved', lambda locations: self.__save_upload_hash(cached_upload), requires=('locations',)
+            )
+            writes.append('upload_hash_saved')
+            # the snapshot may already have been written when the upload fails
+            saved_keys = [file_s3_key, file_s3_key + SNAPSHOT_SUFFIX]
+
+        file_obj['file_type'] = file_details['fileType']
+        file_obj['actual_row_count'] = file_details['actualRowCount']
+        metrics.count('upload.rows', file_details['actualRowCount'])
+        # like before, a file is only recorded for an upload the user gets locations for
+        graph.add('file_put', lambda locations: self._pm_access.put_file(file_obj), requires=('locations',))
+        file_details['fileName'] = file_name
+        file_details['fileId'] = file_id
+        try:
+            file_details['locations'] = graph.result('locations')
+        except Exception:
+            if saved_keys:
+                graph.add('files_removed', lambda: self.__remove_from_s3(saved_keys))
+            raise
+
+        for write in writes:
+            graph.result(write)
+        return file_details
+
+
+    def create_upload_url(self):
+        """
+        Creates a file record and a presigned s3 post the client uploads the file to.
+        The file is analysed when it lands in s3 (see analyze_uploaded_file) and
+        the client polls get_file_analysis for the result.
+        """
+
+        if 'userId' not in self._user_context:
+            raise IllegalArgumentError('UserId not present in request')
+        if self._request_body is None or not self._request_body.get('fileName'):
+            raise IllegalArgumentError('File name is not present in upload url request')
+
+        file_name = self._request_body.get('fileName')
+        if self.__get_file_type(None, file_name) is None:
+            raise WrongFileFormat('Couldn\'t process file. File Type must be either CSV or EXCEL')
+        header_details = self.__get_header_details(
+            self._request_body.get('headerOption', HeaderOption.DEFAULT.name),
+            self._request_body.get('columnName'),
+            self._request_body.get('headerRow')
+        )
+
         file_id = '' + str(uuid.uuid4())
-        
-        file_s3_key = file_id + '_' + form_content['file']['file_name']
+        file_s3_key = file_id + '_' + file_name
         file_obj = {
             'id': file_id,
             'idle': 'false',
-            'file_name': form_content['file']['file_name'],
-            'file_type': file_details['fileType'],
+            'user_id': self._user_context.get('userId'),
+            'file_name': file_name,
             's3_key': file_s3_key,
-            'actual_row_count': file_details['actualRowCount'],
-            'header_row': file_details['headerRow']
+            'header_option': header_details,
+            'analysis_status': FileAnalysisStatus.PENDING.name
+        }
+        presigned_post = self._pm_access.get_presigned_upload(file_s3_key)
+        self._pm_access.put_file(file_obj)
+        return {
+            'fileId': file_id,
+            'upload': {
+                'url': presigned_post['url'],
+                'fields': presigned_post['fields']
+            }
         }
 
-        file_details['fileName'] = form_content['file']['file_name']
-        file_details['fileId'] = file_id
-        file_details['locations'] = locations
-        del file_details['headerRow']
 
-        self._pm_access.save_to_s3(file_s3_key, form_content['file']['content'])
-        self._pm_access.put_file(file_obj)
-        return file_details
+    def analyze_uploaded_file(self, s3_key):
+        """
+        Reads a file uploaded through a presigned post and saves its column
+        details on the file record created by create_upload_url. Files saved
+        by /upload are analysed on the request, only their snapshot is saved.
+        """
+
+        from utility.file_reader_util import FileReader
+
+        file_id = s3_key.split('_', 1)[0]
+        file_obj = self._pm_access.get_file_by_id(file_id, FILE_ANALYSIS_ATTRIBUTES)
+        if file_obj is None or file_obj.get('analysis_status') != FileAnalysisStatus.PENDING.name:
+            return self.__save_upload_snapshot(s3_key)
+
+        updated_file = {'id': file_id}
+        try:
+            file_type = self.__get_file_type(None, file_obj.get('file_name'))
+            file_content = self._pm_access.get_from_s3(s3_key)
+            metrics.count('analysis.file_bytes', len(file_content), 'Bytes')
+            with metrics.timer('analysis.file_reader'):
+                reader_info = self.__get_reader_info(file_content, file_type, file_obj.get('header_option'))
+                file_reader = FileReader(file_reader_info=reader_info)
+                file_details = file_reader.get_file_details()
+            metrics.count('analysis.rows', file_details['actualRowCount'])
+            updated_file['file_type'] = file_details['fileType']
+            updated_file['actual_row_count'] = file_details['actualRowCount']
+            updated_file['header_row'] = file_details['headerRow']
+            updated_file['column_details'] = file_details['columnDetails']
+            snapshot_key = self.__save_snapshot(file_reader, s3_key)
+            if snapshot_key is not None:
+                updated_file['snapshot_key'] = snapshot_key
+            updated_file['analysis_status'] = FileAnalysisStatus.COMPLETED.name
+        except EmptySheetError as error:
+            logging.exception(error)
+            updated_file['analysis_status'] = FileAnalysisStatus.FAILED.name
+            updated_file['error_code'] = 'NO_PRODUCT_FOUND'
+        except HeaderRowNotFoundError as error:
+            logging.exception(error)
+            updated_file['analysis_status'] = FileAnalysisStatus.FAILED.name
+            updated_file['error_code'] = 'HEADER_NOT_FOUND'
+        except WrongFileFormat as error:
+            logging.exception(error)
+            updated_file['analysis_status'] = FileAnalysisStatus.FAILED.name
+            updated_file['error_code'] = 'WRONG_FILE_FORMAT'
+        except Exception as error:
+            #e.g. a corrupt xlsx or a malformed csv, the file would otherwise stay pending for its pollers
+            logging.exception('Could not analyze uploaded file. S3 key: %s. Error: %s', s3_key, error)
+            updated_file = {'id': file_id}
+            updated_file['analysis_status'] = FileAnalysisStatus.FAILED.name
+            updated_file['error_code'] = 'ANALYSIS_FAILED'
+
+        try:
+            self._pm_access.basic_file_update(updated_file)
+        except Exception as error:
+            #the analysis could not be saved, the file is failed rather than left pending
+            logging.exception('Could not save analysis of uploaded file. S3 key: %s. Error: %s', s3_key, error)
+            updated_file = {'id': file_id}
+            updated_file['analysis_status'] = FileAnalysisStatus.FAILED.name
+            updated_file['error_code'] = 'ANALYSIS_FAILED'
+            self._pm_access.basic_file_update(updated_file)
+        return updated_file
+
+
+    def get_file_analysis(self):
+        """Returns the analysis of a file uploaded through a presigned post"""
+
+        if 'userId' not in self._user_context:
+            raise IllegalArgumentError('UserId not present in request')
+        if self._path_params is None or 'fileId' not in self._path_params:
+            raise IllegalArgumentError('File id is not present in file request path params')
+
+        user_id = self._user_context.get('userId')
+        file_id = self._path_params.get('fileId')
+        file_obj = self._pm_access.get_file_by_id(file_id, FILE_ANALYSIS_ATTRIBUTES)
+        if file_obj is None or file_obj.get('user_id') != user_id:
+            raise IllegalArgumentError('File does not exist for user. File id: ' + file_id)
+
+        analysis_status = file_obj.get('analysis_status')
+        if analysis_status == FileAnalysisStatus.FAILED.name:
+            return {'fileId': file_id, 'status': analysis_status, 'errorCode': file_obj.get('error_code')}
+        if analysis_status != FileAnalysisStatus.COMPLETED.name:
+            return {'fileId': file_id, 'status': analysis_status}
+
+        user_details = self._pm_access.get_user_by_id(user_id, USER_SHOP_ATTRIBUTES)
+        return {
+            'fileId': file_id,
+            'status': analysis_status,
+            'fileName': file_obj.get('file_name'),
+            'fileType': file_obj.get('file_type'),
+            'actualRowCount': int(file_obj.get('actual_row_count')),
+            'columnDetails': file_obj.get('column_details'),
+            'locations': self.__get_locations(user_details)
+        }
 
 
     def create_job(self):
@@ -152,7 +384,7 @@ class ProductManagerService:
             raise IllegalArgumentError('UserId not present in request')
         
         user_id = self._user_context.get('userId')
-        user_details = self._pm_access.get_user_by_id(user_id)
+        user_details = self._pm_access.get_user_by_id(user_id, USER_PROFILE_ATTRIBUTES)
 
         # we need to check to ensure user is still active.
         if user_details.get('active') is not True:
@@ -176,11 +408,85 @@ class ProductManagerService:
             raise IllegalArgumentError('UserId not present in request') 
 
         user_id = self._user_context.get('userId')
-        user_jobs = self._pm_access.get_jobs(user_id)
-        return user_jobs
+        page_size = pagination.get_page_size(self.__get_param('pageSize'), JOBS_PAGE_SIZE, MAX_JOBS_PAGE_SIZE)
+        start_key = pagination.decode_token(self.__get_param('nextToken'))
+        #a token only continues the listing of the user it was issued to
+        if start_key is not None and start_key.get('SK') != 'user#' + user_id:
+            raise IllegalArgumentError('Continuation token is not valid')
+
+        page = self._pm_access.get_jobs(user_id, page_size, start_key, self.__get_job_filter())
+        return {
+            'jobs': page['jobs'],
+            'nextToken': pagination.encode_token(page['last_evaluated_key'])
+        }
+
+
+    def __get_job_filter(self):
+        """
+        Returns the filters of a jobs request: the task type, the statuses (a list
+        or a comma separated string of JobStatus names) and the start time range.
+        """
+
+        job_filter = {}
+        task_type = self.__get_param('taskType')
+        if task_type:
+            if task_type not in TaskType.__members__:
+                raise IllegalArgumentError('Task type is not valid. Task type: ' + str(task_type))
+            job_filter['type'] = task_type
+
+        statuses = self.__get_param('status')
+        if statuses:
+            if isinstance(statuses, str):
+                statuses = [status.strip() for status in statuses.split(',') if status.strip()]
+            #jobs are saved with the value of their status, which is what the filter compares
+            job_statuses = []
+            for status in statuses:
+                if status in JobStatus.__members__:
+                    job_statuses.append(JobStatus[status].value)
+                elif status in JOB_STATUS_VALUES:
+                    job_statuses.append(status)
+                else:
+                    raise IllegalArgumentError('Job status is not valid. Status: ' + str(status))
+            job_filter['status'] = job_statuses
+
+        for param, key in (('startTimeFrom', 'start_time_from'), ('startTimeTo', 'start_time_to')):
+            start_time = self.__get_param(param)
+            if start_time:
+                job_filter[key] = self.__to_start_time(param, start_time)
+        if job_filter.get('start_time_from', '') > job_filter.get('start_time_to', '\uffff'):
+            raise IllegalArgumentError('startTimeFrom is after startTimeTo')
+        return job_filter
+
+
+    def __to_start_time(self, param, value):
+        """Converts an iso 8601 time to the utc format job start times are saved in"""
+
+        try:
+            value = str(value)
+            time = datetime.fromisoformat(value[:-1] if value.endswith('Z') else value)
+        except ValueError:
+            raise IllegalArgumentError(param + ' is not an iso 8601 time. ' + param + ': ' + str(value))
+        if time.tzinfo is not None:
+            time = time.astimezone(timezone.utc).replace(tzinfo=None)
+        return time.isoformat(timespec='microseconds') + 'Z'
+
+
+    def __get_param(self, name):
+        """Returns a parameter from the query string, or from the json body of a post"""
+
+        if self._query_params and self._query_params.get(name) is not None:
+            return self._query_params.get(name)
+        if isinstance(self._request_body, dict):
+            return self._request_body.get(name)
+        return None
 
 
     def get_job_results(self):
+        """
+        Returns a page of the results of a job, or, when an export format is asked
+        for, exports all of them to s3 and returns a presigned url for the export
+        """
+
         if 'userId' not in self._user_context:
             raise IllegalArgumentError('UserId not present in request') 
         if self._path_params is None:
@@ -189,8 +495,82 @@ class ProductManagerService:
             raise IllegalArgumentError('Job id is not present in job results request path params')
         
         job_id = self._path_params.get('jobId')
-        job_results = self._pm_access.get_job_results(job_id)
-        return job_results
+        result_filter = self.__get_enum_param('filter', ResultFilter)
+        fields = self.__get_result_fields()
+        export_format = self.__get_enum_param('export', ExportFormat)
+        if export_format is not None:
+            return self.__export_job_results(job_id, export_format, result_filter, fields)
+
+        page_size = pagination.get_page_size(
+            self.__get_param('pageSize'), JOB_RESULTS_PAGE_SIZE, MAX_JOB_RESULTS_PAGE_SIZE
+        )
+        start_key = pagination.decode_token(self.__get_param('nextToken'))
+        if start_key is not None and (start_key.get('SK') != 'job#' + job_id or 'SK1' not in start_key):
+            raise IllegalArgumentError('Continuation token is not valid')
+
+        page = self._pm_access.get_job_results_page(job_id, page_size, start_key, result_filter, fields)
+        return {
+            'results': page['results'],
+            'nextToken': pagination.encode_token(page['last_evaluated_key'])
+        }
+
+
+    def __export_job_results(self, job_id, export_format, result_filter, fields):
+        """Writes every result of a job to a gzip file in s3, one page at a time"""
+
+        user_id = self._user_context.get('userId')
+        if self._pm_access.get_job_details({'id': job_id, 'user_id': user_id}, JOB_KEY_ATTRIBUTES) is None:
+            raise IllegalArgumentError('Job does not exist. Job id: ' + job_id)
+
+        export_key = EXPORT_PREFIX + user_id + '/' + job_id + '/' + str(uuid.uuid4()) + EXPORT_EXTENSIONS[export_format]
+        with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE) as export_file:
+            writer = ResultExportWriter(export_file, export_format)
+            start_key = None
+            while True:
+                page = self._pm_access.get_job_results_page(
+                    job_id, EXPORT_PAGE_SIZE, start_key, result_filter, fields
+                )
+                with metrics.timer('export.write'):
+                    writer.write(page['results'])
+                start_key = page['last_evaluated_key']
+                if start_key is None:
+                    break
+            writer.close()
+            metrics.count('export.rows', writer.row_count)
+            metrics.count('export.bytes', export_file.tell(), 'Bytes')
+            export_file.seek(0)
+            self._pm_access.save_export(export_key, export_file)
+
+        export_url = self._pm_access.get_export_url(export_key)
+        return {
+            'url': export_url['url'],
+            'expiresIn': export_url['expires_in'],
+            'format': export_format.name,
+            'rowCount': writer.row_count
+        }
+
+
+    def __get_result_fields(self):
+        """Returns the job result fields a request asks for, None for all of them"""
+
+        fields = self.__get_param('fields')
+        if not fields:
+            return None
+        if isinstance(fields, str):
+            fields = [field.strip() for field in fields.split(',') if field.strip()]
+        for field in fields:
+            if field not in JOB_RESULT_ATTRIBUTES:
+                raise IllegalArgumentError('Job result field is not valid. Field: ' + str(field))
+        return list(fields)
+
+
+    def __get_enum_param(self, name, enum):
+        value = self.__get_param(name)
+        if not value:
+            return None
+        if str(value).upper() not in enum.__members__:
+            raise IllegalArgumentError(name + ' is not valid. ' + name + ': ' + str(value))
+        return enum[str(value).upper()]
 
 
     def get_job_details(self):
@@ -205,12 +585,84 @@ class ProductManagerService:
         job_id = self._path_params.get('jobId')
         primaryKey = {'id': job_id, 'user_id': user_id}
         job = self._pm_access.get_job_details(primaryKey)
-        if job['status'] == 'COMPLETED' or job['status'] == 'FAILED' or job['status'] == 'PARTIALLY COMPLETED':
-            job_results = self._pm_access.get_job_results(job_id)
-            job['results'] = job_results
+        if job is None:
+            raise IllegalArgumentError('Job does not exist. Job id: ' + job_id)
+
+        finished = job.get('status') in FINISHED_JOB_STATUSES
+        summary = self._pm_access.get_job_summary(job_id)
+        #the summary of a finished job is built from its results once, on its first read
+        if finished and summary is None:
+            summary = self._pm_access.build_job_summary(job_id)
+        job['summary'] = summary
+        if finished and str(self.__get_param('results')).lower() == 'true':
+            job['results'] = self._pm_access.get_job_results(job_id)
         return job
 
 
+    def get_job_statuses(self):
+        """
+        Returns the status and counters of several jobs of the user, given as a
+        list of ids in the json body or comma separated in the query string,
+        with the ids of the jobs that were not found
+        """
+
+        if 'userId' not in self._user_context:
+            raise IllegalArgumentError('UserId not present in request')
+
+        job_ids = self.__get_param('jobIds')
+        if isinstance(job_ids, str):
+            job_ids = [job_id.strip() for job_id in job_ids.split(',') if job_id.strip()]
+        if not isinstance(job_ids, list) or not job_ids:
+            raise IllegalArgumentError('Job ids are not present in job status request')
+        if not all(isinstance(job_id, str) and job_id for job_id in job_ids):
+            raise IllegalArgumentError('Job ids must be strings. Job ids: ' + str(job_ids))
+        job_ids = list(dict.fromkeys(job_ids))
+        if len(job_ids) > MAX_JOB_STATUS_IDS:
+            raise IllegalArgumentError(
+                'At most ' + str(MAX_JOB_STATUS_IDS) + ' job ids can be sent. Job ids: ' + str(len(job_ids))
+            )
+
+        jobs = {}
+        for job in self._pm_access.get_jobs_by_ids(self._user_context.get('userId'), job_ids, JOB_STATUS_ATTRIBUTES):
+            #the user is the one asking
+            job.pop('user_id', None)
+            jobs[job['id']] = job
+        return {
+            'jobs': [jobs[job_id] for job_id in job_ids if job_id in jobs],
+            'missingJobIds': [job_id for job_id in job_ids if job_id not in jobs]
+        }
+
+
+    def get_job_etag(self, job=None):
+        """
+        Returns the etag of a job and its results, made of the attributes that
+        change whenever they do (a version attribute, the counters, the status and
+        the total of the job's summary, which is updated without the job).
+        Without a job, only those attributes are read. None if the job does not exist.
+        """
+
+        if 'userId' not in self._user_context:
+            raise IllegalArgumentError('UserId not present in request') 
+        if self._path_params is None or 'jobId' not in self._path_params:
+            raise IllegalArgumentError('Job id is not present in request path params') 
+
+        if job is None:
+            job = self._pm_access.get_job_version(self._path_params.get('jobId'), self._user_context.get('userId'))
+            if job is None:
+                return None
+        version = [ETAG_VERSION] + [job.get(attribute) for attribute in JOB_VERSION_ATTRIBUTES]
+        version.append((job.get('summary') or {}).get('total'))
+        return '"' + hashlib.sha1(json.dumps(version).encode('utf-8')).hexdigest() + '"'
+
+
+    def get_job_results_etag(self):
+        """Returns the etag of a job results request, None for exports which are new on every request"""
+
+        if self.__get_param('export'):
+            return None
+        return self.get_job_etag()
+
+
     def __create_import_job(self):
         """ Gets the details of a task request and create product import job to be run"""
 
@@ -220,9 +672,14 @@ class ProductManagerService:
         options = self._request_body.get('options')
         file_column_details = self._request_body.get('fileColumnDetails')
         shopify_field = self.__get_shopify_fields(file_column_details)
+        if 'variantQuantity' in shopify_field:
+            self.__check_locations(shopify_field['variantQuantity'])
 
-        file_obj = self._pm_access.get_file_by_id(file_id)
+        file_obj = self._pm_access.get_file_by_id(file_id, FILE_KEY_ATTRIBUTES)
         updated_file = {'id': file_obj.get('id'), 'field_details': shopify_field}
+        snapshot_key = file_obj.get('snapshot_key') or self.__find_snapshot(file_obj.get('s3_key'))
+        if snapshot_key is not None:
+            updated_file['snapshot_key'] = snapshot_key
         job_id = '' + str(uuid.uuid4())
         start_time = datetime.utcnow().isoformat() + 'Z'
         new_job = {
@@ -239,6 +696,108 @@ class ProductManagerService:
         }
 
 
+    def __get_upload_hash(self, file_content, file_type, header_details):
+        """Returns the sha256 of an upload's content, file type and header option (what its analysis depends on)"""
+
+        upload_hash = hashlib.sha256()
+        # hashed in blocks straight from the request body, the file is not copied
+        view = memoryview(file_content)
+        for start in range(0, len(view), HASH_BLOCK_SIZE):
+            upload_hash.update(view[start:start + HASH_BLOCK_SIZE])
+        upload_hash.update(json.dumps([str(file_type), header_details], sort_keys=True).encode())
+        return upload_hash.hexdigest()
+
+
+    def __save_snapshot(self, file_reader, file_s3_key):
+        """
+        Saves the product rows read by the file reader next to the file in s3, so the
+        product generator does not have to parse the file again. The snapshot is an
+        optimisation only: if it can't be written the file is saved without it.
+        """
+
+        snapshot_key = file_s3_key + SNAPSHOT_SUFFIX
+        try:
+            snapshot = io.BytesIO()
+            with metrics.timer('upload.snapshot'):
+                file_reader.write_snapshot(snapshot)
+            self._pm_access.save_to_s3(snapshot_key, snapshot.getbuffer())
+        except Exception as error:
+            logging.exception('Could not save file snapshot. S3 key: %s. Error: %s', snapshot_key, error)
+            return None
+        return snapshot_key
+
+
+    def __save_upload_snapshot(self, s3_key):
+        """
+        Saves the snapshot of a file saved by /upload, which is read with the file type
+        and header option saved on its s3 object. Other objects are skipped.
+        """
+
+        from utility.file_reader_util import FileReader
+
+        try:
+            file_content, metadata = self._pm_access.get_from_s3_with_metadata(s3_key)
+            if UPLOAD_HEADER_METADATA not in metadata:
+                logging.warning('Skipping analysis for file that is not pending. S3 key: %s', s3_key)
+                return None
+            with metrics.timer('upload.snapshot_reader'):
+                reader_info = self.__get_reader_info(
+                    file_content, FileType[metadata[UPLOAD_TYPE_METADATA]], json.loads(metadata[UPLOAD_HEADER_METADATA])
+                )
+                file_reader = FileReader(file_reader_info=reader_info)
+                file_reader.get_file_details()
+        except Exception as error:
+            #e.g. the upload failed and its file was removed
+            logging.exception('Could not read uploaded file for its snapshot. S3 key: %s. Error: %s', s3_key, error)
+            return None
+        snapshot_key = self.__save_snapshot(file_reader, s3_key)
+        return {'s3_key': s3_key, 'snapshot_key': snapshot_key}
+
+
+    def __find_snapshot(self, s3_key):
+        """Returns the key of the snapshot written for a file, None if there is none (yet)"""
+
+        if s3_key is None:
+            return None
+        snapshot_key = s3_key + SNAPSHOT_SUFFIX
+        try:
+            if self._pm_access.exists_in_s3(snapshot_key):
+                return snapshot_key
+        except Exception as error:
+            #the product generator reads the file itself without a snapshot
+            logging.exception('Could not look up file snapshot. S3 key: %s. Error: %s', snapshot_key, error)
+        return None
+
+
+    def __get_upload_metadata(self, file_type, header_details):
+        """Returns the s3 metadata the snapshot of an upload is read with, none for files that can't be read"""
+
+        if file_type is None:
+            return None
+        return {UPLOAD_TYPE_METADATA: file_type.name, UPLOAD_HEADER_METADATA: json.dumps(header_details)}
+
+
+    def __remove_from_s3(self, s3_keys):
+        for s3_key in s3_keys:
+            try:
+                self._pm_access.delete_from_s3(s3_key)
+            except Exception as error:
+                logging.exception('Could not remove object of a failed upload. S3 key: %s. Error: %s', s3_key, error)
+
+
+    def __save_upload_hash(self, cached_upload):
+        """
+        Saves the analysis of an upload for identical uploads to reuse. The hash
+        item is a cache only: if it can't be written the upload goes on without it.
+        """
+
+        try:
+            return self._pm_access.put_upload_hash(cached_upload)
+        except Exception as error:
+            logging.exception('Could not save upload hash. File id: %s. Error: %s', cached_upload['file_id'], error)
+            return None
+
+
     def __get_shopify_fields(self, file_column_details):
         shopify_field = {}
         location_set = set({})
@@ -273,6 +832,100 @@ class ProductManagerService:
         return shopify_field
 
 
+    def __get_file_type(self, content_type, file_name):
+        file_type = None
+        if content_type == 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet' or content_type =='application/vnd.ms-excel':
+            file_type = FileType.EXCEL
+        elif content_type == 'text/csv':
+            file_type = FileType.CSV
+        else:
+            if file_name is not None and file_name != '':
+                file_ext = file_name.split('.')[-1].lower()
+                if file_ext == 'xlsx' or file_ext == 'xls':
+                    file_type = FileType.EXCEL
+                elif file_ext == 'csv':
+                   file_type = FileType.CSV 
+        return file_type
+
+
+    def __get_header_details(self, header_option, column_name=None, header_row=None):
+        """Returns the header option of an upload as {'option', 'value'} with the value the file reader expects"""
+
+        if header_option not in HeaderOption.__members__:
+            raise IllegalArgumentError('Unrecognized header option: ' + str(header_option))
+
+        header_details = {'option': header_option}
+        if header_option == HeaderOption.FIND.name:
+            header_details['value'] = column_name
+        elif header_option == HeaderOption.EXACT.name:
+            header_details['value'] = int(header_row) - 1
+        return header_details
+
+
+    def __get_reader_info(self, file_content, file_type, header_details):
+        reader_info = {
+            'file': file_content,
+            'type': file_type,
+            'header': {
+                'option': HeaderOption[header_details['option']]
+            }
+        }
+        if 'value' in header_details:
+            reader_info['header']['value'] = header_details['value']
+        return reader_info
+
+
+    def __get_locations(self, user_details, refresh=False):
+        """
+        Returns the locations of the user's shop. They are cached by shop domain in
+        the container and in the database, refresh skips both caches and fetches
+        them from Shopify again.
+        """
+
+        domain = user_details.get('domain')
+        if not refresh:
+            locations = _locations_cache.get(domain)
+            if locations is not None:
+                return locations
+            shop_locations = self._pm_access.get_cached_locations(domain)
+            if shop_locations is not None:
+                _locations_cache.put(domain, shop_locations['locations'], shop_locations['expires_at'])
+                return shop_locations['locations']
+
+        locations_response = self._pm_access.get_locations(domain, user_details.get('access_token'))
+        locations = self.__parse_locations(locations_response)
+        expires_at = self._pm_access.put_cached_locations(domain, locations)
+        _locations_cache.put(domain, locations, expires_at)
+        return locations
+
+
+    def __check_locations(self, quantity_columns):
+        """
+        Logs a warning when a quantity column is mapped to a location the shop's cached
+        locations don't have. The locations are refreshed when their cache expires,
+        not by a job, and a check that fails is logged as the job is still created.
+        """
+
+        try:
+            user_details = self._pm_access.get_user_by_id(self._user_context.get('userId'), USER_SHOP_ATTRIBUTES)
+            mapped_locations = {column.get('location') for column in quantity_columns}
+            unknown_locations = mapped_locations - self.__location_keys(self.__get_locations(user_details))
+        except Exception as error:
+            logging.exception('Could not check the locations quantity is mapped to. Error: %s', error)
+            return
+        if unknown_locations:
+            logging.warning('Quantity mapped to locations the shop does not have: %s', unknown_locations)
+
+
+    def __location_keys(self, locations):
+        """Values a quantity column can refer to a location by: its global id, its numeric id or its name"""
+
+        keys = set()
+        for location in locations:
+            keys.update((location['id'], location['id'].split('/')[-1], location['name']))
+        return keys
+
+
     def __parse_locations(self, response):
         locations = []
         if response['data']['locations']['edges'] is not None:
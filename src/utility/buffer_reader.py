@@ -0,0 +1,66 @@
+import io
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file object over an in-memory buffer (bytes, bytearray
+    or memoryview). Unlike io.BytesIO it never copies the whole buffer, so a
+    slice of a larger request body can be handed to pandas or S3 as a file.
+    """
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer).cast('B')
+        self._position = 0
+
+
+    def readable(self):
+        return True
+
+
+    def seekable(self):
+        return True
+
+
+    def readinto(self, target):
+        size = min(len(target), len(self._buffer) - self._position)
+        if size <= 0:
+            return 0
+        target[:size] = self._buffer[self._position:self._position + size]
+        self._position += size
+        return size
+
+
+    def read(self, size=-1):
+        end = len(self._buffer)
+        if size is not None and size >= 0:
+            end = min(end, self._position + size)
+        chunk = self._buffer[self._position:end].tobytes()
+        self._position = max(self._position, end)
+        return chunk
+
+
+    def readall(self):
+        return self.read()
+
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = len(self._buffer) + offset
+        else:
+            raise ValueError('Invalid whence value: ' + str(whence))
+        if position < 0:
+            raise ValueError('Negative seek position ' + str(position))
+        self._position = position
+        return self._position
+
+
+    def tell(self):
+        return self._position
+
+
+    def __len__(self):
+        return len(self._buffer)
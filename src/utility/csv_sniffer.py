@@ -0,0 +1,91 @@
+import csv
+import codecs
+
+SAMPLE_SIZE = 64 * 1024
+#csv.Sniffer's quote patterns take superlinear time on quoted text, so the delimiter is
+#guessed from the first lines of the sample only
+DELIMITER_SAMPLE_LINES = 20
+DELIMITER_SAMPLE_SIZE = 4 * 1024
+DELIMITERS = ',;\t|'
+DEFAULT_DELIMITER = ','
+#encodings tried in order when a csv file is not valid utf-8 (latin-1 decodes any byte)
+FALLBACK_ENCODINGS = ('cp1252', 'latin-1')
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16')
+)
+
+
+def sniff_csv(file_input, sample_size=SAMPLE_SIZE):
+    """
+    Guesses the encoding and the delimiter of a csv file from its first bytes.
+
+    Parameters
+    ----------
+    file_input: bytes or memoryview, required
+        content of the csv file
+
+    sample_size: int, optional
+        number of bytes looked at
+
+    Returns
+    -------
+    dict with 'encoding', 'delimiter' and 'row_size' (average bytes per line
+    in the sample, used to size the chunks the file is read in)
+    """
+
+    sample = bytes(file_input[:sample_size])
+    encoding = sniff_encoding(sample)
+    #the sample is cut at its last line break so a partial line or character is not looked at
+    last_line_end = sample.rfind(b'\n')
+    if last_line_end != -1 and len(sample) < len(file_input):
+        sample = sample[:last_line_end + 1]
+    text = sample.decode(encoding, errors='replace')
+
+    line_count = max(text.count('\n'), 1)
+    return {
+        'encoding': encoding,
+        'delimiter': sniff_delimiter(text),
+        'row_size': max(len(sample) // line_count, 1)
+    }
+
+
+def sniff_encoding(sample):
+    """Returns the encoding of a sample: from its byte order mark, utf-8 if it decodes, else a single byte encoding"""
+
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    #an incremental decoder does not fail on a character cut at the end of the sample
+    try:
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    for encoding in FALLBACK_ENCODINGS:
+        try:
+            sample.decode(encoding)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return FALLBACK_ENCODINGS[-1]
+
+
+def sniff_delimiter(text):
+    """
+    Returns the delimiter of a csv sample, a comma when it can't be told. Only the
+    first DELIMITER_SAMPLE_LINES lines (DELIMITER_SAMPLE_SIZE characters at most)
+    are looked at.
+    """
+
+    head = text[:DELIMITER_SAMPLE_SIZE]
+    lines = head.splitlines(keepends=True)
+    #a line cut by the size limit is left out, unless it is the only one
+    if len(head) < len(text) and len(lines) > 1 and not lines[-1].endswith(('\n', '\r')):
+        lines = lines[:-1]
+    try:
+        return csv.Sniffer().sniff(''.join(lines[:DELIMITER_SAMPLE_LINES]), delimiters=DELIMITERS).delimiter
+    except csv.Error:
+        return DEFAULT_DELIMITER
@@ -1,11 +1,77 @@
+import numpy as np
 import pandas as pd
-import io
+from pandas.io.parsers import TextParser
+from utility.buffer_reader import BufferReader
+from utility.xlsx_stream_reader import XlsxStreamReader
+from utility import csv_sniffer
+from utility.file_snapshot import SnapshotWriter
+from utility.file_snapshot import BATCH_ROW_COUNT
 from datamodel.custom_exceptions import MissingArgumentError
 from datamodel.custom_exceptions import HeaderRowNotFoundError
 from datamodel.custom_exceptions import WrongFileFormat
 from datamodel.custom_exceptions import EmptySheetError
 from datamodel.custom_enums import FileType
 from datamodel.custom_enums import HeaderOption
+from datamodel.custom_enums import FileReaderEngine
+
+#rows parsed at first for header detection and sample data (the header search looks
+#at 16 rows at most and the samples are the next 5 rows)
+PREVIEW_ROW_COUNT = 64
+HEADER_SEARCH_ROW_COUNT = 16
+PREVIEW_MIN_ROW_COUNT = HEADER_SEARCH_ROW_COUNT + 5
+#csv files are scanned in chunks of about this many bytes
+SCAN_CHUNK_SIZE = 8 * 1024 * 1024
+XLSX_SIGNATURE = b'PK\x03\x04'
+
+#cell wise string checks over object arrays (np.char would copy every cell into a
+#fixed width array as wide as the longest cell)
+_stripped = np.frompyfunc(lambda value: str(value).strip(), 1, 1)
+_stripped_lower = np.frompyfunc(lambda value: str(value).strip().lower(), 1, 1)
+_unnamed = np.frompyfunc(lambda value: 'Unnamed:' in str(value), 1, 1)
+#pandas reads whole excel numbers as ints, so the whole floats of a float column were ints
+_whole_as_int = np.frompyfunc(lambda value: int(value) if isinstance(value, float) and value.is_integer() else value, 1, 1)
+
+
+def _note_value(values, value):
+    """
+    Keeps the first value of each kind found in an excel column (values maps the
+    kinds to them), text that pandas would convert to a number or a boolean being
+    kinds of their own
+    """
+
+    kind = type(value)
+    if kind is str and 'text' not in values:
+        try:
+            float(value)
+            kind = 'number text'
+        except ValueError:
+            kind = 'boolean text' if value.strip().lower() in ('true', 'false') else 'text'
+    values.setdefault(kind, value)
+
+
+def _parse_column(values):
+    """Parses the values of an excel column the way pandas does after reading them with openpyxl"""
+
+    data = [['']] + [[value] for value in values]
+    return TextParser(data, header=0, skip_blank_lines=False).read().iloc[:, 0]
+
+
+def _sheet_values(column_values, value_counts, row_count):
+    """Returns the kept values of each column, and an empty one for the columns with empty cells"""
+
+    return [
+        list(values.values()) + ([''] if value_count < row_count else [])
+        for values, value_count in zip(column_values, value_counts)
+    ]
+
+
+def _with_labels(df, labels):
+    """Gives the columns of rows parsed without their header the labels pandas gives them"""
+
+    labels = labels + ['Unnamed: ' + str(index) for index in range(len(labels), len(df.columns))]
+    df = df.reindex(columns=range(len(labels)))
+    df.columns = labels
+    return df
 
 
 class FileReader:
@@ -14,6 +80,8 @@ class FileReader:
 
     Methods
     -------
+    get_file_details(): returns the header columns, sample data and row count
+    write_snapshot(file): writes the product rows found by get_file_details as a snapshot
     """
 
     def __init__(self, file_reader_info=None, file_details=None):
@@ -22,6 +90,7 @@ class FileReader:
             self._file_type = file_reader_info.get('type')
             self._header_option = file_reader_info.get('header').get('option')
             self._header_option_value = file_reader_info.get('header').get('value')
+            self._engine = file_reader_info.get('engine', FileReaderEngine.STREAM)
         elif file_details is not None:
             pass
         else:
@@ -30,25 +99,29 @@ class FileReader:
     
     def get_file_details(self):
         """
-        Gets the content of an excel or csv file including header columns
+        Gets the content of an excel or csv file including header columns.
+
+        Only the first rows of the sheet are parsed into a dataframe (enough to find
+        the header and the sample data), the rest of the file is only read to count
+        the non empty rows and columns. xlsx files are streamed in a single pass,
+        csv and xls files are counted by a separate pass (csv files in chunks of a
+        fixed size, with the delimiter and encoding sniffed from the first bytes).
         """
 
-        df = None
         header_column_row = (0, self._header_option_value) [self._header_option == HeaderOption.EXACT]
         max_num_of_sample_data = 5
 
-        #getting dataframe and raise error if we don't have proper file type
-        file_bytes = io.BytesIO(self._file_input)
-        if self._file_type == FileType.EXCEL:
-            df = pd.read_excel(file_bytes, header=header_column_row)
-        elif self._file_type == FileType.CSV:
-            df = pd.read_csv(file_bytes, header=header_column_row)
-        else:
+        #raise error if we don't have proper file type
+        if self._file_type != FileType.EXCEL and self._file_type != FileType.CSV:
             raise WrongFileFormat('Couldn\'t process file. File Type must be either CSV or EXCEL')
 
-        #drop all empty columns and empty row
-        df = df.dropna(axis=1, how='all').dropna(axis=0, how='all')
+        #count the non empty rows of the whole sheet and get a preview of its first
+        #rows with all empty columns and empty rows dropped
+        row_count, df = self.__read_sheet(header_column_row)
+        if row_count < 1:
+            raise EmptySheetError('The file does not contain any product data')
 
+        read_header_row = header_column_row
         original_header_columns = df.columns.tolist()
         actual_columns = original_header_columns.copy()
         values_start_index = 0
@@ -60,9 +133,8 @@ class FileReader:
             header_column_row = actual_header.get('header_row')
             values_start_index = actual_header.get('values_start_index')
 
-        row_values = df.values.tolist()[values_start_index:]
-        actual_row_count = len(row_values)
-        last_sample_Data_index = min((values_start_index + max_num_of_sample_data), len(df.values.tolist()))
+        actual_row_count = row_count - values_start_index
+        last_sample_Data_index = min((values_start_index + max_num_of_sample_data), len(df.index))
    
         #if no product rows then raise error
         if actual_row_count < 1: 
@@ -76,87 +148,438 @@ class FileReader:
             'columnDetails': []
         }
         actual_columns = self.__modifyNullColumnNames(actual_columns)
+
+        #only the sample rows are converted, a cell is a sample if it is not null or blank
+        sample_frame = df.iloc[values_start_index:last_sample_Data_index]
+        sample_values = sample_frame.to_numpy(dtype=object)
+        is_sample = pd.notnull(sample_values) & (_stripped(sample_values) != '')
         for index in range(len(original_header_columns)):
-            column = {}
-            sample_data = df[original_header_columns[index]].values.tolist()[values_start_index: last_sample_Data_index]
-            filtered_sample = []
-            for item in sample_data:
-                if pd.notnull(item) and str(item).strip() != '':
-                    filtered_sample.append(item)
-            column['name'] = actual_columns[index]
-            column['index'] = index
-            column['sampleData'] = filtered_sample
-            column['field'] = None
-            file_details['columnDetails'].append(column)
-        
+            sample_data = sample_frame.iloc[:, index].values.tolist()
+            file_details['columnDetails'].append({
+                'name': actual_columns[index],
+                'index': index,
+                'sampleData': [item for item, keep in zip(sample_data, is_sample[:, index]) if keep],
+                'field': None
+            })
+
+        self._snapshot_source = {
+            'read_header_row': read_header_row,
+            'skip_row_count': values_start_index,
+            'columns': actual_columns,
+            'header_row': header_column_row,
+            'row_count': actual_row_count
+        }
         return file_details
+
+
+    def write_snapshot(self, file, batch_row_count=BATCH_ROW_COUNT):
+        """
+        Writes the product rows of the file (the non empty rows below the header and
+        the non empty columns, as found by get_file_details) to a file object as a
+        snapshot downstream workers can read without parsing the file again
+        """
+
+        source = self._snapshot_source
+        writer = SnapshotWriter(file, source['columns'], source['header_row'], source['row_count'], self._file_type.name)
+        batch = []
+        for row in self.__iter_product_rows(source['read_header_row'], source['skip_row_count']):
+            batch.append(row)
+            if len(batch) >= batch_row_count:
+                writer.write_batch(batch)
+                batch = []
+        writer.write_batch(batch)
+        writer.close()
+
+
+    def __iter_product_rows(self, header_column_row, skip_row_count):
+        """Yields the non empty rows after the header row, with the non empty columns only"""
+
+        kept_columns = self._kept_columns
+        rows = self.__iter_rows(header_column_row)
+        for row in rows:
+            if skip_row_count > 0:
+                skip_row_count -= 1
+                continue
+            yield [(row[index] if index < len(row) else None) for index in kept_columns]
+
+
+    def __iter_rows(self, header_column_row):
+        """Yields the non empty rows after the header row read, empty cells are None"""
+
+        if (
+            self._file_type == FileType.EXCEL and self._engine == FileReaderEngine.STREAM and
+            self._file_input[:4] == XLSX_SIGNATURE
+        ):
+            reader = XlsxStreamReader(BufferReader(self._file_input))
+            try:
+                for row_number, row in enumerate(reader.iter_rows()):
+                    if row_number <= header_column_row or not row:
+                        continue
+                    yield [(None if value == '' else value) for value in row]
+            finally:
+                reader.close()
+            return
+
+        file_bytes = BufferReader(self._file_input)
+        if self._file_type == FileType.CSV:
+            #csv cells are kept as the text of the file
+            chunks = pd.read_csv(
+                file_bytes, header=header_column_row, chunksize=self._csv_chunk_row_count, dtype=str,
+                **self._csv_options
+            )
+        else:
+            chunks = [pd.read_excel(file_bytes, header=header_column_row)]
+        for chunk in chunks:
+            chunk = chunk.dropna(axis=0, how='all').astype(object)
+            values = chunk.where(chunk.notna(), None).to_numpy(dtype=object)
+            for row in values.tolist():
+                yield row
         
 
+    def __read_sheet(self, header_column_row):
+        """Returns the non empty row count of the sheet and its preview dataframe"""
+
+        if (
+            self._file_type == FileType.EXCEL and self._engine == FileReaderEngine.STREAM and
+            self._file_input[:4] == XLSX_SIGNATURE
+        ):
+            return self.__read_xlsx_stream(header_column_row)
+        if self._file_type == FileType.CSV:
+            return self.__read_csv(header_column_row)
+        return self.__scan_and_read_preview(header_column_row)
+
+
+    def __read_csv(self, header_column_row):
+        """
+        Reads a csv file with the delimiter and encoding sniffed from its first bytes.
+        A file that turns out not to be in the sniffed encoding further down is read
+        again with the next fallback encoding.
+        """
+
+        dialect = csv_sniffer.sniff_csv(self._file_input)
+        encodings = [dialect['encoding']] + [
+            encoding for encoding in csv_sniffer.FALLBACK_ENCODINGS if encoding != dialect['encoding']
+        ]
+        self._csv_chunk_row_count = max(PREVIEW_ROW_COUNT, SCAN_CHUNK_SIZE // dialect['row_size'])
+        for encoding in encodings:
+            self._csv_options = {'sep': dialect['delimiter'], 'encoding': encoding}
+            try:
+                return self.__scan_and_read_preview(header_column_row)
+            except UnicodeDecodeError:
+                if encoding == encodings[-1]:
+                    raise
+
+
+    def __scan_and_read_preview(self, header_column_row):
+        row_count, non_empty_columns = self.__scan_rows(header_column_row)
+        if row_count < 1:
+            return 0, None
+        return row_count, self.__read_preview(header_column_row, non_empty_columns, min(row_count, PREVIEW_MIN_ROW_COUNT))
+
+
+    def __read_xlsx_stream(self, header_column_row):
+        """
+        Collects the preview rows, counts the non empty rows and flags the non empty
+        columns of an xlsx file in one pass over the streamed rows
+        """
+
+        reader = XlsxStreamReader(BufferReader(self._file_input))
+        preview_rows = []
+        preview_data_row_count = 0
+        row_count = 0
+        sheet_row_count = 0
+        non_empty_columns = []
+        column_values = []
+        value_counts = []
+        first_value_rows = []
+        try:
+            for row_number, row in enumerate(reader.iter_rows()):
+                in_preview = preview_data_row_count < PREVIEW_MIN_ROW_COUNT
+                if in_preview:
+                    preview_rows.append(row)
+                if row_number <= header_column_row or not row:
+                    continue
+
+                row_count += 1
+                sheet_row_count = row_number - header_column_row
+                if in_preview:
+                    preview_data_row_count += 1
+                if len(row) > len(non_empty_columns):
+                    added = len(row) - len(non_empty_columns)
+                    non_empty_columns.extend([False] * added)
+                    column_values.extend({} for _ in range(added))
+                    value_counts.extend([0] * added)
+                    first_value_rows.extend([None] * added)
+                for index, value in enumerate(row):
+                    if value is not None and value != '':
+                        if not value_counts[index]:
+                            first_value_rows[index] = sheet_row_count
+                        _note_value(column_values[index], value)
+                        value_counts[index] += 1
+                        non_empty_columns[index] = True
+        finally:
+            reader.close()
+
+        if row_count < 1:
+            return 0, None
+
+        #same steps pandas takes after reading the rows with openpyxl
+        while not preview_rows[-1]:
+            preview_rows.pop()
+        width = max(len(row) for row in preview_rows)
+        data = [[('' if value is None else value) for value in row] + [''] * (width - len(row)) for row in preview_rows]
+        self._sheet_values = _sheet_values(column_values, value_counts, sheet_row_count)
+        self._first_value_rows = first_value_rows
+        #the labels pandas gives the header row (pandas does not parse a header row alone if it is empty)
+        header_rows = data[:header_column_row + 2]
+        self._sheet_labels = TextParser(header_rows, header=header_column_row, skip_blank_lines=False).read().columns.tolist()
+        dtypes = self.__excel_dtypes(len(preview_rows) - header_column_row - 1)
+        df = TextParser(data[header_column_row + 1:], header=None, skip_blank_lines=False, dtype=dtypes).read()
+        return row_count, self.__drop_empty(_with_labels(df, self._sheet_labels), non_empty_columns)
+
+
+    def __read_preview(self, header_column_row, non_empty_columns, min_row_count):
+        """
+        Reads the first rows of the sheet into a dataframe holding only the non empty
+        columns and at least min_row_count non empty rows (if the sheet has them).
+        The columns get the dtypes they have in the whole sheet, so the sample data
+        does not depend on how many rows are parsed.
+        """
+
+        nrows = PREVIEW_ROW_COUNT
+        while True:
+            file_bytes = BufferReader(self._file_input)
+            if self._file_type == FileType.EXCEL:
+                dtypes = self.__excel_dtypes(nrows)
+                df = pd.read_excel(
+                    file_bytes, header=None, skiprows=header_column_row + 1, nrows=nrows, dtype=dtypes
+                )
+                df = _with_labels(df, self._sheet_labels)
+            else:
+                df = pd.read_csv(
+                    file_bytes, header=header_column_row, nrows=nrows, dtype=self._csv_dtypes, **self._csv_options
+                )
+            if df.notna().values.any(axis=1).sum() >= min_row_count or len(df.index) < nrows:
+                break
+            nrows *= 4
+        return self.__drop_empty(df, non_empty_columns)
+
+
+    def __excel_dtypes(self, row_count):
+        """
+        Returns the dtypes to parse the first row_count rows below the header of an
+        excel sheet with, so its columns get the dtypes pandas gives them when it
+        parses the whole sheet (worked out from the values kept by the scan). The
+        columns without values in these rows may not be parsed and have none.
+        The dtypes are keyed by position, so the rows are parsed without their
+        header (pandas takes a position for a label when header cells are numbers).
+        """
+
+        dtypes = {}
+        for index, values in enumerate(self._sheet_values):
+            first_value_row = self._first_value_rows[index]
+            if not values or first_value_row is None or first_value_row > row_count:
+                continue
+            dtype = _parse_column(values).dtype
+            if dtype.kind != 'M':
+                dtypes[index] = dtype
+        return dtypes
+
+
+    def __drop_empty(self, df, non_empty_columns):
+        """Drops the empty rows of a preview and the columns that are empty in the whole sheet"""
+
+        df = df.dropna(axis=0, how='all')
+        # columns that only have values further down the sheet are not in the preview
+        for index in range(len(df.columns), len(non_empty_columns)):
+            df['Unnamed: ' + str(index)] = None
+        kept_columns = [index for index in range(len(df.columns)) if index < len(non_empty_columns) and non_empty_columns[index]]
+        self._kept_columns = kept_columns
+        return df.iloc[:, kept_columns]
+
+
+    def __scan_rows(self, header_column_row):
+        """
+        Counts the non empty rows below the header row and flags the columns that have
+        at least one value, without loading the whole sheet into a dataframe. The
+        dtypes the columns have in the whole sheet are kept for the preview.
+        """
+
+        file_bytes = BufferReader(self._file_input)
+        if self._file_type == FileType.CSV:
+            row_count = 0
+            non_empty_columns = None
+            column_kinds = []
+            chunks = pd.read_csv(
+                file_bytes, header=header_column_row, chunksize=self._csv_chunk_row_count, **self._csv_options
+            )
+            for chunk in chunks:
+                not_null = chunk.notna().values
+                row_count += int(not_null.any(axis=1).sum())
+                chunk_columns = not_null.any(axis=0)
+                non_empty_columns = chunk_columns if non_empty_columns is None else non_empty_columns | chunk_columns
+                self.__note_csv_kinds(chunk, chunk_columns, column_kinds)
+            self._csv_dtypes = self.__csv_dtypes(column_kinds)
+            if non_empty_columns is None:
+                return 0, []
+            return row_count, non_empty_columns.tolist()
+
+        if self._file_input[:4] == XLSX_SIGNATURE:
+            return self.__scan_xlsx_rows(file_bytes, header_column_row)
+
+        #older excel formats are not zip files and only pandas (xlrd) can read them
+        df = pd.read_excel(file_bytes, header=header_column_row)
+        not_null = df.notna().values
+        column_values = [{} for _ in df.columns]
+        for index, values in enumerate(column_values):
+            for value in _whole_as_int(df.iloc[:, index].to_numpy(dtype=object)[not_null[:, index]]):
+                _note_value(values, value)
+        self._sheet_values = _sheet_values(column_values, not_null.sum(axis=0).tolist(), len(df.index))
+        self._first_value_rows = (not_null.argmax(axis=0) + 1).tolist()
+        self._sheet_labels = df.columns.tolist()
+        return int(not_null.any(axis=1).sum()), not_null.any(axis=0).tolist()
+
+
+    def __note_csv_kinds(self, chunk, chunk_columns, column_kinds):
+        """
+        Adds the kinds of the columns of a csv chunk (int, float, boolean or text)
+        to those of the chunks before it, the columns empty in the chunk have none
+        """
+
+        for index, dtype in enumerate(chunk.dtypes):
+            if index == len(column_kinds):
+                column_kinds.append(set())
+            if not chunk_columns[index]:
+                continue
+            kind = dtype.kind if dtype.kind in 'bif' else 'O'
+            if kind == 'O':
+                #booleans with empty cells are objects
+                first_value = chunk.iloc[:, index].dropna().iloc[0]
+                kind = 'b' if isinstance(first_value, (bool, np.bool_)) else 'O'
+            column_kinds[index].add(kind)
+
+
+    def __csv_dtypes(self, column_kinds):
+        """
+        Returns the dtypes to read the preview of a csv file with, so its columns get
+        the dtypes they have in the whole file: columns holding text, or booleans and
+        numbers, are text and columns holding floats (or ints with empty cells) are
+        floats
+        """
+
+        dtypes = {}
+        for index, kinds in enumerate(column_kinds):
+            if 'O' in kinds or ('b' in kinds and len(kinds) > 1):
+                dtypes[index] = str
+            elif 'f' in kinds:
+                dtypes[index] = 'float64'
+        return dtypes
+
+
+    def __scan_xlsx_rows(self, file_bytes, header_column_row):
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(file_bytes, read_only=True, data_only=True, keep_links=False)
+        try:
+            row_count = 0
+            sheet_row_count = 0
+            non_empty_columns = []
+            column_values = []
+            value_counts = []
+            first_value_rows = []
+            #pandas uses the same read only reader and the header row is counted from the first sheet row
+            rows = workbook.worksheets[0].iter_rows(min_row=header_column_row + 2, values_only=True)
+            for row_number, row in enumerate(rows, 1):
+                row_is_empty = True
+                for index, value in enumerate(row):
+                    if value is None or value == '':
+                        continue
+                    row_is_empty = False
+                    if index >= len(non_empty_columns):
+                        added = index + 1 - len(non_empty_columns)
+                        non_empty_columns.extend([False] * added)
+                        column_values.extend({} for _ in range(added))
+                        value_counts.extend([0] * added)
+                        first_value_rows.extend([None] * added)
+                    if not value_counts[index]:
+                        first_value_rows[index] = row_number
+                    non_empty_columns[index] = True
+                    #pandas reads whole numbers as ints
+                    if type(value) is float and value.is_integer():
+                        value = int(value)
+                    _note_value(column_values[index], value)
+                    value_counts[index] += 1
+                if not row_is_empty:
+                    row_count += 1
+                    sheet_row_count = row_number
+            self._sheet_values = _sheet_values(column_values, value_counts, sheet_row_count)
+            self._first_value_rows = first_value_rows
+            self._sheet_labels = pd.read_excel(
+                BufferReader(self._file_input), header=header_column_row, nrows=0
+            ).columns.tolist()
+            return row_count, non_empty_columns
+        finally:
+            workbook.close()
+
+
     def __get_actual_head_row (self, dataframe, header_option, column_name=None):
+        columns = dataframe.columns.to_numpy(dtype=object)
         if header_option == HeaderOption.DEFAULT:
-            if not self.__isEmpty(dataframe.columns.tolist()):
+            if not self.__isEmpty(columns):
                 return {
                     'header_row': 0,
                     'values_start_index': 0,
-                    'columns': dataframe.columns.tolist()
+                    'columns': columns.tolist()
                 }
             else:
                 return {
-                    'header_row': dataframe.index.values.tolist()[0] + 1,
+                    'header_row': int(dataframe.index[0]) + 1,
                     'values_start_index': 1,
-                    'columns': dataframe.values.tolist()[0]
+                    'columns': self.__header_values(dataframe.iloc[0].tolist())
                 }
         elif header_option == HeaderOption.FIND:
-            stop_index = min(16, len(dataframe.values.tolist()))
-            header_row = dataframe.index.values.tolist()[0] + 1
-            values_start_index = 0
-            row_values = dataframe.values.tolist()
-            header_column = None
-
-            if self.__found_with_title(dataframe.columns.tolist(), column_name):
+            if self.__found_with_title(columns, column_name).any():
                 return {
                     'header_row': 0,
                     'values_start_index': 0,
-                    'columns': dataframe.columns.tolist()
+                    'columns': columns.tolist()
                 }
-            else:
-                for index in range(stop_index):
-                    if self.__found_with_title(row_values[index], column_name):
-                        header_column = row_values[index]
-                        values_start_index = index + 1
-                        break
-                    else:
-                        header_row += 1
 
-                if header_column is not None:
-                    return {
-                        'header_row': header_row,
-                        'values_start_index': values_start_index,
-                        'columns': header_column
-                    }
-                else:
-                    raise HeaderRowNotFoundError("File Reader fails to locate header row")
+            #the header is looked for in the first 16 rows only
+            search_values = dataframe.iloc[:HEADER_SEARCH_ROW_COUNT].to_numpy(dtype=object)
+            matching_rows = self.__found_with_title(search_values, column_name).any(axis=1).nonzero()[0]
+            if len(matching_rows) == 0:
+                raise HeaderRowNotFoundError("File Reader fails to locate header row")
 
+            header_index = int(matching_rows[0])
+            return {
+                'header_row': int(dataframe.index[0]) + 1 + header_index,
+                'values_start_index': header_index + 1,
+                'columns': self.__header_values(search_values[header_index].tolist())
+            }
 
 
-    def __isEmpty(self, columns):
-        for cell in columns:
-            if 'Unnamed:' not in str(cell) and str(cell).strip() is not None and pd.notnull(cell) and str(cell).strip() != '':
-                return False
+    def __header_values(self, row):
+        """Returns the cells of a header row found below the row read as header, whole numbers as ints"""
+
+        #the cells of a float column are floats, but the header cell is the number in the sheet
+        row = [value.item() if isinstance(value, np.generic) else value for value in row]
+        return [int(value) if isinstance(value, float) and value.is_integer() else value for value in row]
 
-        return True
+
+    def __isEmpty(self, columns):
+        is_named = pd.notnull(columns) & (_stripped(columns) != '') & ~_unnamed(columns).astype(bool)
+        return not is_named.any()
 
 
-    def __found_with_title(self, columns, column_name):
-        for cell in columns:
-            if pd.notnull(cell) and str(cell).strip().lower() == str(column_name).lower():
-                return True
+    def __found_with_title(self, values, column_name):
+        """Returns a boolean array flagging the cells that hold the column name"""
 
-        return False
+        return pd.notnull(values) & (_stripped_lower(values) == str(column_name).lower())
 
 
     def __modifyNullColumnNames(self, column_names):
         for index in range(len(column_names)):
-            if 'Unnamed:' in str(column_names[index]) or str(column_names[index]).strip() is None or pd.isnull(column_names[index]) or str(column_names[index]).strip() == '':
+            if 'Unnamed:' in str(column_names[index]) or pd.isnull(column_names[index]) or str(column_names[index]).strip() == '':
                 column_names[index] = 'Column ' + str(index + 1)
         return column_names
@@ -0,0 +1,96 @@
+import gzip
+import json
+import datetime
+
+SNAPSHOT_FORMAT = 'product-manager-snapshot'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = '.snapshot.jsonl.gz'
+BATCH_ROW_COUNT = 5000
+
+
+class SnapshotWriter:
+    """
+    Writes the product rows of a parsed file as a gzip compressed stream of json
+    lines. The first line describes the file (columns, header row, row count)
+    and every following line is a batch of rows stored column by column:
+    {"rowCount": n, "columns": [[values of column 0], [values of column 1], ...]}
+
+    Methods
+    -------
+    write_batch(rows): writes a list of rows (lists of cell values, one per column)
+    close(): flushes the stream, the target file object is left open
+    """
+
+    def __init__(self, file, columns, header_row, row_count, file_type):
+        self._file = gzip.GzipFile(fileobj=file, mode='wb', compresslevel=6, mtime=0)
+        self._column_count = len(columns)
+        self.__write_line({
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_VERSION,
+            'fileType': file_type,
+            'headerRow': header_row,
+            'rowCount': row_count,
+            'columns': columns
+        })
+
+
+    def write_batch(self, rows):
+        if not rows:
+            return
+        columns = [list(values) for values in zip(*rows)]
+        self.__write_line({'rowCount': len(rows), 'columns': columns})
+
+
+    def close(self):
+        self._file.close()
+
+
+    def __write_line(self, line):
+        self._file.write(json.dumps(line, default=_json_default, separators=(',', ':')).encode('utf-8'))
+        self._file.write(b'\n')
+
+
+class SnapshotReader:
+    """
+    Reads a snapshot written by SnapshotWriter from a file object (a local file
+    or an s3 object body), one batch at a time.
+
+    Methods
+    -------
+    iter_batches(): yields each batch as a list of columns (lists of cell values)
+    iter_rows(): yields every row as a dict of column name to cell value
+    """
+
+    def __init__(self, file):
+        self._file = gzip.GzipFile(fileobj=file, mode='rb')
+        header = json.loads(self._file.readline())
+        if header.get('format') != SNAPSHOT_FORMAT or header.get('version') != SNAPSHOT_VERSION:
+            raise ValueError('Unsupported snapshot format: ' + str(header.get('format')) + ' ' + str(header.get('version')))
+        self.columns = header['columns']
+        self.header_row = header['headerRow']
+        self.row_count = header['rowCount']
+        self.file_type = header['fileType']
+
+
+    def iter_batches(self):
+        for line in self._file:
+            yield json.loads(line)['columns']
+
+
+    def iter_rows(self):
+        for columns in self.iter_batches():
+            for values in zip(*columns):
+                yield dict(zip(self.columns, values))
+
+
+    def close(self):
+        self._file.close()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    #numpy scalars from pandas frames
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
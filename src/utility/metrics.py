@@ -0,0 +1,211 @@
+import functools
+import inspect
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+NAMESPACE = 'ProductManagerService'
+DURATION_UNIT = 'Milliseconds'
+
+# metrics of the request being handled, None when it is not sampled. A lambda
+# container handles one request at a time, and the task graph threads of a
+# request record into the same metrics, so this is not thread local.
+_current = None
+
+
+class RequestMetrics:
+    """
+    Stage durations and counts recorded while one request is handled, written
+    as one CloudWatch embedded metric format line when it ends. Stages nest
+    (a service method includes the data access calls it makes) and stages run
+    on the task graph overlap, so they do not add up to the request duration.
+
+    Methods
+    -------
+    add(name, value, unit): adds a value to a metric
+    flush(stream): writes the embedded metric format line
+    """
+
+    def __init__(self, route):
+        self.route = route
+        self.properties = {}
+        self._values = {}
+        self._units = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+
+    def add(self, name, value, unit='Count'):
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+            self._units[name] = unit
+
+
+    def flush(self, stream=None):
+        self.add('Duration', (time.perf_counter() - self._start) * 1000, DURATION_UNIT)
+        with self._lock:
+            line = {
+                '_aws': {
+                    'Timestamp': int(time.time() * 1000),
+                    'CloudWatchMetrics': [{
+                        'Namespace': NAMESPACE,
+                        'Dimensions': [['Route']],
+                        'Metrics': [{'Name': name, 'Unit': unit} for name, unit in self._units.items()]
+                    }]
+                },
+                'Route': self.route
+            }
+            line.update(self.properties)
+            for name, value in self._values.items():
+                line[name] = round(value, 3) if isinstance(value, float) else value
+        #written to stdout as is, the lambda log handler would prefix the json
+        (stream or sys.stdout).write(json.dumps(line, default=str) + '\n')
+
+
+class _Timer:
+
+    def __init__(self, request_metrics, stage):
+        self._request_metrics = request_metrics
+        self._stage = stage
+
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self._request_metrics.add(self._stage, (time.perf_counter() - self._start) * 1000, DURATION_UNIT)
+        return False
+
+
+class _NoTimer:
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+def start_request(route, sample_rate=None):
+    """
+    Starts recording the metrics of a request, when it is sampled. The sample
+    rate (0 to 1) is read from the metrics_sample_rate environment variable
+    when it is not given, 0 turns metrics off.
+    """
+
+    global _current
+    if sample_rate is None:
+        sample_rate = float(os.environ.get('metrics_sample_rate', 0))
+    _current = RequestMetrics(route) if sample_rate > 0 and random.random() < sample_rate else None
+    return _current
+
+
+def finish_request(**properties):
+    """Writes the metrics of the request being handled (if it was sampled) with the given properties"""
+
+    global _current
+    request_metrics, _current = _current, None
+    if request_metrics is not None:
+        request_metrics.properties.update(properties)
+        request_metrics.flush()
+
+
+def is_sampled():
+    return _current is not None
+
+
+def count(name, value, unit='Count'):
+    """Adds a value (e.g. bytes or rows processed) to a metric of the request being handled"""
+
+    request_metrics = _current
+    if request_metrics is not None:
+        request_metrics.add(name, value, unit)
+
+
+def timer(stage):
+    """Context manager adding the time spent in its block to a stage of the request being handled"""
+
+    request_metrics = _current
+    if request_metrics is None:
+        return _NO_TIMER
+    return _Timer(request_metrics, stage)
+
+
+def timed(stage):
+    """Decorator adding the time spent in a function to a stage of the request being handled"""
+
+    def decorate(function):
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            request_metrics = _current
+            if request_metrics is None:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                request_metrics.add(stage, (time.perf_counter() - start) * 1000, DURATION_UNIT)
+        return timed_function
+
+    return decorate
+
+
+def timed_methods(prefix):
+    """Class decorator timing each public method of a class as the stage '<prefix>.<method name>'"""
+
+    def decorate(cls):
+        for name, member in list(vars(cls).items()):
+            if not name.startswith('_') and inspect.isfunction(member):
+                setattr(cls, name, timed(prefix + '.' + name)(member))
+        return cls
+
+    return decorate
+
+
+def register_aws_hooks(events):
+    """
+    Registers botocore event handlers that time every AWS call of a sampled
+    request as 'aws.<service>.<operation>' and ask dynamodb for the capacity
+    its calls consume.
+
+    Parameters
+    ----------
+    events: botocore event emitter, required
+        events of the boto3 session the clients are created from
+    """
+
+    events.register('provide-client-params', _aws_call_started)
+    events.register('after-call', _aws_call_finished)
+
+
+def _aws_call_started(params, model, context, **kwargs):
+    if _current is None:
+        return
+    context['metrics_start'] = time.perf_counter()
+    input_shape = model.input_shape
+    if input_shape is not None and 'ReturnConsumedCapacity' in input_shape.members:
+        params.setdefault('ReturnConsumedCapacity', 'TOTAL')
+
+
+def _aws_call_finished(parsed, model, context, **kwargs):
+    request_metrics = _current
+    start = context.get('metrics_start')
+    if request_metrics is None or start is None:
+        return
+    stage = 'aws.' + model.service_model.service_name + '.' + model.name
+    request_metrics.add(stage, (time.perf_counter() - start) * 1000, DURATION_UNIT)
+    consumed_capacity = parsed.get('ConsumedCapacity') if isinstance(parsed, dict) else None
+    #a list for batch and transaction calls
+    if isinstance(consumed_capacity, dict):
+        consumed_capacity = [consumed_capacity]
+    for capacity in consumed_capacity or []:
+        request_metrics.add('dynamodb.ConsumedCapacity', capacity.get('CapacityUnits', 0))
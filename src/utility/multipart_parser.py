@@ -0,0 +1,101 @@
+import re
+from urllib.parse import unquote
+from datamodel.custom_exceptions import IllegalArgumentError
+
+_PARAM_PATTERN = re.compile(r';\s*([^\s=;]+)\s*=\s*("(?:[^"\\]|\\.)*"|[^;]*)')
+_HEADER_END = b'\r\n\r\n'
+_LINE_END = b'\r\n'
+
+
+def parse_form_data(body, content_type, file_fields=('file',)):
+    """
+    Parses a multipart/form-data body in a single pass without copying the parts.
+
+    Parameters
+    ----------
+    body: bytes, required
+        the decoded request body
+
+    content_type: string, required
+        value of the request Content-Type header (it carries the boundary)
+
+    file_fields: tuple, optional
+        names of the parts that hold files. Their content is returned as a
+        memoryview over body and their file name is returned with them; the
+        content of every other part is decoded to a string.
+
+    Returns
+    -------
+    dict of part name to {'content', 'content_type'[, 'file_name']}
+    """
+
+    if content_type is None or not content_type.strip().lower().startswith('multipart/'):
+        raise IllegalArgumentError('Form data could not be processed. Multipart is False')
+    boundary = _parse_params(content_type).get('boundary')
+    if not boundary:
+        raise IllegalArgumentError('Form data could not be processed. Boundary is missing from content type')
+
+    delimiter = b'--' + boundary.encode('latin-1')
+    view = memoryview(body)
+    form_content = {}
+
+    position = body.find(delimiter)
+    if position == -1:
+        raise IllegalArgumentError('Form data could not be processed. Boundary not found in body')
+    position += len(delimiter)
+
+    while not body.startswith(b'--', position):
+        if body.startswith(_LINE_END, position):
+            position += len(_LINE_END)
+        headers_end = body.find(_HEADER_END, position)
+        if headers_end == -1:
+            raise IllegalArgumentError('Form data could not be processed. Part headers are not terminated')
+        headers = _parse_headers(body[position:headers_end])
+        content_start = headers_end + len(_HEADER_END)
+        content_end = body.find(_LINE_END + delimiter, content_start)
+        if content_end == -1:
+            raise IllegalArgumentError('Form data could not be processed. Closing boundary not found')
+        position = content_end + len(_LINE_END) + len(delimiter)
+
+        disposition = _parse_params(headers.get('content-disposition', ''))
+        name = disposition.get('name')
+        if not name:
+            continue
+        part_content_type = headers.get('content-type', 'text/plain').split(';')[0].strip().lower()
+        if name in file_fields:
+            file_name = disposition.get('filename')
+            if 'filename*' in disposition:
+                file_name = unquote(disposition['filename*'].split("'", 2)[-1])
+            form_content[name] = {
+                'content': view[content_start:content_end],
+                'content_type': part_content_type,
+                'file_name': file_name
+            }
+        else:
+            charset = _parse_params(headers.get('content-type', '')).get('charset', 'utf-8')
+            form_content[name] = {
+                'content': body[content_start:content_end].decode(charset, errors='replace'),
+                'content_type': part_content_type
+            }
+
+    return form_content
+
+
+def _parse_headers(header_block):
+    headers = {}
+    for line in header_block.decode('utf-8', errors='replace').split('\r\n'):
+        if ':' not in line:
+            continue
+        name, value = line.split(':', 1)
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _parse_params(header_value):
+    params = {}
+    for name, value in _PARAM_PATTERN.findall(header_value):
+        value = value.strip()
+        if len(value) > 1 and value[0] == '"' and value[-1] == '"':
+            value = re.sub(r'\\(.)', r'\1', value[1:-1])
+        params[name.lower()] = value
+    return params
@@ -0,0 +1,53 @@
+import json
+import base64
+import binascii
+from decimal import Decimal
+from datamodel.custom_exceptions import IllegalArgumentError
+
+
+def encode_token(last_evaluated_key):
+    """
+    Encodes the LastEvaluatedKey of a dynamodb query as an opaque, url safe
+    continuation token. Returns None when there is no next page.
+    """
+
+    if not last_evaluated_key:
+        return None
+    key_json = json.dumps(last_evaluated_key, default=_json_default, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(key_json.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_token(token):
+    """Decodes a continuation token back into the ExclusiveStartKey of the next query"""
+
+    if token is None or token == '':
+        return None
+    try:
+        padded_token = token + '=' * (-len(token) % 4)
+        last_evaluated_key = json.loads(base64.urlsafe_b64decode(padded_token.encode('ascii')), parse_float=Decimal)
+    except (ValueError, TypeError, binascii.Error, UnicodeError):
+        raise IllegalArgumentError('Continuation token is not valid')
+    if not isinstance(last_evaluated_key, dict) or not last_evaluated_key:
+        raise IllegalArgumentError('Continuation token is not valid')
+    return last_evaluated_key
+
+
+def get_page_size(value, default, maximum):
+    """Returns the page size asked for by a request, between 1 and maximum"""
+
+    if value is None or value == '':
+        return default
+    try:
+        page_size = int(value)
+    except (ValueError, TypeError):
+        raise IllegalArgumentError('Page size must be a number. Page size: ' + str(value))
+    if page_size < 1 or page_size > maximum:
+        raise IllegalArgumentError('Page size must be between 1 and ' + str(maximum) + '. Page size: ' + str(page_size))
+    return page_size
+
+
+def _json_default(value):
+    #numbers come back from dynamodb as decimals
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError('Key value can not be encoded in a continuation token: ' + repr(value))
@@ -0,0 +1,142 @@
+import base64
+import json
+import os
+import zlib
+
+from utility import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+#off until the api gateway has */* as a binary media type, clients would get the base64 text otherwise
+DEFAULT_COMPRESSION_MIN_SIZE = -1
+GZIP_LEVEL = 6
+# brotli's default quality (11) is several times slower than gzip for little gain on json
+BROTLI_QUALITY = 5
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+
+def json_library():
+    """
+    Returns the name of the library response bodies are serialized with: the
+    json_library environment variable ('orjson' or 'json'), or orjson when it
+    is installed.
+    """
+
+    name = os.environ.get('json_library')
+    if name == 'json' or orjson is None:
+        return 'json'
+    return 'orjson'
+
+
+def dumps(value):
+    """Serializes a response body to a json string"""
+
+    with metrics.timer('response.serialize'):
+        if json_library() == 'orjson':
+            try:
+                return orjson.dumps(value, option=ORJSON_OPTIONS).decode('utf-8')
+            except TypeError:
+                #values orjson does not take (e.g. integers over 64 bits) go through the standard library
+                pass
+        return json.dumps(value, separators=(',', ':'))
+
+
+def encodings():
+    """Returns the content codings responses can be compressed with, preferred first"""
+
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate(accept_encoding):
+    """
+    Returns the content coding to compress a response with for an
+    Accept-Encoding header, None when the client takes none of them.
+    """
+
+    if not accept_encoding:
+        return None
+    weights = {}
+    for element in accept_encoding.split(','):
+        coding, _, params = element.partition(';')
+        coding = coding.strip().lower()
+        weight = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding:
+            weights[coding] = weight
+    chosen, chosen_weight = None, 0.0
+    for coding in encodings():
+        weight = weights.get(coding, weights.get('*', 0.0))
+        if weight > chosen_weight:
+            chosen, chosen_weight = coding, weight
+    return chosen
+
+
+def compress(data, coding):
+    if coding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    #gzip container (wbits 31) without a timestamp, so equal bodies compress equally
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+def encode(response, request_headers):
+    """
+    Compresses the body of a response with the coding the client accepts
+    when it is at least response_compression_min_size bytes (negative, the
+    default, turns compression off). Compressed bodies are base64 encoded for
+    the api gateway.
+
+    Parameters
+    ----------
+    response: dict, required
+        api gateway proxy response, updated in place
+
+    request_headers: dict, optional
+        headers of the request
+
+    Returns
+    -------
+    the response
+    """
+
+    body = response.get('body')
+    min_size = int(os.environ.get('response_compression_min_size', DEFAULT_COMPRESSION_MIN_SIZE))
+    if not isinstance(body, str) or response.get('isBase64Encoded') or min_size < 0:
+        return response
+    data = body.encode('utf-8')
+    if len(data) < min_size:
+        return response
+
+    response['headers'] = dict(response.get('headers') or {}, Vary='Accept-Encoding')
+    accept_encoding = next(
+        (value for name, value in (request_headers or {}).items() if name.lower() == 'accept-encoding'), None
+    )
+    coding = negotiate(accept_encoding)
+    if coding is None:
+        return response
+    with metrics.timer('response.compress'):
+        compressed = compress(data, coding)
+    metrics.count('response.bytes', len(data), 'Bytes')
+    metrics.count('response.compressed_bytes', len(compressed), 'Bytes')
+    response['headers']['Content-Encoding'] = coding
+    #like nginx, the etag of a compressed body is weak: the bytes differ, the json does not
+    etag = response['headers'].get('ETag')
+    if etag and not etag.startswith('W/'):
+        response['headers']['ETag'] = 'W/' + etag
+    response['body'] = base64.b64encode(compressed).decode('ascii')
+    response['isBase64Encoded'] = True
+    return response
@@ -0,0 +1,50 @@
+import csv
+import gzip
+import io
+import json
+from datamodel.custom_enums import ExportFormat
+
+EXPORT_PREFIX = 'exports/'
+EXPORT_EXTENSIONS = {ExportFormat.CSV: '.csv.gz', ExportFormat.NDJSON: '.ndjson.gz'}
+CSV_COLUMNS = ['id', 'status', 'product_id', 'product_title', 'featured_image', 'messages']
+
+
+class ResultExportWriter:
+    """
+    Writes job results to a gzip compressed csv (one column per result field,
+    messages as a json list) or newline delimited json file, page by page, so
+    an export never holds more than a page of results in memory.
+
+    Methods
+    -------
+    write(results): writes a list of job results
+    close(): flushes the stream, the target file object is left open
+    """
+
+    def __init__(self, file, export_format):
+        self._file = gzip.GzipFile(fileobj=file, mode='wb', compresslevel=6, mtime=0)
+        self._text = io.TextIOWrapper(self._file, encoding='utf-8', newline='')
+        self._export_format = export_format
+        self.row_count = 0
+        self._csv_writer = None
+        if export_format == ExportFormat.CSV:
+            self._csv_writer = csv.writer(self._text)
+            self._csv_writer.writerow(CSV_COLUMNS)
+
+
+    def write(self, results):
+        for result in results:
+            if self._csv_writer is not None:
+                row = [result.get(column, '') for column in CSV_COLUMNS]
+                row[-1] = json.dumps(result.get('messages', []))
+                self._csv_writer.writerow(row)
+            else:
+                self._text.write(json.dumps(result, separators=(',', ':')))
+                self._text.write('\n')
+        self.row_count += len(results)
+
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()
+        self._file.close()
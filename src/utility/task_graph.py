@@ -0,0 +1,93 @@
+import threading
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 8
+
+_executor_lock = threading.Lock()
+_executor = None
+
+
+class TaskGraph:
+    """
+    Runs a small graph of dependent tasks (mostly network calls) on a thread pool.
+    A task starts as soon as the tasks it requires have finished and is called
+    with their results. A task whose requirement failed fails with the same
+    exception, so result() raises the original error to the caller.
+
+    Methods
+    -------
+    add(name, function, requires): adds a task, returns its future
+    result(name): waits for a task and returns its result (or raises its error)
+    wait(): waits for every task, so none is left running when a request ends
+    """
+
+    def __init__(self, executor=None):
+        self._executor = executor or get_executor()
+        self._futures = {}
+
+
+    def add(self, name, function, requires=()):
+        future = Future()
+        dependencies = [self._futures[required] for required in requires]
+        self._futures[name] = future
+
+        if not dependencies:
+            self._executor.submit(self.__run, future, function, [])
+            return future
+
+        remaining = [len(dependencies)]
+        lock = threading.Lock()
+
+        def dependency_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            for dependency in dependencies:
+                if dependency.cancelled():
+                    future.cancel()
+                    return
+                if dependency.exception() is not None:
+                    if future.set_running_or_notify_cancel():
+                        future.set_exception(dependency.exception())
+                    return
+            self._executor.submit(self.__run, future, function, [dependency.result() for dependency in dependencies])
+
+        for dependency in dependencies:
+            dependency.add_done_callback(dependency_done)
+        return future
+
+
+    def result(self, name):
+        return self._futures[name].result()
+
+
+    def wait(self):
+        """Waits for every task to finish, failed tasks included, without raising"""
+
+        for future in list(self._futures.values()):
+            try:
+                future.result()
+            except Exception:
+                pass
+
+
+    def __run(self, future, function, arguments):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*arguments))
+        except BaseException as error:
+            future.set_exception(error)
+
+
+def get_executor():
+    """Returns the thread pool shared by the invocations of a container"""
+
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='task-graph')
+    return _executor
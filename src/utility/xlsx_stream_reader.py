@@ -0,0 +1,303 @@
+import re
+import zipfile
+import datetime
+import posixpath
+from xml.etree import ElementTree
+
+_RELATIONSHIP_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_WINDOWS_EPOCH = datetime.datetime(1899, 12, 30)
+_MAC_EPOCH = datetime.datetime(1904, 1, 1)
+_SECONDS_PER_DAY = 86400
+_CHUNK_SIZE = 1 << 16
+_DIGITS = '0123456789'
+#built in number formats (see ECMA-376 18.8.30) that display dates or times
+_BUILTIN_DATE_FORMATS = set(range(14, 23)) | {45, 46, 47}
+_FORMAT_LITERALS = re.compile(r'\[(?!(?:hh?|mm?|ss?)\])[^\]]*\]|"[^"]*"|\\.|_.|\*.')
+_DATE_TOKENS = re.compile(r'(?<![_\\])[dmhysDMHYS]')
+
+
+class XlsxStreamReader:
+    """
+    Streams the rows of the first worksheet of an xlsx file straight from the
+    worksheet xml inside the zip, one row at a time. Only the shared string
+    table and the cell styles are held in memory.
+
+    Rows and values match what pandas gets from openpyxl's read only reader:
+    rows are numbered from the first sheet row (missing rows come back empty),
+    trailing empty cells are dropped, empty and error cells are None, whole
+    numbers are ints and numbers with a date format are datetimes.
+
+    Methods
+    -------
+    iter_rows(): yields every row of the sheet as a list of cell values
+    """
+
+    def __init__(self, file):
+        self._zip_file = zipfile.ZipFile(file)
+        workbook = self.__parse_workbook()
+        self._sheet_path = workbook['sheet_path']
+        self._epoch = (_WINDOWS_EPOCH, _MAC_EPOCH) [workbook['date1904']]
+        self._shared_strings = self.__read_shared_strings()
+        self._date_styles = self.__read_date_styles()
+
+
+    def iter_rows(self):
+        """Yields the rows of the sheet as lists of cell values"""
+
+        next_row_number = 1
+        target = _SheetTarget(self.__read_value)
+        parser = ElementTree.XMLParser(target=target)
+        with self._zip_file.open(self._sheet_path) as sheet_file:
+            while True:
+                chunk = sheet_file.read(_CHUNK_SIZE)
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    parser.close()
+
+                #only the rows completed by this chunk are held in memory
+                rows, target.rows = target.rows, []
+                for row_number, row in rows:
+                    row_number = row_number or next_row_number
+                    while next_row_number < row_number:
+                        next_row_number += 1
+                        yield []
+                    next_row_number = row_number + 1
+                    yield row
+
+                if not chunk:
+                    break
+
+
+    def close(self):
+        self._zip_file.close()
+
+
+    def __read_value(self, cell_type, style, value):
+        if value is None:
+            return None
+        if cell_type == 's':
+            return self._shared_strings[int(value)]
+        if cell_type == 'n':
+            number = float(value)
+            if style in self._date_styles:
+                return self.__to_datetime(number)
+            return int(number) if number.is_integer() else number
+        if cell_type == 'b':
+            return value == '1'
+        if cell_type == 'e':
+            return None
+        return value
+
+
+    def __to_datetime(self, serial):
+        #serials before 1900-03-01 are shifted by excel's 1900 leap year bug
+        if 0 < serial < 60 and self._epoch == _WINDOWS_EPOCH:
+            serial += 1
+        days, fraction = divmod(serial, 1)
+        time_of_day = datetime.timedelta(milliseconds=round(fraction * _SECONDS_PER_DAY * 1000))
+        if 0 <= serial < 1 and time_of_day.days == 0:
+            return (datetime.datetime.min + time_of_day).time()
+        return self._epoch + datetime.timedelta(days=days) + time_of_day
+
+
+    def __parse_workbook(self):
+        workbook_xml = ElementTree.fromstring(self._zip_file.read('xl/workbook.xml'))
+        relations = {}
+        if 'xl/_rels/workbook.xml.rels' in self._zip_file.namelist():
+            relations_xml = ElementTree.fromstring(self._zip_file.read('xl/_rels/workbook.xml.rels'))
+            for relation in relations_xml:
+                if relation.get('Type', '').endswith('/worksheet'):
+                    relations[relation.get('Id')] = relation.get('Target')
+
+        sheet_path = 'xl/worksheets/sheet1.xml'
+        date1904 = False
+        for element in workbook_xml.iter():
+            tag = _local_name(element.tag)
+            if tag == 'workbookPr':
+                date1904 = element.get('date1904', 'false').lower() in ('1', 'true')
+            elif tag == 'sheet':
+                target = relations.get(element.get('{' + _RELATIONSHIP_NS + '}id'))
+                if target is None:
+                    #chartsheets and other non worksheet sheets
+                    continue
+                if target.startswith('/'):
+                    sheet_path = target[1:]
+                else:
+                    sheet_path = posixpath.normpath(posixpath.join('xl', target))
+                break
+        return {'sheet_path': sheet_path, 'date1904': date1904}
+
+
+    def __read_shared_strings(self):
+        shared_strings = []
+        if 'xl/sharedStrings.xml' not in self._zip_file.namelist():
+            return shared_strings
+
+        with self._zip_file.open('xl/sharedStrings.xml') as strings_file:
+            for _, element in ElementTree.iterparse(strings_file):
+                if _local_name(element.tag) == 'si':
+                    shared_strings.append(_rich_text(element))
+                    element.clear()
+        return shared_strings
+
+
+    def __read_date_styles(self):
+        """Returns the indexes of the cell styles whose number format is a date"""
+
+        date_styles = set()
+        if 'xl/styles.xml' not in self._zip_file.namelist():
+            return date_styles
+
+        styles_xml = ElementTree.fromstring(self._zip_file.read('xl/styles.xml'))
+        custom_formats = {}
+        cell_formats = None
+        for element in styles_xml:
+            tag = _local_name(element.tag)
+            if tag == 'numFmts':
+                for number_format in element:
+                    custom_formats[int(number_format.get('numFmtId'))] = number_format.get('formatCode')
+            elif tag == 'cellXfs':
+                cell_formats = element
+
+        if cell_formats is None:
+            return date_styles
+        for index, cell_format in enumerate(cell_formats):
+            format_id = int(cell_format.get('numFmtId', 0))
+            if format_id in custom_formats:
+                if _is_date_format(custom_formats[format_id]):
+                    date_styles.add(index)
+            elif format_id in _BUILTIN_DATE_FORMATS:
+                date_styles.add(index)
+        return date_styles
+
+
+class _SheetTarget:
+    """
+    ElementTree parser target that turns worksheet xml into rows. Rows are
+    built from the parser callbacks directly so no element tree is created.
+    """
+
+    def __init__(self, read_value):
+        self.rows = []
+        self._read_value = read_value
+        self._tags = None
+        self._row = None
+        self._row_number = None
+        self._cell = None
+        self._value = None
+        self._text = None
+        self._column_indexes = {}
+        #inline strings: depth inside <is>, and whether a <t> is inside a phonetic hint
+        self._inline_depth = 0
+        self._phonetic_depth = 0
+
+
+    def start(self, tag, attrib):
+        if self._tags is None:
+            namespace = tag[:tag.find('}') + 1]
+            self._tags = {name: namespace + name for name in ('row', 'c', 'v', 'is', 't', 'rPh')}
+        tags = self._tags
+
+        if tag == tags['c']:
+            self._cell = attrib
+            self._value = None
+        elif tag == tags['v']:
+            self._text = []
+        elif tag == tags['row']:
+            self._row = []
+            row_number = attrib.get('r')
+            self._row_number = int(row_number) if row_number else None
+        elif tag == tags['is']:
+            self._inline_depth += 1
+            self._value = ''
+        elif self._inline_depth:
+            if tag == tags['rPh']:
+                self._phonetic_depth += 1
+            elif tag == tags['t'] and not self._phonetic_depth:
+                self._text = []
+
+
+    def data(self, text):
+        if self._text is not None:
+            self._text.append(text)
+
+
+    def end(self, tag):
+        tags = self._tags
+        if tag == tags['v']:
+            self._value = ''.join(self._text)
+            self._text = None
+        elif tag == tags['c']:
+            self.__add_cell()
+        elif tag == tags['row']:
+            row = self._row
+            #trailing empty cells do not make a row wider (pandas trims them too)
+            while row and (row[-1] is None or row[-1] == ''):
+                row.pop()
+            self.rows.append((self._row_number, row))
+            self._row = None
+        elif tag == tags['is']:
+            self._inline_depth -= 1
+        elif tag == tags['rPh']:
+            self._phonetic_depth -= 1
+        elif tag == tags['t'] and self._text is not None:
+            self._value += ''.join(self._text)
+            self._text = None
+
+
+    def close(self):
+        return None
+
+
+    def __add_cell(self):
+        cell = self._cell
+        row = self._row
+        if row is None:
+            return
+        reference = cell.get('r')
+        if reference:
+            letters = reference.rstrip(_DIGITS)
+            column_index = self._column_indexes.get(letters)
+            if column_index is None:
+                column_index = self._column_indexes[letters] = _column_index(letters)
+        else:
+            column_index = len(row)
+        if column_index > len(row):
+            row.extend([None] * (column_index - len(row)))
+        row.append(self._read_value(cell.get('t', 'n'), int(cell.get('s', 0)), self._value))
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _rich_text(element):
+    """Text of a shared or inline string (plain or rich text runs, without phonetic hints)"""
+
+    parts = []
+    for child in element:
+        tag = _local_name(child.tag)
+        if tag == 't':
+            parts.append(child.text or '')
+        elif tag == 'r':
+            for run_child in child:
+                if _local_name(run_child.tag) == 't':
+                    parts.append(run_child.text or '')
+    return ''.join(parts)
+
+
+def _column_index(reference):
+    index = 0
+    for character in reference:
+        if character.isdigit():
+            break
+        index = index * 26 + (ord(character.upper()) - 64)
+    return index - 1
+
+
+def _is_date_format(format_code):
+    if format_code is None:
+        return False
+    format_code = _FORMAT_LITERALS.sub('', format_code.split(';')[0])
+    return _DATE_TOKENS.search(format_code) is not None
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The lambda code under src/ imports its packages as top level modules
+# (the way the lambda runtime loads them), so tests need src/ on the path.
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
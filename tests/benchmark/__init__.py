@@ -0,0 +1,4 @@
+"""
+Benchmarks for the product manager service. Each module can be run from
+the repository root, e.g. `python -m tests.benchmark.bench_client_registry`.
+"""
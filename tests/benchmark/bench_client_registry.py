@@ -0,0 +1,65 @@
+"""
+Per-request overhead of setting up AWS clients on warm invocations, comparing
+fresh boto3 clients per request with clients held by the client registry.
+No AWS calls are made; only client construction is measured.
+"""
+import os
+import statistics
+import time
+
+import tests  # noqa: F401 (puts src/ on the path)
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-2')
+os.environ.setdefault('bulk_manager_table', 'BulkManager')
+
+import boto3
+from dataaccess import client_registry
+from dataaccess.product_manager_data_access import ProductManagerDataAccess
+
+ITERATIONS = 50
+
+
+def per_request_clients():
+    # mirrors what ProductManagerDataAccess.__init__ did before the registry
+    boto3.client('s3')
+    boto3.client('dynamodb')
+    boto3.resource('dynamodb').Table(os.environ['bulk_manager_table'])
+    boto3.client('sns')
+
+
+def registry_clients():
+    pm_access = ProductManagerDataAccess()
+    pm_access._s3_client
+    pm_access._dynamo_client
+    pm_access._bulk_manager_table
+    pm_access._sns_client
+
+
+def measure(fn):
+    fn()  # the cold invocation is not part of the comparison
+    timings = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'mean_ms': statistics.mean(timings),
+        'p50_ms': timings[len(timings) // 2],
+        'p95_ms': timings[int(len(timings) * 0.95) - 1]
+    }
+
+
+def main():
+    client_registry.reset()
+    results = {
+        'per request clients': measure(per_request_clients),
+        'client registry': measure(registry_clients)
+    }
+    print('{:<22}{:>12}{:>12}{:>12}'.format('setup', 'mean ms', 'p50 ms', 'p95 ms'))
+    for name, stats in results.items():
+        print('{:<22}{:>12.3f}{:>12.3f}{:>12.3f}'.format(name, stats['mean_ms'], stats['p50_ms'], stats['p95_ms']))
+
+
+if __name__ == '__main__':
+    main()
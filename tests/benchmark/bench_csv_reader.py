@@ -0,0 +1,80 @@
+"""
+FileReader.get_file_details on 50 MB CSV exports in the shapes supplier systems
+produce: comma separated utf-8, semicolon separated cp1252, tab separated utf-16
+and comma separated with quoted html descriptions (as Shopify exports them, the
+delimiter sniffing is slow on quoted text). Reports the median time and the peak memory traced while reading.
+
+    python -m tests.benchmark.bench_csv_reader [size MB]
+"""
+import statistics
+import sys
+import time
+import tracemalloc
+
+import tests  # noqa: F401 (puts src/ on the path)
+from datamodel.custom_enums import FileType
+from datamodel.custom_enums import HeaderOption
+from utility.file_reader_util import FileReader
+
+DIALECTS = {
+    'comma utf-8': {'delimiter': ',', 'encoding': 'utf-8', 'decimal': '.'},
+    'semicolon cp1252': {'delimiter': ';', 'encoding': 'cp1252', 'decimal': ','},
+    'tab utf-16': {'delimiter': '\t', 'encoding': 'utf-16', 'decimal': '.'},
+    'quoted utf-8': {'delimiter': ',', 'encoding': 'utf-8', 'decimal': '.', 'quoted': True}
+}
+COLUMNS = ['Handle', 'Title', 'Vendor', 'Type', 'Tags', 'Price', 'SKU', 'Barcode', 'Weight', 'Status']
+REPEATS = 3
+
+
+def build_csv(size_mb, delimiter, encoding, decimal, quoted=False):
+    lines = [delimiter.join(COLUMNS)]
+    size = 0
+    row = 0
+    while size < size_mb * 1024 * 1024:
+        if row % 50 == 49:
+            line = delimiter * (len(COLUMNS) - 1)
+        else:
+            price = '{}{}{}'.format(row % 500, decimal, row % 100)
+            tags = '"<p>Un café ""crème"", doux, {}</p>"'.format(row) if quoted else 'été'
+            line = delimiter.join([
+                'produit-' + str(row), 'Café crème ' + str(row), 'Fournisseur ' + str(row % 40), 'Boisson',
+                tags, price, 'SKU-' + str(row), str(4000000000000 + row), '0{}25'.format(decimal), 'ACTIVE'
+            ])
+        lines.append(line)
+        size += len(line) + 1
+        row += 1
+    return '\n'.join(lines).encode(encoding)
+
+
+def read_file(file_content):
+    reader_info = {'file': file_content, 'type': FileType.CSV, 'header': {'option': HeaderOption.DEFAULT}}
+    return FileReader(file_reader_info=reader_info).get_file_details()
+
+
+def measure(file_content):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        file_details = read_file(file_content)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    read_file(file_content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return file_details, statistics.median(timings) * 1000, peak / (1024 * 1024)
+
+
+def main(size_mb):
+    print('{:<18}{:>10}{:>10}{:>10}{:>14}{:>12}'.format('dialect', 'size MB', 'rows', 'columns', 'median ms', 'peak MB'))
+    for name, dialect in DIALECTS.items():
+        file_content = build_csv(size_mb, **dialect)
+        file_details, median_ms, peak_mb = measure(file_content)
+        print('{:<18}{:>10.1f}{:>10}{:>10}{:>14.1f}{:>12.1f}'.format(
+            name, len(file_content) / (1024 * 1024), file_details['actualRowCount'],
+            len(file_details['columnDetails']), median_ms, peak_mb
+        ))
+
+
+if __name__ == '__main__':
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 50)
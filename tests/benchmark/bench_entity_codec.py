@@ -0,0 +1,140 @@
+"""
+Decode throughput of job and job result items, comparing the hand-written
+converters data_model_utils had before the entity schemas (kept below as they
+were) with the compiled schema decoders. Items are shaped like those read by
+/jobs (projected) and /jobs/{jobId}/results.
+
+    python -m tests.benchmark.bench_entity_codec [items]
+"""
+import json
+import sys
+import time
+
+import tests  # noqa: F401 (puts src/ on the path)
+from dataaccess import data_model_utils
+from utility import utils
+
+REPEATS = 9
+
+
+def handwritten_job_details(db_job):
+    delimeter = '#'
+    job = {}
+    job['id'] = utils.extract_str(db_job['PK'], delimeter, 1)
+    job['user_id'] = utils.extract_str(db_job['SK'], delimeter, 1)
+    if 'SK1' in db_job:
+        job['start_time'] = db_job['SK1']
+    if 'SK2' in db_job:
+        job['type'] = utils.extract_str(db_job['SK2'], delimeter, 0)
+    if 'total_products' in db_job:
+        job['total_products'] = int(db_job['total_products'])
+    if 'total_success' in db_job:
+        job['total_success'] = int(db_job['total_success'])
+    if 'total_failed' in db_job:
+        job['total_failed'] = int(db_job['total_failed'])
+    if 'edit_rules' in db_job:
+        job['edit_rules'] = json.loads(db_job['edit_rules'])
+    if 'start_time' in db_job:
+        job['start_time'] = db_job['start_time']
+    if 'current_batch' in db_job:
+        job['current_batch'] = int(db_job['current_batch'])
+    if 'input_products' in db_job:
+        job['input_products'] = db_job['input_products']
+    if 'options' in db_job:
+        job['options'] = json.loads(db_job['options'])
+    if 'status' in db_job:
+        job['status'] = db_job['status']
+    if 'duration' in db_job:
+        job['duration'] = db_job['duration']
+    if 'version' in db_job:
+        job['version'] = int(db_job['version'])
+    return job
+
+
+def handwritten_job_result_details(db_result):
+    delimeter = '#'
+    job_result = {}
+    job_result['id'] = utils.extract_str(db_result['PK'], delimeter, 1)
+    job_result['job_id'] = utils.extract_str(db_result['SK'], delimeter, 1)
+    if 'status' in db_result:
+        job_result['status'] = db_result['status']
+    job_result['messages'] = []
+    if 'errors' in db_result:
+        job_result['messages'].extend(json.loads(db_result['errors']))
+    if 'warnings' in db_result:
+        job_result['messages'].extend(json.loads(db_result['warnings']))
+    if 'data' in db_result:
+        job_data = json.loads(db_result['data'])
+        if 'id' in job_data:
+            job_result['product_id'] = utils.extract_str(job_data['id'], '/', -1)
+        if 'title' in job_data:
+            job_result['product_title'] = job_data['title']
+        if 'featuredImage' in job_data:
+            if job_data['featuredImage'] is not None:
+                job_result['featured_image'] = job_data['featuredImage']['originalSrc']
+            else:
+                job_result['featured_image'] = ''
+        elif 'images' in job_data and len(job_data['images']) > 0:
+            if job_data['images'][0]['src'] is not None:
+                job_result['featured_image'] = job_data['images'][0]['src']
+            else:
+                job_result['featured_image'] = ''
+    return job_result
+
+
+def job_items(count):
+    items = []
+    for index in range(count):
+        start_time = '2021-08-01T10:00:{:02d}.000000Z'.format(index % 60)
+        items.append({
+            'PK': 'job#job-' + str(index), 'SK': 'user#60c5aa31-221d-464c-9054-ae8c56c1a413',
+            'SK1': start_time, 'SK2': 'IMPORT_CREATE#' + start_time, 'status': 'COMPLETED',
+            'total_products': 500 + index, 'total_success': 480 + index, 'total_failed': 20,
+            'current_batch': index % 10, 'options': json.dumps({'defaultStatus': 'ACTIVE'}), 'duration': '00:01:40'
+        })
+    return items
+
+
+def result_items(count):
+    items = []
+    for index in range(count):
+        items.append({
+            'PK': 'result#' + str(index), 'SK': 'job#9850c9c8-e470-4e43-bf4c-cf7ddf06149a',
+            'SK1': str(index).zfill(6), 'status': 'SUCCESS' if index % 7 else 'FAILED',
+            'errors': '[]' if index % 7 else json.dumps(['Price is not valid']), 'warnings': '[]',
+            'data': json.dumps({
+                'id': 'gid://shopify/Product/' + str(6000000000 + index), 'title': 'Product ' + str(index),
+                'featuredImage': {'originalSrc': 'https://cdn.shopify.com/s/files/product-' + str(index) + '.jpg'}
+            })
+        })
+    return items
+
+
+def measure(decoders, items):
+    """Items per second of each decoder, they take turns so both see the same load"""
+
+    timings = {name: [] for name in decoders}
+    for _ in range(REPEATS):
+        for name, decode in decoders.items():
+            start = time.perf_counter()
+            for item in items:
+                decode(item)
+            timings[name].append(time.perf_counter() - start)
+    return {name: len(items) / min(timings[name]) for name in decoders}
+
+
+def main(count):
+    cases = (
+        ('jobs', job_items(count), handwritten_job_details, data_model_utils.extract_job_details),
+        ('job results', result_items(count), handwritten_job_result_details,
+         data_model_utils.extract_job_result_details),
+    )
+    print('{:<14}{:<14}{:>16}'.format('items', 'decoder', 'items per s'))
+    for name, items, handwritten, schema in cases:
+        assert [handwritten(item) for item in items] == [schema(item) for item in items]
+        for decoder_name, rate in measure({'handwritten': handwritten, 'schema': schema}, items).items():
+            print('{:<14}{:<14}{:>16,.0f}'.format(name, decoder_name, rate))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
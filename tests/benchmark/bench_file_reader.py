@@ -0,0 +1,100 @@
+"""
+FileReader.get_file_details on synthetic sheets: a wide sheet (200 columns) and
+a tall sheet (200k rows), as CSV and xlsx. Reports the median time and the peak
+memory traced while reading. xlsx-pandas reads the xlsx sheets with the pandas
+engine instead of the streaming one.
+
+    python -m tests.benchmark.bench_file_reader [csv|xlsx|xlsx-pandas ...]
+"""
+import csv
+import io
+import statistics
+import sys
+import time
+import tracemalloc
+
+import tests  # noqa: F401 (puts src/ on the path)
+from datamodel.custom_enums import FileReaderEngine
+from datamodel.custom_enums import FileType
+from datamodel.custom_enums import HeaderOption
+from utility.file_reader_util import FileReader
+
+SHEETS = {
+    'wide': {'columns': 200, 'rows': 2000},
+    'tall': {'columns': 10, 'rows': 200000}
+}
+REPEATS = 3
+
+
+def sheet_rows(columns, rows):
+    yield ['column ' + str(column) for column in range(columns)]
+    for row in range(rows):
+        if row % 50 == 49:
+            yield [None] * columns
+            continue
+        yield [
+            row * 0.5 if column % 4 == 1 else ('' if column % 7 == 6 else 'value {} {}'.format(row, column))
+            for column in range(columns)
+        ]
+
+
+def build_csv(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in sheet_rows(columns, rows):
+        writer.writerow(['' if value is None else value for value in row])
+    return buffer.getvalue().encode()
+
+
+def build_xlsx(columns, rows):
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    for row in sheet_rows(columns, rows):
+        worksheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def read_file(file_content, file_type, engine):
+    reader_info = {
+        'file': file_content, 'type': file_type, 'header': {'option': HeaderOption.DEFAULT}, 'engine': engine
+    }
+    return FileReader(file_reader_info=reader_info).get_file_details()
+
+
+def measure(file_content, file_type, engine):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        read_file(file_content, file_type, engine)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    read_file(file_content, file_type, engine)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings) * 1000, peak / (1024 * 1024)
+
+
+def main(formats):
+    builders = {
+        'csv': (build_csv, FileType.CSV, FileReaderEngine.STREAM),
+        'xlsx': (build_xlsx, FileType.EXCEL, FileReaderEngine.STREAM),
+        'xlsx-pandas': (build_xlsx, FileType.EXCEL, FileReaderEngine.PANDAS)
+    }
+    print('{:<8}{:<14}{:>12}{:>14}{:>12}'.format('sheet', 'format', 'size MB', 'median ms', 'peak MB'))
+    for sheet_name, shape in SHEETS.items():
+        for file_format in formats:
+            build, file_type, engine = builders[file_format]
+            file_content = build(shape['columns'], shape['rows'])
+            median_ms, peak_mb = measure(file_content, file_type, engine)
+            print('{:<8}{:<14}{:>12.1f}{:>14.1f}{:>12.1f}'.format(
+                sheet_name, file_format, len(file_content) / (1024 * 1024), median_ms, peak_mb
+            ))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:] or ['csv', 'xlsx'])
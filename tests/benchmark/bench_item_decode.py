@@ -0,0 +1,80 @@
+"""
+Decode throughput of dynamodb items in the low level wire format, comparing
+the TypeDeserializer the Table resource runs on every attribute with
+dynamo_reader.decode_item. Items are shaped like job result and job items.
+
+    python -m tests.benchmark.bench_item_decode [items]
+"""
+import json
+import sys
+import time
+
+import tests  # noqa: F401 (puts src/ on the path)
+from boto3.dynamodb.types import TypeDeserializer
+from boto3.dynamodb.types import TypeSerializer
+from dataaccess.dynamo_reader import decode_item
+
+REPEATS = 5
+
+
+def result_items(count):
+    serializer = TypeSerializer()
+    items = []
+    for index in range(count):
+        item = {
+            'PK': 'result#' + str(index), 'SK': 'job#9850c9c8-e470-4e43-bf4c-cf7ddf06149a',
+            'SK1': str(index).zfill(6), 'status': 'SUCCESS' if index % 7 else 'FAILED',
+            'errors': '[]' if index % 7 else json.dumps(['Price is not valid']), 'warnings': '[]',
+            'data': json.dumps({
+                'id': 'gid://shopify/Product/' + str(6000000000 + index), 'title': 'Product ' + str(index),
+                'featuredImage': {'originalSrc': 'https://cdn.shopify.com/s/files/product-' + str(index) + '.jpg'}
+            })
+        }
+        items.append({name: serializer.serialize(value) for name, value in item.items()})
+    return items
+
+
+def job_items(count):
+    serializer = TypeSerializer()
+    items = []
+    for index in range(count):
+        start_time = '2021-08-01T10:00:{:02d}.000000Z'.format(index % 60)
+        item = {
+            'PK': 'job#job-' + str(index), 'SK': 'user#60c5aa31-221d-464c-9054-ae8c56c1a413',
+            'SK1': start_time, 'SK2': 'IMPORT_CREATE#' + start_time, 'status': 'COMPLETED',
+            'total_products': 500 + index, 'total_success': 480 + index, 'total_failed': 20,
+            'current_batch': index % 10, 'options': json.dumps({'defaultStatus': 'ACTIVE'}),
+            'tags': ['import', 'csv'], 'settings': {'notify': True, 'batchSize': 50}
+        }
+        items.append({name: serializer.serialize(value) for name, value in item.items()})
+    return items
+
+
+def resource_decode(items):
+    deserializer = TypeDeserializer()
+    return [{name: deserializer.deserialize(value) for name, value in item.items()} for item in items]
+
+
+def reader_decode(items):
+    return [decode_item(item) for item in items]
+
+
+def measure(decode, items):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        decode(items)
+        timings.append(time.perf_counter() - start)
+    return len(items) / min(timings)
+
+
+def main(count):
+    print('{:<14}{:<18}{:>16}'.format('items', 'decoder', 'items per s'))
+    for name, items in (('job results', result_items(count)), ('jobs', job_items(count))):
+        assert resource_decode(items) == reader_decode(items)
+        for decoder_name, decode in (('TypeDeserializer', resource_decode), ('decode_item', reader_decode)):
+            print('{:<14}{:<18}{:>16,.0f}'.format(name, decoder_name, measure(decode, items)))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
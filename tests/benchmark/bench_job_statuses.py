@@ -0,0 +1,71 @@
+"""
+Time to poll the status of N jobs with one /jobs/{jobId} request per job
+compared with one /jobs/status request, through app.lambda_handler against
+the local stand-ins with a delay added to every DynamoDB call.
+
+    python -m tests.benchmark.bench_job_statuses [--latency S] [--jobs 10,50,100]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import tests  # noqa: F401 (puts src/ on the path)
+
+os.environ.setdefault('bulk_manager_table', 'BulkManager')
+
+import app
+from tests import standins
+
+
+def seed_jobs(local, count):
+    job_ids = ['bench-job-' + str(index) for index in range(count)]
+    for job_id in job_ids:
+        local.table.add(
+            {
+                'PK': 'job#' + job_id, 'SK': 'user#' + standins.USER_ID, 'SK1': '2021-08-01T09:00:00.000000Z',
+                'SK2': 'IMPORT_CREATE#2021-08-01T09:00:00.000000Z', 'status': 'RUNNING', 'total_products': 100,
+                'total_success': 40, 'total_failed': 2
+            },
+            {'PK': 'job#' + job_id, 'SK': 'summary', 'total': 42, 'status#SUCCESS': 40, 'status#FAILED': 2}
+        )
+    return job_ids
+
+
+def poll_one_by_one(job_ids):
+    for job_id in job_ids:
+        event = standins.load_event('get_job_details.json', pathParameters={'jobId': job_id})
+        assert app.lambda_handler(event, None)['statusCode'] == 200
+
+
+def poll_in_a_batch(job_ids):
+    event = standins.load_event('get_job_statuses_event.json', body=json.dumps({'jobIds': job_ids}))
+    assert app.lambda_handler(event, None)['statusCode'] == 200
+
+
+def measure(local, poll, job_ids):
+    calls = len(local.table.calls)
+    start = time.perf_counter()
+    poll(job_ids)
+    return (time.perf_counter() - start) * 1000, len(local.table.calls) - calls
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Polls job statuses one by one and in a batch')
+    parser.add_argument('--latency', type=float, default=0.005, help='seconds each DynamoDB call takes')
+    parser.add_argument('--jobs', default='10,50,100', help='numbers of jobs polled')
+    options = parser.parse_args(argv)
+
+    local = standins.install(latency=options.latency)
+    standins.seed_event_fixtures(local)
+    print('{:>6}{:>22}{:>12}{:>22}{:>12}'.format('jobs', 'one by one ms', 'db calls', 'batch ms', 'db calls'))
+    for count in (int(count) for count in options.jobs.split(',') if count):
+        job_ids = seed_jobs(local, count)
+        one_by_one_ms, one_by_one_calls = measure(local, poll_one_by_one, job_ids)
+        batch_ms, batch_calls = measure(local, poll_in_a_batch, job_ids)
+        print('{:>6}{:>22.1f}{:>12}{:>22.1f}{:>12}'.format(count, one_by_one_ms, one_by_one_calls, batch_ms, batch_calls))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
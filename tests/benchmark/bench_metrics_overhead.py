@@ -0,0 +1,79 @@
+"""
+Overhead of the request metrics, per timed call and per request, with
+sampling off and on. Requests run against the local stand-ins, and the
+metric lines of sampled requests are written to a discarded stream.
+
+    python -m tests.benchmark.bench_metrics_overhead
+"""
+import io
+import os
+import statistics
+import sys
+import time
+
+import tests  # noqa: F401 (puts src/ on the path)
+
+os.environ.setdefault('bulk_manager_table', 'BulkManager')
+
+import app
+from tests import standins
+from utility import metrics
+
+CALLS = 200000
+REQUESTS = 300
+
+
+def plain():
+    return None
+
+
+@metrics.timed('bench.timed')
+def timed():
+    return None
+
+
+def with_timer():
+    with metrics.timer('bench.timer'):
+        return None
+
+
+def per_call(function):
+    start = time.perf_counter()
+    for _ in range(CALLS):
+        function()
+    return (time.perf_counter() - start) / CALLS * 1e9
+
+
+def per_request(sample_rate):
+    os.environ['metrics_sample_rate'] = str(sample_rate)
+    event = standins.load_event('get_job_details.json')
+    timings = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        app.lambda_handler(event, None)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    local = standins.install()
+    standins.seed_event_fixtures(local, result_count=20)
+    stdout, sys.stdout = sys.stdout, io.StringIO()
+    try:
+        rows = [('plain call', per_call(plain), 'ns')]
+        for sampled in (False, True):
+            metrics.start_request('bench', sample_rate=1 if sampled else 0)
+            label = ' (sampled)' if sampled else ' (off)'
+            rows.append(('timed call' + label, per_call(timed), 'ns'))
+            rows.append(('timer block' + label, per_call(with_timer), 'ns'))
+            metrics.finish_request()
+        rows.append(('job request (off)', per_request(0), 'us p50'))
+        rows.append(('job request (sampled)', per_request(1), 'us p50'))
+    finally:
+        sys.stdout = stdout
+    for name, value, unit in rows:
+        print('{:<26}{:>10,.0f} {}'.format(name, value, unit))
+
+
+if __name__ == '__main__':
+    main()
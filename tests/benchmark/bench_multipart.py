@@ -0,0 +1,78 @@
+"""
+Memory and latency of turning the base64 /upload body into form parts, comparing
+the stdlib email parser the service used before with multipart_parser, on
+1, 5 and 10 MB files. Peak memory is measured with tracemalloc.
+"""
+import base64
+import email
+import os
+import statistics
+import time
+import tracemalloc
+
+import tests  # noqa: F401 (puts src/ on the path)
+from utility import multipart_parser
+from utility.buffer_reader import BufferReader
+
+BOUNDARY = '--------------------------568728649640937823699218'
+CONTENT_TYPE = 'multipart/form-data; boundary=' + BOUNDARY
+SIZES_MB = (1, 5, 10)
+REPEATS = 5
+
+
+def build_body(size_mb):
+    file_content = os.urandom(size_mb * 1024 * 1024).replace(b'--', b'-_')
+    body = b''.join([
+        b'--', BOUNDARY.encode(), b'\r\n',
+        b'Content-Disposition: form-data; name="file"; filename="products.xlsx"\r\n',
+        b'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n',
+        file_content, b'\r\n',
+        b'--', BOUNDARY.encode(), b'\r\n',
+        b'Content-Disposition: form-data; name="header-option"\r\n\r\nDEFAULT\r\n',
+        b'--', BOUNDARY.encode(), b'--\r\n'
+    ])
+    return base64.b64encode(body).decode()
+
+
+def email_parser(request_body):
+    multi_form_data = base64.b64decode(request_body)
+    header = 'Content-Type: ' + CONTENT_TYPE + '\n'
+    form_data = email.message_from_bytes(header.encode() + multi_form_data)
+    form_content = {}
+    for part in form_data.get_payload():
+        name = part.get_param('name', header='content-disposition')
+        form_content[name] = part.get_payload(decode=name == 'file')
+    return len(form_content['file'])
+
+
+def streaming_parser(request_body):
+    multi_form_data = base64.b64decode(request_body)
+    form_content = multipart_parser.parse_form_data(multi_form_data, CONTENT_TYPE)
+    return len(BufferReader(form_content['file']['content']))
+
+
+def measure(parser, request_body):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        parser(request_body)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    parser(request_body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / (1024 * 1024)
+
+
+def main():
+    print('{:<8}{:<18}{:>14}{:>16}'.format('size', 'parser', 'median ms', 'peak MB'))
+    for size_mb in SIZES_MB:
+        request_body = build_body(size_mb)
+        for name, parser in (('email', email_parser), ('multipart_parser', streaming_parser)):
+            median_ms, peak_mb = measure(parser, request_body)
+            print('{:<8}{:<18}{:>14.1f}{:>16.1f}'.format(str(size_mb) + ' MB', name, median_ms, peak_mb))
+
+
+if __name__ == '__main__':
+    main()
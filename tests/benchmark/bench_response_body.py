@@ -0,0 +1,120 @@
+"""
+Serialization and compression of large /jobs and /jobs/{jobId}/results
+bodies: time to serialize with the standard library and orjson, time to
+compress with gzip and brotli (when installed), and the bytes sent once base64
+encoded for the api gateway. The last rows time whole job result requests
+through app.lambda_handler against the local stand-ins, sent as is and gzip
+compressed.
+
+    python -m tests.benchmark.bench_response_body
+"""
+import base64
+import os
+import statistics
+import time
+
+import tests  # noqa: F401 (puts src/ on the path)
+
+os.environ.setdefault('bulk_manager_table', 'BulkManager')
+
+import app
+from tests import standins
+from utility import response_body
+
+REPEATS = 15
+
+
+def jobs_page(count):
+    return {
+        'jobs': [{
+            'id': '9850c9c8-e470-4e43-bf4c-{:012d}'.format(index), 'user_id': standins.USER_ID,
+            'type': 'IMPORT_CREATE', 'start_time': '2021-07-22T02:21:{:02d}.000Z'.format(index % 60),
+            'status': ('COMPLETED', 'FAILED', 'RUNNING')[index % 3], 'total_products': 1000 + index,
+            'total_success': 990 + index, 'total_failed': 10, 'current_batch': index % 7,
+            'options': {'defaultStatus': 'ACTIVE', 'locationId': 'gid://shopify/Location/{}'.format(index % 4)},
+            'edit_rules': [{'field': 'price', 'operation': 'MULTIPLY', 'value': 1.2}]
+        } for index in range(count)],
+        'nextToken': 'eyJQSyI6eyJTIjoiam9iIzk4NTBjOWM4In0sIlNLIjp7IlMiOiJ1c2VyIzEifX0'
+    }
+
+
+def results_page(count):
+    return {
+        'results': [{
+            'id': str(index), 'status': 'FAILED' if index % 10 == 0 else 'SUCCESS',
+            'errors': [{'code': 'INVALID_PRICE', 'field': 'price', 'message': 'Price must be a number'}]
+            if index % 10 == 0 else [],
+            'warnings': [],
+            'data': {
+                'id': 'gid://shopify/Product/{}'.format(6000000000 + index), 'title': 'Product {}'.format(index),
+                'handle': 'product-{}'.format(index), 'vendor': 'Vendor {}'.format(index % 20),
+                'featuredImage': None, 'variants': [{'sku': 'sku-{}'.format(index), 'price': '{}.50'.format(index % 300)}]
+            }
+        } for index in range(count)],
+        'nextToken': None
+    }
+
+
+def median_ms(function, *args):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def body_rows(name, payload):
+    rows = []
+    for library in ('json', 'orjson'):
+        if library == 'orjson' and response_body.orjson is None:
+            continue
+        os.environ['json_library'] = library
+        rows.append((name, 'serialize ' + library, median_ms(response_body.dumps, payload), None))
+    data = response_body.dumps(payload).encode('utf-8')
+    rows.append((name, 'identity', None, len(data)))
+    for coding in ('gzip', 'br'):
+        if coding not in response_body.encodings():
+            continue
+        compressed = response_body.compress(data, coding)
+        rows.append((name, coding, median_ms(response_body.compress, data, coding),
+                     len(base64.b64encode(compressed))))
+    return rows
+
+
+def request_rows(result_count):
+    os.environ['response_compression_min_size'] = '1024'
+    local = standins.install()
+    standins.seed_event_fixtures(local, result_count=result_count)
+    event = standins.load_event('results-event.json', queryStringParameters={'pageSize': '1000'})
+    rows = []
+    for accept_encoding in ('identity', 'gzip'):
+        event['headers'] = dict(event['headers'], **{'Accept-Encoding': accept_encoding})
+        response = app.lambda_handler(event, None)
+        rows.append(('results request', accept_encoding, median_ms(app.lambda_handler, event, None),
+                     len(response['body'])))
+    return rows
+
+
+def main():
+    json_library = os.environ.get('json_library')
+    try:
+        rows = body_rows('jobs 100', jobs_page(100))
+        rows += body_rows('jobs 2000', jobs_page(2000))
+        rows += body_rows('results 1000', results_page(1000))
+        rows += body_rows('results 10000', results_page(10000))
+        os.environ.pop('json_library', None)
+        rows += request_rows(1000)
+    finally:
+        os.environ.pop('json_library', None)
+        if json_library is not None:
+            os.environ['json_library'] = json_library
+
+    print('{:<16}{:<20}{:>10}{:>14}'.format('body', 'step', 'ms p50', 'bytes sent'))
+    for name, step, milliseconds, size in rows:
+        milliseconds = '-' if milliseconds is None else '{:.2f}'.format(milliseconds)
+        print('{:<16}{:<20}{:>10}{:>14}'.format(name, step, milliseconds, '' if size is None else '{:,}'.format(size)))
+
+
+if __name__ == '__main__':
+    main()
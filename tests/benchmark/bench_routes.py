@@ -0,0 +1,215 @@
+"""
+Latency, peak RSS and allocations of each route, driven through
+app.lambda_handler with the events/ fixtures and with generated CSV and xlsx
+uploads of increasing size, against the local stand-ins (no AWS or Shopify
+calls). Every route runs in its own interpreter so its peak RSS is its own:
+the first request is reported as cold, then p50/p95 of the warm requests,
+the peak RSS of the process and the peak memory allocated by one traced
+request. Identical uploads are not served from the analysis cache.
+
+    python -m tests.benchmark.bench_routes [--latency S] [--shopify-latency S] [--repeats N]
+        [--sizes 100,1000,10000] [--routes substring] [--save results.json] [--compare results.json]
+
+--save writes the results with the current commit, --compare prints the
+change from results saved earlier (e.g. on the previous commit).
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import tests  # noqa: F401 (puts src/ on the path)
+from tests.benchmark.route_startup import ROUTE_EVENTS
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+COLUMNS = ['title', 'body html', 'vendor', 'price', 'sku']
+
+
+def product_rows(rows):
+    for row in range(rows):
+        yield ['product {}'.format(row), '<p>product {}</p>'.format(row), 'vendor {}'.format(row % 20),
+               row % 300 + 0.5, 'sku-{}'.format(row)]
+
+
+def build_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    writer.writerows(product_rows(rows))
+    return buffer.getvalue().encode()
+
+
+def build_xlsx(rows):
+    import openpyxl
+
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(COLUMNS)
+    for row in product_rows(rows):
+        worksheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def route_cases(sizes):
+    """Returns the names of the cases to run: every fixture route and the generated uploads"""
+
+    cases = [method + ' ' + path for path, method in ROUTE_EVENTS]
+    for file_type in ('csv', 'xlsx'):
+        cases.extend('POST /upload {} {}'.format(file_type, rows) for rows in sizes)
+    return cases
+
+
+def build_event(case):
+    from tests import standins
+
+    method, path = case.split(' ')[:2]
+    generated = case.split(' ')[2:]
+    if not generated:
+        return standins.load_event(ROUTE_EVENTS[(path, method)], resource=path, httpMethod=method)
+    file_type, rows = generated[0], int(generated[1])
+    if file_type == 'csv':
+        return standins.upload_event('products.csv', 'text/csv', build_csv(rows))
+    return standins.upload_event('products.xlsx', XLSX_CONTENT_TYPE, build_xlsx(rows))
+
+
+def percentile(timings, percent):
+    """Nearest rank percentile"""
+
+    ordered = sorted(timings)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on macos
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def run_case(case, latency, shopify_latency, repeats):
+    """Runs one case in the current interpreter and returns its measurements"""
+
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-2')
+    os.environ.setdefault('bulk_manager_table', 'BulkManager')
+    os.environ.setdefault('s3_file_upload_bucket', 'local-upload-bucket')
+    os.environ.setdefault('shopify_api_version', '2021-07')
+    os.environ.setdefault('import_topic_arn', 'arn:aws:sns:us-east-2:000000000000:local')
+    os.environ['file_analysis_cache_ttl'] = '0'
+
+    from tests import standins
+    local = standins.install(latency=latency, shopify_latency=shopify_latency)
+    standins.seed_event_fixtures(local, result_count=100)
+    event = build_event(case)
+
+    import app
+
+    def request():
+        start = time.perf_counter()
+        response = app.lambda_handler(event, None)
+        return time.perf_counter() - start, int(response['statusCode'])
+
+    cold, status = request()
+    timings = [request()[0] for _ in range(repeats)]
+    tracemalloc.start()
+    request()
+    _, peak_allocated = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'status': status,
+        'cold_ms': cold * 1000,
+        'p50_ms': percentile(timings, 50) * 1000,
+        'p95_ms': percentile(timings, 95) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+        'peak_alloc_kb': peak_allocated / 1024
+    }
+
+
+def run_case_process(case, options):
+    process = subprocess.run(
+        [sys.executable, '-m', 'tests.benchmark.bench_routes', '--case', case, '--latency', str(options.latency),
+         '--shopify-latency', str(options.shopify_latency), '--repeats', str(options.repeats)],
+        cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    if process.returncode != 0:
+        raise RuntimeError('{} failed:\n{}'.format(case, process.stderr[-2000:]))
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def change(value, previous):
+    if value is None or not previous:
+        return ''
+    return '{:+.0%}'.format(value / previous - 1)
+
+
+def main(options):
+    sizes = [int(size) for size in options.sizes.split(',') if size]
+    cases = [case for case in route_cases(sizes) if options.routes is None or options.routes in case]
+    previous = {}
+    if options.compare:
+        with open(options.compare) as compare_file:
+            previous = json.load(compare_file)['results']
+
+    columns = ('cold_ms', 'p50_ms', 'p95_ms', 'peak_rss_mb', 'peak_alloc_kb')
+    print('{:<36}{:>7}'.format('route', 'status') + ''.join('{:>15}'.format(column) for column in columns))
+    results = {}
+    for case in cases:
+        result = results[case] = run_case_process(case, options)
+        line = '{:<36}{:>7}'.format(case, result['status'])
+        for column in columns:
+            value = result[column]
+            cell = '-' if value is None else '{:.1f}'.format(value)
+            if case in previous:
+                cell += ' ' + change(value, previous[case].get(column))
+            line += '{:>15}'.format(cell)
+        print(line)
+
+    if options.save:
+        with open(options.save, 'w') as save_file:
+            json.dump({
+                'commit': current_commit(),
+                'options': {'latency': options.latency, 'shopify_latency': options.shopify_latency,
+                            'repeats': options.repeats},
+                'results': results
+            }, save_file, indent=2)
+
+
+def parse_options(argv):
+    parser = argparse.ArgumentParser(description='Benchmarks every route against the local stand-ins')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds each DynamoDB, S3 and SNS call takes')
+    parser.add_argument('--shopify-latency', type=float, default=0.0, help='seconds each Shopify call takes')
+    parser.add_argument('--repeats', type=int, default=20, help='warm requests per route')
+    parser.add_argument('--sizes', default='100,1000,10000', help='rows of the generated uploads')
+    parser.add_argument('--routes', help='only runs the routes whose name contains this')
+    parser.add_argument('--save', help='file to save the results to')
+    parser.add_argument('--compare', help='results saved earlier to compare with')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    options = parse_options(sys.argv[1:])
+    if options.case:
+        print(json.dumps(run_case(options.case, options.latency, options.shopify_latency, options.repeats)))
+    else:
+        main(options)
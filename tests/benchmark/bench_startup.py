@@ -0,0 +1,44 @@
+"""
+Cold start import cost per route. Every route runs in a fresh interpreter with
+`python -X importtime`; the report shows the total import time and the modules
+with the largest cumulative import time.
+"""
+import os
+import subprocess
+import sys
+
+import tests  # noqa: F401 (puts src/ on the path)
+from tests.benchmark.route_startup import ROUTE_EVENTS
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TOP_MODULES = 5
+
+
+def import_times(path, method):
+    """Returns [(module, self_us, cumulative_us)] for one route run in a new interpreter"""
+
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-m', 'tests.benchmark.route_startup', path, method],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    timings = []
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        timings.append((module.strip(), int(self_us), int(cumulative_us)))
+    return timings
+
+
+def main():
+    for path, method in ROUTE_EVENTS:
+        timings = import_times(path, method)
+        total_ms = sum(self_us for _, self_us, _ in timings) / 1000
+        print('{} {}: {} modules, {:.1f} ms'.format(method, path, len(timings), total_ms))
+        top = sorted(timings, key=lambda timing: timing[2], reverse=True)[:TOP_MODULES]
+        for module, _, cumulative_us in top:
+            print('    {:<45}{:>10.1f} ms'.format(module, cumulative_us / 1000))
+
+
+if __name__ == '__main__':
+    main()
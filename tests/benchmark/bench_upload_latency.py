@@ -0,0 +1,77 @@
+"""
+/upload latency against local stand-ins with injected delays (DynamoDB and S3
+calls sleep for AWS_LATENCY, the Shopify locations call for SHOPIFY_LATENCY).
+Compares the task graph run serially (every call one after another, as the
+upload path used to run) with the shared thread pool. The analysis and
+locations caches are kept cold so every upload does all of its calls.
+
+    python -m tests.benchmark.bench_upload_latency [rows]
+"""
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import Future
+
+import tests  # noqa: F401 (puts src/ on the path)
+import app
+from service import product_manager_service
+from tests import standins
+from utility import task_graph
+
+AWS_LATENCY = 0.03
+SHOPIFY_LATENCY = 0.4
+REPEATS = 5
+
+
+class SerialExecutor:
+    """Runs every submitted task right away on the calling thread"""
+
+    def submit(self, function, *args):
+        future = Future()
+        try:
+            future.set_result(function(*args))
+        except BaseException as error:
+            future.set_exception(error)
+        return future
+
+
+def upload_event(rows):
+    lines = ['title,body html,vendor,price,sku'] + [
+        'product {0},<p>product {0}</p>,vendor {1},{2}.5,sku-{0}'.format(row, row % 20, row % 300) for row in range(rows)
+    ]
+    return standins.upload_event('products.csv', 'text/csv', '\r\n'.join(lines).encode())
+
+
+def measure(event):
+    timings = []
+    for _ in range(REPEATS):
+        product_manager_service._locations_cache.clear()
+        local = standins.install(latency=AWS_LATENCY, shopify_latency=SHOPIFY_LATENCY)
+        standins.seed_event_fixtures(local)
+        start = time.perf_counter()
+        response = app.lambda_handler(event, None)
+        timings.append(time.perf_counter() - start)
+        assert response['statusCode'] == 200, response
+    return statistics.median(timings) * 1000
+
+
+def main(rows):
+    os.environ.setdefault('bulk_manager_table', 'BulkManager')
+    os.environ.setdefault('s3_file_upload_bucket', 'local-upload-bucket')
+    os.environ.setdefault('shopify_api_version', '2021-07')
+    os.environ['file_analysis_cache_ttl'] = '0'
+    event = upload_event(rows)
+
+    #one warm up upload so imports are not timed
+    measure(event)
+    print('{:<10}{:>8}{:>14}'.format('executor', 'rows', 'median ms'))
+    shared_executor = task_graph.get_executor()
+    for name, executor in (('serial', SerialExecutor()), ('threads', shared_executor)):
+        task_graph._executor = executor
+        print('{:<10}{:>8}{:>14.1f}'.format(name, rows, measure(event)))
+    task_graph._executor = shared_executor
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,48 @@
+"""
+Runs one route of the lambda against local stand-ins in the current interpreter
+and prints the response status and which heavy modules ended up imported.
+Meant to be started in a fresh interpreter, optionally with -X importtime:
+
+    python -X importtime -m tests.benchmark.route_startup /jobs POST
+"""
+import json
+import os
+import sys
+
+import tests  # noqa: F401 (puts src/ on the path)
+
+HEAVY_MODULES = ('pandas', 'numpy', 'openpyxl', 'requests')
+
+ROUTE_EVENTS = {
+    ('/upload', 'POST'): 'upload-event.json',
+    ('/run', 'POST'): 'import-event.json',
+    ('/users', 'POST'): 'get_user_event.json',
+    ('/jobs', 'POST'): 'get_jobs_event.json',
+    ('/jobs/status', 'POST'): 'get_job_statuses_event.json',
+    ('/jobs/{jobId}', 'GET'): 'get_job_details.json',
+    ('/jobs/{jobId}/results', 'GET'): 'results-event.json'
+}
+
+
+def run_route(path, method):
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-2')
+    os.environ.setdefault('bulk_manager_table', 'BulkManager')
+    os.environ.setdefault('s3_file_upload_bucket', 'local-upload-bucket')
+    os.environ.setdefault('shopify_api_version', '2021-07')
+    os.environ.setdefault('import_topic_arn', 'arn:aws:sns:us-east-2:000000000000:local')
+
+    from tests import standins
+    local = standins.install()
+    standins.seed_event_fixtures(local)
+
+    import app
+    event = standins.load_event(ROUTE_EVENTS[(path, method)], resource=path, httpMethod=method)
+    response = app.lambda_handler(event, None)
+    return {
+        'statusCode': int(response['statusCode']),
+        'modules': [name for name in HEAVY_MODULES if name in sys.modules]
+    }
+
+
+if __name__ == '__main__':
+    print(json.dumps(run_route(sys.argv[1], sys.argv[2])))
@@ -0,0 +1,597 @@
+"""
+In-process stand-ins for the AWS and Shopify clients used by the data access
+layer. install() registers them in the client registry so the service can be
+driven end to end without network access.
+"""
+import base64
+import gzip
+import io
+import json
+import os
+import re
+import time
+
+from boto3.dynamodb.conditions import Size
+from boto3.dynamodb.types import TypeDeserializer
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+
+from dataaccess import client_registry
+
+_type_serializer = TypeSerializer()
+_type_deserializer = TypeDeserializer()
+
+EVENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'events')
+
+# ids used by the request fixtures in events/
+USER_ID = '60c5aa31-221d-464c-9054-ae8c56c1a413'
+FILE_ID = 'c2e12022-b843-42ac-8192-cc33febf3960'
+JOB_ID = '9850c9c8-e470-4e43-bf4c-cf7ddf06149a'
+# multipart boundary of the content-type header in upload-event.json
+UPLOAD_BOUNDARY = '--------------------------568728649640937823699218'
+
+# GSI1 is keyed on (SK, SK1) and GSI2 on (SK, SK2) in the BulkManager table
+INDEX_KEYS = {
+    None: ('PK', 'SK'),
+    'GSI1': ('SK', 'SK1'),
+    'GSI2': ('SK', 'SK2')
+}
+
+
+class LocalTable:
+    """Dictionary backed stand-in for a dynamodb Table resource"""
+
+    def __init__(self, latency=0.0):
+        self.items = {}
+        self.latency = latency
+        self.calls = []
+        self.queries = []
+
+    def add(self, *items):
+        for item in items:
+            self.items[(item['PK'], item['SK'])] = dict(item)
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None, **kwargs):
+        self._record('get_item')
+        item = self.items.get((Key['PK'], Key['SK']))
+        if item is None:
+            return {}
+        return {'Item': _project(item, ProjectionExpression, ExpressionAttributeNames)}
+
+    def put_item(self, Item, ConditionExpression=None, **kwargs):
+        self._record('put_item')
+        current = self.items.get((Item['PK'], Item['SK']), {})
+        if ConditionExpression is not None and not _evaluate(ConditionExpression, current):
+            raise _conditional_check_failed('PutItem')
+        self.add(Item)
+        return {}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeValues=None, ExpressionAttributeNames=None,
+                    ConditionExpression=None, **kwargs):
+        """Supports SET (with if_not_exists, list_append and +) and ADD of numbers"""
+
+        self._record('update_item')
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        current = self.items.get((Key['PK'], Key['SK']), {})
+        if ConditionExpression is not None and not _evaluate(ConditionExpression, current):
+            raise _conditional_check_failed('UpdateItem')
+
+        item = self.items.setdefault((Key['PK'], Key['SK']), dict(Key))
+        for action, clauses in re.findall(r'(SET|ADD)\s+(.*?)(?=\s+(?:SET|ADD)\s|$)', UpdateExpression.strip()):
+            for clause in _split_top_level(clauses, ','):
+                if action == 'SET':
+                    name, value = clause.split('=', 1)
+                    item[names.get(name.strip(), name.strip())] = _update_value(value, item, names, values)
+                else:
+                    name, placeholder = clause.split()
+                    name = names.get(name, name)
+                    item[name] = item.get(name, 0) + values[placeholder]
+        return {'Attributes': dict(item)}
+
+    def query(self, KeyConditionExpression, IndexName=None, ScanIndexForward=True,
+              Limit=None, ExclusiveStartKey=None, FilterExpression=None, ProjectionExpression=None,
+              ExpressionAttributeNames=None, **kwargs):
+        self._record('query')
+        hash_key, range_key = INDEX_KEYS[IndexName]
+        matches = [item for item in self.items.values()
+                   if hash_key in item and range_key in item and _evaluate(KeyConditionExpression, item)]
+        matches.sort(key=lambda item: (item[range_key], item['PK'], item['SK']), reverse=not ScanIndexForward)
+
+        start = 0
+        if ExclusiveStartKey is not None:
+            #like dynamodb, continue after the position of the key even if its item is gone
+            start_key = (ExclusiveStartKey[range_key], ExclusiveStartKey['PK'], ExclusiveStartKey['SK'])
+            positions = [(item[range_key], item['PK'], item['SK']) for item in matches]
+            start = len([position for position in positions
+                         if (position <= start_key if ScanIndexForward else position >= start_key)])
+
+        page = matches[start:] if Limit is None else matches[start:start + Limit]
+        #like dynamodb, the filter is applied to the items read within the limit
+        items = [dict(item) for item in page if FilterExpression is None or _evaluate(FilterExpression, item)]
+        items = [_project(item, ProjectionExpression, ExpressionAttributeNames) for item in items]
+        response = {'Items': items, 'Count': len(items), 'ScannedCount': len(page)}
+        self.queries.append({'IndexName': IndexName, 'ScannedCount': len(page)})
+        if Limit is not None and start + Limit < len(matches):
+            last = page[-1]
+            response['LastEvaluatedKey'] = {key: last[key] for key in {'PK', 'SK', hash_key, range_key}}
+        return response
+
+    def _record(self, operation):
+        self.calls.append(operation)
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class LocalDynamoClient:
+    """Stand-in for the low level dynamodb client"""
+
+    def __init__(self, table, latency=0.0):
+        self.table = table
+        self.latency = latency
+        self.transactions = []
+        #keys served per batch_get_item call, the others come back unprocessed (None serves them all)
+        self.batch_get_limit = None
+        self.batch_gets = []
+
+    def transact_write_items(self, TransactItems, **kwargs):
+        """Applies the puts and updates of a transaction, the conditions are only checked for puts"""
+
+        if self.latency:
+            time.sleep(self.latency)
+        self.transactions.append(TransactItems)
+        for transact_item in TransactItems:
+            if 'Put' in transact_item:
+                put = transact_item['Put']
+                condition = put.get('ConditionExpression')
+                if condition is not None:
+                    names = put.get('ExpressionAttributeNames') or {}
+                    condition = _parse_condition(condition, names, _deserialize(put.get('ExpressionAttributeValues') or {}))
+                self.table.put_item(Item=_deserialize(put['Item']), ConditionExpression=condition)
+            elif 'Update' in transact_item:
+                update = transact_item['Update']
+                self.table.update_item(
+                    Key=_deserialize(update['Key']),
+                    UpdateExpression=update['UpdateExpression'],
+                    ExpressionAttributeNames=update.get('ExpressionAttributeNames'),
+                    ExpressionAttributeValues=_deserialize(update.get('ExpressionAttributeValues') or {})
+                )
+        return {}
+
+    def get_item(self, TableName, Key, **kwargs):
+        response = self.table.get_item(Key=_deserialize(Key), **kwargs)
+        if 'Item' in response:
+            response['Item'] = _serialize(response['Item'])
+        return response
+
+    def batch_get_item(self, RequestItems, **kwargs):
+        self.table._record('batch_get_item')
+        responses, unprocessed = {}, {}
+        for table_name, request in RequestItems.items():
+            if len(request['Keys']) > 100:
+                error = {'Error': {'Code': 'ValidationException', 'Message': 'Too many items requested for the BatchGetItem call'}}
+                raise ClientError(error, 'BatchGetItem')
+            keys = request['Keys'][:self.batch_get_limit] if self.batch_get_limit is not None else request['Keys']
+            self.batch_gets.append(len(keys))
+            items = [self.table.items.get((key['PK'], key['SK'])) for key in map(_deserialize, keys)]
+            responses[table_name] = [
+                _serialize(_project(item, request.get('ProjectionExpression'), request.get('ExpressionAttributeNames')))
+                for item in items if item is not None
+            ]
+            if len(keys) < len(request['Keys']):
+                unprocessed[table_name] = dict(request, Keys=request['Keys'][len(keys):])
+        return {'Responses': responses, 'UnprocessedKeys': unprocessed}
+
+    def query(self, TableName, KeyConditionExpression, ExpressionAttributeValues, ExpressionAttributeNames=None,
+              FilterExpression=None, ExclusiveStartKey=None, **kwargs):
+        names = ExpressionAttributeNames or {}
+        values = _deserialize(ExpressionAttributeValues)
+        response = self.table.query(
+            KeyConditionExpression=_parse_condition(KeyConditionExpression, names, values),
+            FilterExpression=_parse_condition(FilterExpression, names, values) if FilterExpression else None,
+            ExclusiveStartKey=_deserialize(ExclusiveStartKey) if ExclusiveStartKey else None,
+            ExpressionAttributeNames=names,
+            **kwargs
+        )
+        response['Items'] = [_serialize(item) for item in response['Items']]
+        if 'LastEvaluatedKey' in response:
+            response['LastEvaluatedKey'] = _serialize(response['LastEvaluatedKey'])
+        return response
+
+
+class LocalS3Client:
+    """Stand-in for the s3 client"""
+
+    def __init__(self, latency=0.0):
+        self.objects = {}
+        self.metadata = {}
+        self.latency = latency
+
+    def put_object(self, Bucket, Key, Body, Metadata=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.objects[(Bucket, Key)] = bytes(Body.read() if hasattr(Body, 'read') else Body)
+        self.metadata[(Bucket, Key)] = dict(Metadata or {})
+        return {}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({'Error': {'Code': 'NoSuchKey', 'Message': 'The specified key does not exist.'}}, 'GetObject')
+        return {'Body': io.BytesIO(self.objects[(Bucket, Key)]), 'Metadata': self.metadata.get((Bucket, Key), {})}
+
+    def head_object(self, Bucket, Key, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({'Error': {'Code': '404', 'Message': 'Not Found'}}, 'HeadObject')
+        return {'ContentLength': len(self.objects[(Bucket, Key)]), 'Metadata': self.metadata.get((Bucket, Key), {})}
+
+    def delete_object(self, Bucket, Key, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.objects.pop((Bucket, Key), None)
+        self.metadata.pop((Bucket, Key), None)
+        return {}
+
+    def generate_presigned_url(self, ClientMethod, Params=None, ExpiresIn=3600, **kwargs):
+        return 'https://' + Params['Bucket'] + '.s3.amazonaws.com/' + Params['Key'] + '?X-Amz-Expires=' + str(ExpiresIn)
+
+    def generate_presigned_post(self, Bucket, Key, Conditions=None, ExpiresIn=3600, **kwargs):
+        return {
+            'url': 'https://' + Bucket + '.s3.amazonaws.com/',
+            'fields': {'key': Key, 'policy': 'local-policy', 'x-amz-signature': 'local-signature'}
+        }
+
+
+class LocalSnsClient:
+    """Stand-in for the sns client"""
+
+    def __init__(self, latency=0.0):
+        self.messages = []
+        self.latency = latency
+
+    def publish(self, TopicArn, Message, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.messages.append((TopicArn, json.loads(Message)))
+        return {'MessageId': str(len(self.messages))}
+
+
+class LocalShopifyResponse:
+
+    def __init__(self, status_code, body, headers=None):
+        self.status_code = status_code
+        self._body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return self._body
+
+
+class LocalShopifySession:
+    """Stand-in for the http session used for Shopify graphql calls"""
+
+    def __init__(self, locations=None, latency=0.0):
+        self.locations = locations if locations is not None else [
+            {'id': 'gid://shopify/Location/1', 'name': 'Main Warehouse'}
+        ]
+        self.latency = latency
+        self.requests = []
+        self.timeouts = []
+        # responses (or exceptions) returned before the locations response, in order
+        self.responses = []
+
+    def post(self, url, json=None, headers=None, timeout=None, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        self.requests.append(url)
+        self.timeouts.append(timeout)
+        if self.responses:
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        edges = [{'node': location} for location in self.locations]
+        return LocalShopifyResponse(200, {'data': {'locations': {'edges': edges}}})
+
+
+class LocalAWS:
+    """Holds one stand-in per client so tests can seed and inspect them"""
+
+    def __init__(self, latency=0.0, shopify_latency=0.0):
+        self.table = LocalTable(latency)
+        self.dynamo_client = LocalDynamoClient(self.table, latency)
+        self.s3 = LocalS3Client(latency)
+        self.sns = LocalSnsClient(latency)
+        self.shopify = LocalShopifySession(latency=shopify_latency)
+
+
+def install(table_name='BulkManager', latency=0.0, shopify_latency=0.0):
+    """Registers a fresh set of stand-ins in the client registry and returns them"""
+
+    local = LocalAWS(latency, shopify_latency)
+    client_registry.reset()
+    client_registry.register('table', table_name, local.table)
+    client_registry.register('client', 'dynamodb', local.dynamo_client)
+    client_registry.register('client', 's3', local.s3)
+    client_registry.register('client', 'sns', local.sns)
+    client_registry.register('http', 'session', local.shopify)
+    return local
+
+
+def load_event(name, **overrides):
+    """Loads an api gateway event from events/ and applies top level overrides"""
+
+    with open(os.path.join(EVENTS_DIR, name)) as event_file:
+        event = json.load(event_file)
+    event.update(overrides)
+    return event
+
+
+def upload_event(file_name, content_type, content, header_option='DEFAULT'):
+    """Returns an /upload event posting a file as multipart form data, like upload-event.json"""
+
+    body = b''.join([
+        b'--', UPLOAD_BOUNDARY.encode(), b'\r\n',
+        'Content-Disposition: form-data; name="file"; filename="{}"\r\n'.format(file_name).encode(),
+        'Content-Type: {}\r\n\r\n'.format(content_type).encode(),
+        content, b'\r\n',
+        b'--', UPLOAD_BOUNDARY.encode(), b'\r\n',
+        b'Content-Disposition: form-data; name="header-option"\r\n\r\n', header_option.encode(), b'\r\n',
+        b'--', UPLOAD_BOUNDARY.encode(), b'--\r\n'
+    ])
+    return load_event('upload-event.json', body=base64.b64encode(body).decode())
+
+
+def seed_event_fixtures(local, result_count=2):
+    """Adds the user, file, job and job results referenced by the events/ fixtures"""
+
+    local.table.add(
+        {
+            'PK': 'user#' + USER_ID, 'SK': 'user', 'SK1': 'domain#test-shop.myshopify.com',
+            'SK2': 'subscribtion#BASIC', 'access_token': 'shpat_local', 'active': True,
+            'owner': 'Local Owner', 'email': 'owner@example.com', 'shop_name': 'Test Shop',
+            'time_zone': 'UTC', 'reviewed': False, 'job_count': 1, 'active_job_count': 0
+        },
+        {
+            'PK': 'file#' + FILE_ID, 'SK': 'file', 'SK1': 'idle#false', 'file_name': 'products.csv',
+            'file_type': 'CSV', 's3_key': FILE_ID + '_products.csv', 'actual_row_count': 8, 'header_row': 0
+        },
+        {
+            'PK': 'job#' + JOB_ID, 'SK': 'user#' + USER_ID, 'SK1': '2021-07-22T02:21:08.000Z',
+            'SK2': 'IMPORT_CREATE#2021-07-22T02:21:08.000Z', 'status': 'COMPLETED',
+            'total_products': result_count, 'total_success': result_count, 'total_failed': 0,
+            'options': json.dumps({'defaultStatus': 'ACTIVE'})
+        }
+    )
+    for index in range(result_count):
+        local.table.add({
+            'PK': 'result#' + str(index), 'SK': 'job#' + JOB_ID, 'SK1': str(index).zfill(6),
+            'status': 'SUCCESS', 'errors': '[]', 'warnings': '[]',
+            'data': json.dumps({
+                'id': 'gid://shopify/Product/' + str(index), 'title': 'Product ' + str(index),
+                'featuredImage': None
+            })
+        })
+
+
+def _evaluate(condition, item):
+    #conditions parsed from the expressions sent to the low level client
+    if callable(condition):
+        return condition(item)
+    expression = condition.get_expression()
+    operator = expression['operator']
+    values = expression['values']
+    if operator == 'AND':
+        return _evaluate(values[0], item) and _evaluate(values[1], item)
+    if operator == 'OR':
+        return _evaluate(values[0], item) or _evaluate(values[1], item)
+    if operator == 'NOT':
+        return not _evaluate(values[0], item)
+
+    if operator == 'size':
+        name = values[0].name
+        return len(item[name]) if name in item else None
+
+    name = values[0].name if not isinstance(values[0], Size) else values[0].get_expression()['values'][0].name
+    if operator == 'attribute_exists':
+        return name in item
+    if operator == 'attribute_not_exists':
+        return name not in item
+    if name not in item:
+        return False
+    value = item[name] if not isinstance(values[0], Size) else _evaluate(values[0], item)
+    if operator == '=':
+        return value == values[1]
+    if operator == '<>':
+        return value != values[1]
+    if operator == '<':
+        return value < values[1]
+    if operator == '<=':
+        return value <= values[1]
+    if operator == '>':
+        return value > values[1]
+    if operator == '>=':
+        return value >= values[1]
+    if operator == 'BETWEEN':
+        return values[1] <= value <= values[2]
+    if operator == 'begins_with':
+        return str(value).startswith(values[1])
+    if operator == 'IN':
+        return value in values[1]
+    raise NotImplementedError('Condition operator not supported by LocalTable: ' + operator)
+
+
+def _project(item, projection_expression, attribute_names):
+    if projection_expression is None:
+        return dict(item)
+    names = [name.strip() for name in projection_expression.split(',')]
+    names = [(attribute_names or {}).get(name, name) for name in names]
+    return {name: item[name] for name in names if name in item}
+
+
+def _split_top_level(expression, separator):
+    parts, depth, start = [], 0, 0
+    for index, character in enumerate(expression):
+        depth += {'(': 1, ')': -1}.get(character, 0)
+        if character == separator and depth == 0:
+            parts.append(expression[start:index].strip())
+            start = index + 1
+    parts.append(expression[start:].strip())
+    return parts
+
+
+def _update_value(expression, item, names, values):
+    expression = expression.strip()
+    operands = _split_top_level(expression, '+')
+    if len(operands) > 1:
+        return sum(_update_value(operand, item, names, values) for operand in operands)
+    function = re.match(r'(if_not_exists|list_append)\((.*)\)$', expression)
+    if function is not None:
+        first, second = _split_top_level(function.group(2), ',')
+        if function.group(1) == 'if_not_exists':
+            name = names.get(first, first)
+            return item[name] if name in item else _update_value(second, item, names, values)
+        return _update_value(first, item, names, values) + _update_value(second, item, names, values)
+    if expression.startswith(':'):
+        return values[expression]
+    return item[names.get(expression, expression)]
+
+
+def _conditional_check_failed(operation):
+    error = {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'The conditional request failed'}}
+    return ClientError(error, operation)
+
+
+def _serialize(item):
+    return {name: _type_serializer.serialize(value) for name, value in item.items()}
+
+
+def _deserialize(item):
+    return {name: _type_deserializer.deserialize(value) for name, value in item.items()}
+
+
+_TOKEN = re.compile(r'\s*(<>|<=|>=|=|<|>|\(|\)|,|[#:]?[A-Za-z_][\w.]*)')
+_COMPARISONS = {
+    '=': lambda left, right: left == right,
+    '<>': lambda left, right: left != right,
+    '<': lambda left, right: left < right,
+    '<=': lambda left, right: left <= right,
+    '>': lambda left, right: left > right,
+    '>=': lambda left, right: left >= right
+}
+_MISSING = object()
+
+
+def _parse_condition(expression, names, values):
+    """Parses a dynamodb condition expression into a function of an item"""
+
+    tokens = _TOKEN.findall(expression)
+    position = [0]
+
+    def peek():
+        return tokens[position[0]] if position[0] < len(tokens) else None
+
+    def take(expected=None):
+        token = tokens[position[0]]
+        if expected is not None and token.upper() != expected:
+            raise ValueError('Expected ' + expected + ' in condition: ' + expression)
+        position[0] += 1
+        return token
+
+    def operand():
+        token = take()
+        if token.startswith(':'):
+            value = values[token]
+            return lambda item: value
+        if token.lower() == 'size':
+            take('(')
+            name = names.get(take(), None)
+            take(')')
+            return lambda item: len(item[name]) if name in item else _MISSING
+        name = names.get(token, token)
+        return lambda item: item.get(name, _MISSING)
+
+    def primary():
+        token = peek()
+        if token == '(':
+            take('(')
+            condition = disjunction()
+            take(')')
+            return condition
+        if token.upper() == 'NOT':
+            take()
+            condition = primary()
+            return lambda item: not condition(item)
+        function = token.lower()
+        if function in ('attribute_exists', 'attribute_not_exists', 'begins_with', 'contains'):
+            take()
+            take('(')
+            first = operand()
+            second = None
+            if peek() == ',':
+                take(',')
+                second = operand()
+            take(')')
+            if function == 'attribute_exists':
+                return lambda item: first(item) is not _MISSING
+            if function == 'attribute_not_exists':
+                return lambda item: first(item) is _MISSING
+            if function == 'begins_with':
+                return lambda item: first(item) is not _MISSING and str(first(item)).startswith(second(item))
+            return lambda item: first(item) is not _MISSING and second(item) in first(item)
+
+        left = operand()
+        comparison = take().upper()
+        if comparison == 'BETWEEN':
+            low = operand()
+            take('AND')
+            high = operand()
+            return lambda item: left(item) is not _MISSING and low(item) <= left(item) <= high(item)
+        if comparison == 'IN':
+            take('(')
+            options = [operand()]
+            while peek() == ',':
+                take(',')
+                options.append(operand())
+            take(')')
+            return lambda item: left(item) is not _MISSING and any(left(item) == option(item) for option in options)
+        right = operand()
+        compare = _COMPARISONS[comparison]
+        return lambda item: left(item) is not _MISSING and right(item) is not _MISSING and compare(left(item), right(item))
+
+    def conjunction():
+        conditions = [primary()]
+        while peek() is not None and peek().upper() == 'AND':
+            take()
+            conditions.append(primary())
+        return lambda item: all(condition(item) for condition in conditions)
+
+    def disjunction():
+        conditions = [conjunction()]
+        while peek() is not None and peek().upper() == 'OR':
+            take()
+            conditions.append(conjunction())
+        return lambda item: any(condition(item) for condition in conditions)
+
+    condition = disjunction()
+    if peek() is not None:
+        raise ValueError('Unexpected ' + peek() + ' in condition: ' + expression)
+    return condition
+
+
+def response_json(response):
+    """Returns the json body of a lambda proxy response, decompressing it when it was compressed"""
+
+    body = response['body']
+    if response.get('isBase64Encoded'):
+        body = base64.b64decode(body)
+        coding = response['headers'].get('Content-Encoding')
+        if coding == 'gzip':
+            body = gzip.decompress(body)
+        elif coding == 'br':
+            import brotli
+            body = brotli.decompress(body)
+    return json.loads(body)
@@ -0,0 +1,29 @@
+import pytest
+
+from service import product_manager_service
+from tests import standins
+
+
+@pytest.fixture()
+def result_count():
+    """Job results local seeds, modules needing more override it"""
+
+    return 2
+
+
+@pytest.fixture()
+def local(monkeypatch, result_count):
+    """
+    Registers fresh stand-ins seeded with what the events/ fixtures reference. The
+    locations cached by the service outlive a test, so they are cleared around it.
+    """
+
+    monkeypatch.setenv('bulk_manager_table', 'BulkManager')
+    monkeypatch.setenv('s3_file_upload_bucket', 'local-upload-bucket')
+    monkeypatch.setenv('shopify_api_version', '2021-07')
+    monkeypatch.setenv('import_topic_arn', 'arn:aws:sns:us-east-2:000000000000:local')
+    product_manager_service._locations_cache.clear()
+    local = standins.install()
+    standins.seed_event_fixtures(local, result_count)
+    yield local
+    product_manager_service._locations_cache.clear()
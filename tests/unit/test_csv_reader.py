@@ -0,0 +1,94 @@
+import pytest
+
+from datamodel.custom_enums import FileType
+from datamodel.custom_enums import HeaderOption
+from utility import csv_sniffer
+from utility.file_reader_util import FileReader
+
+ROWS = ['title;body;price'] + ['Café {};déjà vu;{},5'.format(i, i) for i in range(30)]
+
+
+def file_details(content, option=HeaderOption.DEFAULT, value=None):
+    return FileReader(file_reader_info={
+        'file': content,
+        'type': FileType.CSV,
+        'header': {'option': option, 'value': value}
+    }).get_file_details()
+
+
+@pytest.mark.parametrize('delimiter', [',', ';', '\t', '|'])
+def test_sniff_csv_finds_delimiter(delimiter):
+    content = '\n'.join(row.replace(';', delimiter).replace(',5', '.5') for row in ROWS).encode()
+
+    assert csv_sniffer.sniff_csv(content)['delimiter'] == delimiter
+
+
+def test_sniff_delimiter_looks_at_the_first_lines_only(monkeypatch):
+    samples = []
+    sniff = csv_sniffer.csv.Sniffer.sniff
+    def recorded_sniff(sniffer, text, delimiters):
+        samples.append(text)
+        return sniff(sniffer, text, delimiters)
+    monkeypatch.setattr(csv_sniffer.csv.Sniffer, 'sniff', recorded_sniff)
+    rows = ['handle,body'] + ['p-{},"<p>Soft ""cotton"" shirt, size {}</p>"'.format(i, i) for i in range(2000)]
+
+    assert csv_sniffer.sniff_csv('\n'.join(rows).encode())['delimiter'] == ','
+    assert samples == ['\n'.join(rows[:csv_sniffer.DELIMITER_SAMPLE_LINES]) + '\n']
+
+    long_rows = ['title;body'] + ['product {};{}'.format(i, 'x' * 3000) for i in range(5)]
+    assert csv_sniffer.sniff_delimiter('\n'.join(long_rows)) == ';'
+    assert len(samples[-1]) <= csv_sniffer.DELIMITER_SAMPLE_SIZE and samples[-1].endswith('\n')
+
+
+@pytest.mark.parametrize('encoding, expected', [
+    ('utf-8', 'utf-8'),
+    ('utf-8-sig', 'utf-8-sig'),
+    ('utf-16', 'utf-16'),
+    ('cp1252', 'cp1252')
+])
+def test_sniff_csv_finds_encoding(encoding, expected):
+    assert csv_sniffer.sniff_csv('\n'.join(ROWS).encode(encoding))['encoding'] == expected
+
+
+def test_sniff_encoding_ignores_character_cut_at_end_of_sample():
+    sample = 'title\nCafé'.encode()[:-1]
+
+    assert csv_sniffer.sniff_encoding(sample) == 'utf-8'
+
+
+@pytest.mark.parametrize('encoding', ['utf-8', 'utf-8-sig', 'utf-16', 'cp1252'])
+def test_file_details_of_semicolon_csv(encoding):
+    details = file_details('\r\n'.join(ROWS).encode(encoding))
+
+    assert details['actualRowCount'] == 30
+    assert [column['name'] for column in details['columnDetails']] == ['title', 'body', 'price']
+    assert details['columnDetails'][0]['sampleData'][0] == 'Café 0'
+    assert details['columnDetails'][2]['sampleData'][:2] == ['0,5', '1,5']
+
+
+def test_file_details_falls_back_when_encoding_changes_after_sample():
+    rows = ['title,price'] + ['product {},{}'.format(i, i) for i in range(20000)] + ['Café,1']
+
+    details = file_details('\n'.join(rows).encode('cp1252'))
+
+    assert details['actualRowCount'] == 20001
+
+
+def test_file_details_counts_rows_across_scan_chunks(monkeypatch):
+    monkeypatch.setattr('utility.file_reader_util.SCAN_CHUNK_SIZE', 256)
+    rows = ['title,price'] + [('product {},{}'.format(i, i) if i % 7 else ',') for i in range(1000)]
+
+    details = file_details('\n'.join(rows).encode())
+
+    assert details['actualRowCount'] == len([i for i in range(1000) if i % 7])
+
+
+def test_sample_data_keeps_the_types_of_the_whole_sheet():
+    rows = ['title,sku,price'] + ['product {},{},{}'.format(i, i, i) for i in range(100)]
+    rows[80] = 'product 79,SKU-79,'
+
+    columns = file_details('\n'.join(rows).encode())['columnDetails']
+
+    assert columns[1]['sampleData'] == ['0', '1', '2', '3', '4']
+    assert columns[2]['sampleData'] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert all(type(value) is float for value in columns[2]['sampleData'])
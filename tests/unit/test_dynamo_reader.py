@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+import pytest
+from boto3.dynamodb.conditions import Attr
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import Binary
+from boto3.dynamodb.types import TypeDeserializer
+from boto3.dynamodb.types import TypeSerializer
+
+from dataaccess import data_model_utils
+from dataaccess.dynamo_reader import DynamoReader
+from dataaccess.dynamo_reader import decode_item
+from dataaccess.product_manager_data_access import ProductManagerDataAccess
+from tests import standins
+
+ITEM = {
+    'PK': 'job#1', 'SK': 'user#1', 'count': 3, 'big': 12345678901234567890, 'price': Decimal('19.99'),
+    'small': Decimal('1E-7'), 'negative': -4, 'active': True, 'nothing': None, 'raw': b'\x00\x01',
+    'tags': ['import', 2, {'nested': Decimal('0.5')}], 'settings': {'notify': False, 'sizes': [1, 2]},
+    'names': {'a', 'b'}, 'numbers': {1, Decimal('2.5')}, 'empty': '', 'empty_list': [], 'empty_map': {}
+}
+
+
+def test_decode_matches_the_resource_deserializer():
+    serializer, deserializer = TypeSerializer(), TypeDeserializer()
+    wire_item = {name: serializer.serialize(value) for name, value in ITEM.items()}
+    #the low level client hands binary values over as bytes
+    wire_item['raw'] = {'B': b'\x00\x01'}
+
+    decoded = decode_item(wire_item)
+    expected = {name: deserializer.deserialize(value) for name, value in wire_item.items()}
+    expected['raw'] = Binary(b'\x00\x01').value
+    assert decoded == expected
+    assert isinstance(decoded['count'], int) and isinstance(decoded['big'], int)
+    assert decoded['price'] == Decimal('19.99') and decoded['small'] == Decimal('1E-7')
+
+
+@pytest.fixture()
+def result_count():
+    return 12
+
+
+def test_get_item_reads_only_the_attributes_asked_for(local):
+    data_access = ProductManagerDataAccess()
+    user = data_access.get_user_by_id(standins.USER_ID, data_model_utils.USER_PROFILE_ATTRIBUTES)
+    assert user['owner'] == 'Local Owner' and user['job_count'] == 1
+    assert 'access_token' not in user
+
+    user = data_access.get_user_by_id(standins.USER_ID, data_model_utils.USER_SHOP_ATTRIBUTES)
+    assert user == {'id': standins.USER_ID, 'domain': 'test-shop.myshopify.com', 'access_token': 'shpat_local'}
+    assert data_access.get_user_by_id('nobody') is None
+
+
+def test_query_pages_with_filters_and_projections(local):
+    reader = DynamoReader(local.dynamo_client, 'BulkManager')
+    local.table.items[('result#4', 'job#' + standins.JOB_ID)]['status'] = 'FAILED'
+
+    items, last_evaluated_key = [], None
+    while True:
+        page = reader.query(
+            Key('SK').eq('job#' + standins.JOB_ID), index_name='GSI1', filter_condition=Attr('status').ne('FAILED'),
+            attributes=['PK', 'status'], limit=5, exclusive_start_key=last_evaluated_key
+        )
+        items.extend(page['items'])
+        last_evaluated_key = page['last_evaluated_key']
+        if last_evaluated_key is None:
+            break
+
+    assert len(items) == 11
+    assert items[0] == {'PK': 'result#0', 'status': 'SUCCESS'}
+    assert local.table.calls.count('query') == 3
@@ -0,0 +1,156 @@
+import json
+import random
+import string
+
+import pytest
+from boto3.dynamodb.types import TypeDeserializer
+from boto3.dynamodb.types import TypeSerializer
+
+from dataaccess import data_model_utils
+from dataaccess.entity_schema import Entity
+from dataaccess.entity_schema import Key
+
+RUNS = 200
+TEXT = string.ascii_letters + string.digits + '#-_./: '
+
+
+def text(rng, alphabet=TEXT):
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 20)))
+
+
+def json_value(rng):
+    return rng.choice([
+        text(rng), rng.randint(-1000, 1000), None, True, [text(rng), rng.randint(0, 9)], {text(rng): [text(rng)]}
+    ])
+
+
+def some_of(rng, obj, required):
+    return {name: value for name, value in obj.items() if name in required or rng.random() < 0.6}
+
+
+def random_file(rng):
+    return some_of(rng, {
+        'id': text(rng), 'idle': rng.choice(['true', 'false']), 'file_name': text(rng), 'file_type': 'csv',
+        's3_key': text(rng), 'actual_row_count': rng.randint(0, 10 ** 6), 'header_row': rng.randint(0, 5),
+        'field_details': json_value(rng), 'user_id': text(rng), 'header_option': json_value(rng),
+        'analysis_status': text(rng), 'column_details': json_value(rng), 'error_code': text(rng),
+        'snapshot_key': text(rng)
+    }, ['id'])
+
+
+def random_upload_hash(rng):
+    return some_of(rng, {
+        'user_id': text(rng), 'hash': text(rng, string.hexdigits), 'file_id': text(rng), 'file_type': 'xlsx',
+        's3_key': text(rng), 'snapshot_key': text(rng), 'actual_row_count': rng.randint(0, 10 ** 6),
+        'header_row': rng.randint(0, 5), 'column_details': json_value(rng), 'expires_at': rng.randint(0, 2 ** 31)
+    }, ['user_id', 'hash'])
+
+
+def random_shop_locations(rng):
+    return some_of(rng, {
+        'domain': text(rng), 'locations': [json_value(rng)], 'expires_at': rng.randint(0, 2 ** 31)
+    }, ['domain'])
+
+
+def random_job(rng):
+    return some_of(rng, {
+        'id': text(rng), 'user_id': text(rng), 'start_time': text(rng), 'type': text(rng, string.ascii_uppercase + '_'),
+        'total_products': rng.randint(0, 10 ** 5), 'total_success': rng.randint(0, 10 ** 5),
+        'total_failed': rng.randint(0, 10 ** 5), 'edit_rules': json_value(rng), 'current_batch': rng.randint(0, 99),
+        'input_products': text(rng), 'options': json_value(rng), 'status': text(rng), 'duration': text(rng),
+        'version': rng.randint(0, 99)
+    }, ['id', 'user_id'])
+
+
+def random_user(rng):
+    return some_of(rng, {
+        'id': text(rng), 'domain': text(rng), 'subscribtion': text(rng, string.ascii_uppercase),
+        'authenticated': rng.random() < 0.5, 'reviewed': rng.random() < 0.5, 'settings': {text(rng): text(rng)},
+        'access_token': text(rng), 'email': text(rng), 'owner': text(rng), 'time_zone': text(rng),
+        'shop_name': text(rng), 'active': rng.random() < 0.5, 'job_count': rng.randint(0, 999),
+        'active_job_count': rng.randint(0, 9)
+    }, ['id'])
+
+
+def stored(item):
+    """The item the way dynamodb gives it back, numbers come back as Decimal"""
+    serializer, deserializer = TypeSerializer(), TypeDeserializer()
+    return {name: deserializer.deserialize(serializer.serialize(value)) for name, value in item.items()}
+
+
+@pytest.mark.parametrize('random_obj, encode, decode', [
+    (random_file, data_model_utils.convert_to_db_file, data_model_utils.extract_file_details),
+    (random_upload_hash, data_model_utils.convert_to_db_upload_hash, data_model_utils.extract_upload_hash_details),
+    (random_shop_locations, data_model_utils.convert_to_db_shop_locations,
+     data_model_utils.extract_shop_locations_details),
+    (random_job, data_model_utils.convert_to_db_job, data_model_utils.extract_job_details),
+    (random_user, data_model_utils.convert_to_db_user, data_model_utils.extract_user_details),
+])
+def test_objects_read_back_as_they_were_saved(random_obj, encode, decode):
+    rng = random.Random(random_obj.__name__)
+    for _ in range(RUNS):
+        obj = random_obj(rng)
+        assert decode(stored(encode(obj))) == obj
+
+
+def test_job_items_have_their_keys_composed():
+    db_job = data_model_utils.convert_to_db_job({
+        'id': 'job-1', 'user_id': 'user-1', 'start_time': '2021-08-01T10:00:00.000000Z', 'type': 'IMPORT_CREATE',
+        'options': {'defaultStatus': 'ACTIVE'}
+    })
+    assert db_job == {
+        'PK': 'job#job-1', 'SK': 'user#user-1', 'SK1': '2021-08-01T10:00:00.000000Z',
+        'SK2': 'IMPORT_CREATE#2021-08-01T10:00:00.000000Z', 'options': '{"defaultStatus": "ACTIVE"}'
+    }
+    db_job = data_model_utils.convert_to_db_job({'id': 'job-1', 'user_id': 'user-1', 'type': 'IMPORT_CREATE'})
+    assert db_job == {'PK': 'job#job-1', 'SK': 'user#user-1', 'SK2': 'IMPORT_CREATE#--'}
+    assert data_model_utils.extract_job_details(db_job) == {'id': 'job-1', 'user_id': 'user-1', 'type': 'IMPORT_CREATE'}
+    #older job items kept their start time in an attribute
+    assert data_model_utils.extract_job_details(dict(db_job, start_time='2020'))['start_time'] == '2020'
+
+
+def test_keys_are_only_the_primary_key():
+    assert data_model_utils.FILE_ENTITY.key({'id': 'f1', 'idle': 'true', 'file_name': 'a.csv'}) == {
+        'PK': 'file#f1', 'SK': 'file'
+    }
+    with pytest.raises(KeyError):
+        data_model_utils.JOB_ENTITY.key({'id': 'job-1'})
+    with pytest.raises(KeyError):
+        data_model_utils.convert_to_db_job({'user_id': 'user-1'})
+
+
+def test_upload_analysis_values_json_can_not_encode_are_saved_as_strings():
+    db_upload_hash = data_model_utils.convert_to_db_upload_hash(
+        {'user_id': 'u', 'hash': 'h', 'column_details': [{'sample': {1, 2}}]}
+    )
+    assert json.loads(db_upload_hash['column_details']) == [{'sample': '{1, 2}'}]
+    db_file = data_model_utils.convert_to_db_file({'id': 'f1', 'column_details': [{'sample': {1, 2}}]})
+    assert json.loads(db_file['column_details']) == [{'sample': '{1, 2}'}]
+    with pytest.raises(TypeError):
+        data_model_utils.convert_to_db_job({'id': 'j1', 'user_id': 'u', 'options': {1, 2}})
+
+
+def test_job_result_fields_are_read_from_its_json():
+    db_result = {
+        'PK': 'result#7', 'SK': 'job#job-1', 'SK1': '000007', 'status': 'FAILED',
+        'errors': json.dumps(['Price is not valid']), 'warnings': json.dumps(['Title is long']),
+        'data': json.dumps({'id': 'gid://shopify/Product/42', 'title': 'Hat', 'images': [{'src': 'hat.jpg'}]})
+    }
+    assert data_model_utils.extract_job_result_details(db_result) == {
+        'id': '7', 'job_id': 'job-1', 'status': 'FAILED', 'messages': ['Price is not valid', 'Title is long'],
+        'product_id': '42', 'product_title': 'Hat', 'featured_image': 'hat.jpg'
+    }
+    db_result['data'] = json.dumps({'featuredImage': None})
+    assert data_model_utils.extract_job_result_details(db_result)['featured_image'] == ''
+    assert data_model_utils.extract_job_result_details({'PK': 'result#7', 'SK': 'job#job-1'})['messages'] == []
+
+
+def test_key_templates():
+    entity = Entity(keys={'PK': 'a#{x}#b', 'SK': Key('{y}-{z}.end', z='none')})
+    item = entity.encode({'x': '1', 'y': 'k'})
+    assert item == {'PK': 'a#1#b', 'SK': 'k-none.end'}
+    assert entity.decode(item) == {'x': '1', 'y': 'k'}
+    with pytest.raises(ValueError):
+        Key('{x}{y}')
+    with pytest.raises(ValueError):
+        Key('item#{}')
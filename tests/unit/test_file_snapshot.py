@@ -0,0 +1,104 @@
+import io
+
+import openpyxl
+import pytest
+
+import app
+from dataaccess.product_manager_data_access import ProductManagerDataAccess
+from datamodel.custom_enums import FileReaderEngine
+from datamodel.custom_enums import FileType
+from datamodel.custom_enums import HeaderOption
+from tests import standins
+from utility.file_reader_util import FileReader
+from utility.file_snapshot import SnapshotReader
+
+PREAMBLE = [['Supplier export', None, None, None], [None] * 4, ['Generated 2021', None, None, None]]
+HEADER = ['title', None, 'price', 'sku']
+PRODUCTS = [['product ' + str(i), None, i * 1.5, 'sku-' + str(i)] if i % 4 else [None] * 4 for i in range(1, 40)]
+
+
+def workbook_bytes(rows):
+    workbook = openpyxl.Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    content = io.BytesIO()
+    workbook.save(content)
+    return content.getvalue()
+
+
+def snapshot_of(content, file_type, engine=FileReaderEngine.STREAM, batch_row_count=7):
+    file_reader = FileReader(file_reader_info={
+        'file': content,
+        'type': file_type,
+        'header': {'option': HeaderOption.FIND, 'value': 'price'},
+        'engine': engine
+    })
+    file_details = file_reader.get_file_details()
+    snapshot = io.BytesIO()
+    file_reader.write_snapshot(snapshot, batch_row_count)
+    snapshot.seek(0)
+    return file_details, SnapshotReader(snapshot)
+
+
+@pytest.mark.parametrize('engine', [FileReaderEngine.STREAM, FileReaderEngine.PANDAS])
+def test_xlsx_snapshot_holds_product_rows_of_non_empty_columns(engine):
+    file_details, reader = snapshot_of(workbook_bytes(PREAMBLE + [HEADER] + PRODUCTS), FileType.EXCEL, engine)
+
+    rows = list(reader.iter_rows())
+    expected = [row for row in PRODUCTS if row[0] is not None]
+    assert reader.columns == ['title', 'price', 'sku']
+    assert reader.header_row == file_details['headerRow'] == 3
+    assert reader.row_count == file_details['actualRowCount'] == len(rows) == len(expected)
+    assert rows[0] == {'title': 'product 1', 'price': 1.5, 'sku': 'sku-1'}
+    assert [row['sku'] for row in rows] == [row[3] for row in expected]
+
+
+def test_csv_snapshot_keeps_cell_text():
+    lines = [','.join('' if value is None else str(value) for value in row) for row in PREAMBLE + [HEADER] + PRODUCTS]
+
+    file_details, reader = snapshot_of('\n'.join(lines).encode(), FileType.CSV)
+
+    batches = list(reader.iter_batches())
+    assert [len(batch[0]) for batch in batches] == [7, 7, 7, 7, 2]
+    assert [column[0] for column in batches[0]] == ['product 1', '1.5', 'sku-1']
+    assert reader.row_count == file_details['actualRowCount'] == 30
+
+
+def test_upload_saves_snapshot_next_to_the_file(local):
+    response = app.lambda_handler(standins.load_event('upload-event.json'), None)
+
+    file_id = standins.response_json(response)['fileId']
+    file_item = local.table.items[('file#' + file_id, 'file')]
+    snapshot_key = file_item['s3_key'] + '.snapshot.jsonl.gz'
+    assert 'snapshot_key' not in file_item
+    assert ('local-upload-bucket', snapshot_key) not in local.s3.objects
+
+    #written when the s3 notification of the saved file comes in
+    record = {'eventSource': 'aws:s3', 's3': {'object': {'key': file_item['s3_key']}}}
+    assert app.analyze_uploaded_files([record]) == [{'s3_key': file_item['s3_key'], 'snapshot_key': snapshot_key}]
+    reader = ProductManagerDataAccess().get_snapshot(snapshot_key)
+    assert reader.row_count == file_item['actual_row_count'] == len(list(reader.iter_rows()))
+
+    event = standins.load_event('import-event.json')
+    event['body'] = event['body'].replace(standins.FILE_ID, file_id)
+    response = app.lambda_handler(event, None)
+
+    assert response['statusCode'] == 200
+    assert local.table.items[('file#' + file_id, 'file')]['snapshot_key'] == snapshot_key
+
+
+def test_job_is_created_without_a_snapshot_that_was_not_written(local):
+    file_id = standins.response_json(app.lambda_handler(standins.load_event('upload-event.json'), None))['fileId']
+
+    event = standins.load_event('import-event.json')
+    event['body'] = event['body'].replace(standins.FILE_ID, file_id)
+    response = app.lambda_handler(event, None)
+
+    assert response['statusCode'] == 200
+    assert 'snapshot_key' not in local.table.items[('file#' + file_id, 'file')]
+
+
+def test_snapshot_notifications_are_not_analysed(local):
+    record = {'eventSource': 'aws:s3', 's3': {'object': {'key': 'file-id_products.csv.snapshot.jsonl.gz'}}}
+
+    assert app.analyze_uploaded_files([record]) == []
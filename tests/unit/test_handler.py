@@ -1,8 +1,8 @@
-import json
-
 import pytest
 
-from hello_world import app
+import app
+from tests import standins
+from tests.benchmark.route_startup import ROUTE_EVENTS
 
 
 @pytest.fixture()
@@ -19,41 +19,13 @@ def apigw_event():
             "httpMethod": "POST",
             "requestId": "c6af9ac6-7b61-11e6-9a41-93e8deadbeef",
             "accountId": "123456789012",
-            "identity": {
-                "apiKey": "",
-                "userArn": "",
-                "cognitoAuthenticationType": "",
-                "caller": "",
-                "userAgent": "Custom User Agent String",
-                "user": "",
-                "cognitoIdentityPoolId": "",
-                "cognitoIdentityId": "",
-                "cognitoAuthenticationProvider": "",
-                "sourceIp": "127.0.0.1",
-                "accountId": "",
-            },
             "stage": "prod",
         },
         "queryStringParameters": {"foo": "bar"},
         "headers": {
-            "Via": "1.1 08f323deadbeefa7af34d5feb414ce27.cloudfront.net (CloudFront)",
-            "Accept-Language": "en-US,en;q=0.8",
-            "CloudFront-Is-Desktop-Viewer": "true",
-            "CloudFront-Is-SmartTV-Viewer": "false",
-            "CloudFront-Is-Mobile-Viewer": "false",
-            "X-Forwarded-For": "127.0.0.1, 127.0.0.2",
-            "CloudFront-Viewer-Country": "US",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-            "Upgrade-Insecure-Requests": "1",
-            "X-Forwarded-Port": "443",
             "Host": "1234567890.execute-api.us-east-1.amazonaws.com",
-            "X-Forwarded-Proto": "https",
-            "X-Amz-Cf-Id": "aaaaaaaaaae3VYQb9jd-nvCd-de396Uhbp027Y2JvkCPNLmGJHqlaA==",
-            "CloudFront-Is-Tablet-Viewer": "false",
-            "Cache-Control": "max-age=0",
             "User-Agent": "Custom User Agent String",
-            "CloudFront-Forwarded-Proto": "https",
-            "Accept-Encoding": "gzip, deflate, sdch",
         },
         "pathParameters": {"proxy": "/examplepath"},
         "httpMethod": "POST",
@@ -62,12 +34,18 @@ def apigw_event():
     }
 
 
-def test_lambda_handler(apigw_event, mocker):
+@pytest.mark.parametrize('path, method', list(ROUTE_EVENTS))
+def test_lambda_handler_answers_each_event_fixture(local, path, method):
+    event = standins.load_event(ROUTE_EVENTS[(path, method)], resource=path, httpMethod=method)
+    ret = app.lambda_handler(event, None)
+
+    assert ret["statusCode"] == 200
+    assert ret["headers"]["Access-Control-Allow-Origin"] == "*"
+    standins.response_json(ret)
 
+
+def test_lambda_handler_unknown_route(local, apigw_event):
     ret = app.lambda_handler(apigw_event, "")
-    data = json.loads(ret["body"])
 
-    assert ret["statusCode"] == 200
-    assert "message" in ret["body"]
-    assert data["message"] == "hello world"
-    # assert "location" in data.dict_keys()
+    assert ret["statusCode"] == 404
+    assert "body" not in ret
@@ -0,0 +1,82 @@
+import pytest
+
+import app
+from dataaccess.product_manager_data_access import ProductManagerDataAccess
+from tests import standins
+
+JOB_KEY = ('job#' + standins.JOB_ID, 'user#' + standins.USER_ID)
+
+
+@pytest.fixture()
+def result_count():
+    return 5
+
+
+@pytest.fixture()
+def local(local):
+    local.table.items[JOB_KEY].update({'status': 'RUNNING', 'total_success': 2})
+    return local
+
+
+def request(event_name, if_none_match=None, **query_params):
+    event = standins.load_event(event_name, queryStringParameters=query_params or None)
+    if if_none_match is not None:
+        event['headers'] = dict(event['headers'], **{'If-None-Match': if_none_match})
+    return app.lambda_handler(event, None)
+
+
+@pytest.mark.parametrize('event_name', ['get_job_details.json', 'results-event.json'])
+def test_unchanged_job_is_not_modified(local, event_name):
+    response = request(event_name)
+    assert response['statusCode'] == 200
+    etag = response['headers']['ETag']
+    assert response['headers']['Access-Control-Expose-Headers'] == 'ETag'
+
+    local.table.calls.clear()
+    response = request(event_name, if_none_match=etag)
+    assert response['statusCode'] == 304
+    assert 'body' not in response
+    assert response['headers']['ETag'] == etag
+    #a single read of the version attributes of the job and its summary
+    assert local.table.calls == ['batch_get_item']
+
+
+@pytest.mark.parametrize('change', [{'total_success': 3}, {'status': 'COMPLETED'}, {'version': 7}])
+def test_changed_job_is_sent_again(local, change):
+    etag = request('get_job_details.json')['headers']['ETag']
+    local.table.items[JOB_KEY].update(change)
+
+    response = request('get_job_details.json', if_none_match=etag)
+    assert response['statusCode'] == 200
+    assert response['headers']['ETag'] != etag
+    assert request('get_job_details.json', if_none_match=response['headers']['ETag'])['statusCode'] == 304
+
+
+def test_summary_counted_without_the_job_changing_is_sent_again(local):
+    etag = request('get_job_details.json')['headers']['ETag']
+    ProductManagerDataAccess().build_job_summary(standins.JOB_ID)
+
+    response = request('get_job_details.json', if_none_match=etag)
+    assert response['statusCode'] == 200
+    assert standins.response_json(response)['summary']['total'] == 5
+    assert request('get_job_details.json', if_none_match=response['headers']['ETag'])['statusCode'] == 304
+
+
+def test_etag_is_the_same_for_both_reads_of_a_job(local):
+    etag = request('get_job_details.json')['headers']['ETag']
+    assert request('get_job_details.json', if_none_match='"other", W/' + etag)['statusCode'] == 304
+    assert request('results-event.json', if_none_match=etag)['statusCode'] == 304
+
+
+def test_job_of_another_user_is_not_matched(local):
+    etag = request('get_job_details.json')['headers']['ETag']
+    local.table.add(dict(local.table.items.pop(JOB_KEY), SK='user#someone-else'))
+    assert request('get_job_details.json', if_none_match=etag)['statusCode'] == 400
+
+
+def test_exports_have_no_etag(local, monkeypatch):
+    monkeypatch.setenv('s3_file_upload_bucket', 'local-upload-bucket')
+    response = request('results-event.json', if_none_match='*', export='ndjson')
+    assert response['statusCode'] == 200
+    assert 'ETag' not in response['headers']
+    assert standins.response_json(response)['rowCount'] == 5
@@ -0,0 +1,142 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+import app
+from tests import standins
+
+RESULT_COUNT = 30
+BUCKET = 'local-upload-bucket'
+
+
+@pytest.fixture()
+def result_count():
+    return RESULT_COUNT
+
+
+@pytest.fixture()
+def local(local):
+    #every third result failed, every fifth has a warning
+    for index in range(RESULT_COUNT):
+        item = local.table.items[('result#' + str(index), 'job#' + standins.JOB_ID)]
+        if index % 3 == 0:
+            item['status'] = 'FAILED'
+            item['errors'] = json.dumps(['Price is not valid'])
+        if index % 5 == 0:
+            item['warnings'] = json.dumps(['Image could not be loaded'])
+    return local
+
+
+def get_results(**query_params):
+    event = standins.load_event('results-event.json', queryStringParameters=query_params or None)
+    return app.lambda_handler(event, None)
+
+
+def get_page(**query_params):
+    response = get_results(**query_params)
+    assert response['statusCode'] == 200
+    return standins.response_json(response)
+
+
+def test_results_are_paged(local):
+    ids, token, pages = [], None, 0
+    while True:
+        page = get_page(pageSize='12', **({'nextToken': token} if token else {}))
+        ids.extend(result['id'] for result in page['results'])
+        pages += 1
+        token = page['nextToken']
+        if token is None:
+            break
+
+    assert pages == 3
+    assert ids == [str(index) for index in range(RESULT_COUNT)]
+
+
+def test_results_of_a_page(local):
+    result = get_page(pageSize='1')['results'][0]
+    assert result == {
+        'id': '0', 'job_id': standins.JOB_ID, 'status': 'FAILED',
+        'messages': ['Price is not valid', 'Image could not be loaded'],
+        'product_id': '0', 'product_title': 'Product 0', 'featured_image': ''
+    }
+
+
+@pytest.mark.parametrize('result_filter, expected', [
+    ('errors', [index for index in range(RESULT_COUNT) if index % 3 == 0]),
+    ('WARNINGS', [index for index in range(RESULT_COUNT) if index % 5 == 0]),
+])
+def test_results_filter(local, result_filter, expected):
+    page = get_page(filter=result_filter, pageSize='1000')
+    assert [result['id'] for result in page['results']] == [str(index) for index in expected]
+
+
+def test_projection_reads_only_the_fields_asked_for(local):
+    page = get_page(fields='id,status', pageSize='2')
+    assert page['results'] == [{'id': '0', 'status': 'FAILED'}, {'id': '1', 'status': 'SUCCESS'}]
+
+    page = get_page(fields='id,status', pageSize='2', nextToken=page['nextToken'])
+    assert [result['id'] for result in page['results']] == ['2', '3']
+
+
+@pytest.mark.parametrize('query_params', [
+    {'filter': 'failures'},
+    {'fields': 'id,price'},
+    {'pageSize': '1001'},
+    {'nextToken': 'bm90IGpzb24'},
+    {'export': 'xlsx'},
+])
+def test_invalid_requests(local, query_params):
+    assert get_results(**query_params)['statusCode'] == 400
+
+
+def test_token_of_another_job_is_a_bad_request(local):
+    page = get_page(pageSize='2')
+    event = standins.load_event(
+        'results-event.json', queryStringParameters={'nextToken': page['nextToken']},
+        pathParameters={'jobId': 'another-job'}
+    )
+    assert app.lambda_handler(event, None)['statusCode'] == 400
+
+
+def read_export(local, url):
+    key = url.split('.s3.amazonaws.com/', 1)[1].split('?', 1)[0]
+    assert key.startswith('exports/' + standins.USER_ID + '/' + standins.JOB_ID + '/')
+    return key, gzip.decompress(local.s3.objects[(BUCKET, key)]).decode('utf-8')
+
+
+def test_ndjson_export(local):
+    export = get_page(export='ndjson')
+    assert export['rowCount'] == RESULT_COUNT and export['format'] == 'NDJSON'
+
+    key, content = read_export(local, export['url'])
+    assert key.endswith('.ndjson.gz')
+    results = [json.loads(line) for line in content.splitlines()]
+    assert [result['id'] for result in results] == [str(index) for index in range(RESULT_COUNT)]
+    assert results[0]['messages'] == ['Price is not valid', 'Image could not be loaded']
+
+
+def test_csv_export_of_the_errors(local):
+    export = get_page(export='csv', filter='errors')
+    assert export['rowCount'] == 10
+
+    key, content = read_export(local, export['url'])
+    assert key.endswith('.csv.gz')
+    rows = list(csv.DictReader(io.StringIO(content)))
+    assert [row['id'] for row in rows] == [str(index) for index in range(0, RESULT_COUNT, 3)]
+    assert json.loads(rows[1]['messages']) == ['Price is not valid']
+
+
+def test_export_is_not_analysed_as_an_upload(local):
+    export = get_page(export='ndjson')
+    key, _ = read_export(local, export['url'])
+    records = [{'eventSource': 'aws:s3', 's3': {'object': {'key': key}}}]
+    assert app.lambda_handler({'Records': records}, None) == []
+
+
+def test_export_of_another_users_job_is_a_bad_request(local):
+    job = local.table.items.pop(('job#' + standins.JOB_ID, 'user#' + standins.USER_ID))
+    local.table.add(dict(job, SK='user#someone-else'))
+    assert get_results(export='csv')['statusCode'] == 400
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+import app
+from dataaccess import dynamo_reader
+from dataaccess.dynamo_reader import DynamoReader
+from tests import standins
+
+JOB_IDS = ['job-' + str(index).zfill(3) for index in range(100)]
+
+
+@pytest.fixture()
+def local(local):
+    for index, job_id in enumerate(JOB_IDS):
+        local.table.add({
+            'PK': 'job#' + job_id, 'SK': 'user#' + standins.USER_ID, 'SK1': '2021-08-01T09:00:00.000000Z',
+            'SK2': 'IMPORT_CREATE#2021-08-01T09:00:00.000000Z', 'status': 'RUNNING', 'total_products': 10,
+            'total_success': index % 10, 'total_failed': 0, 'options': '{"defaultStatus": "ACTIVE"}'
+        })
+    local.table.add({'PK': 'job#someone-elses', 'SK': 'user#someone-else', 'status': 'RUNNING'})
+    return local
+
+
+@pytest.fixture()
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(dynamo_reader.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def get_statuses(job_ids=None, query_params=None):
+    body = None if job_ids is None else json.dumps({'jobIds': job_ids})
+    event = standins.load_event('get_job_statuses_event.json', body=body, queryStringParameters=query_params)
+    return app.lambda_handler(event, None)
+
+
+def test_statuses_are_read_with_one_batch_get(local):
+    job_ids = ['missing', 'someone-elses'] + JOB_IDS[:98]
+    response = get_statuses(job_ids)
+    assert response['statusCode'] == 200
+
+    statuses = standins.response_json(response)
+    assert [job['id'] for job in statuses['jobs']] == JOB_IDS[:98]
+    assert statuses['missingJobIds'] == ['missing', 'someone-elses']
+    assert statuses['jobs'][7] == {
+        'id': 'job-007', 'status': 'RUNNING', 'total_products': 10, 'total_success': 7, 'total_failed': 0
+    }
+    assert local.table.calls == ['batch_get_item']
+
+
+def test_unprocessed_keys_are_retried(local, sleeps):
+    local.dynamo_client.batch_get_limit = 30
+    statuses = standins.response_json(get_statuses(JOB_IDS))
+    assert [job['id'] for job in statuses['jobs']] == JOB_IDS
+    assert local.dynamo_client.batch_gets == [30, 30, 30, 10]
+    assert len(sleeps) == 3 and all(0 <= sleep <= dynamo_reader.BATCH_BACKOFF_CAP for sleep in sleeps)
+
+
+def test_keys_left_unprocessed_make_the_service_unavailable(local, sleeps):
+    local.dynamo_client.batch_get_limit = 1
+    assert get_statuses(JOB_IDS[:10])['statusCode'] == 503
+    assert len(local.dynamo_client.batch_gets) == dynamo_reader.BATCH_GET_RETRIES + 1
+
+
+def test_ids_from_the_query_string_are_deduplicated(local):
+    statuses = standins.response_json(get_statuses(query_params={'jobIds': 'job-002, job-001,job-002'}))
+    assert [job['id'] for job in statuses['jobs']] == ['job-002', 'job-001']
+
+
+@pytest.mark.parametrize('job_ids', [None, [], ['job-001', 7], JOB_IDS + ['job-100']])
+def test_invalid_job_ids_are_bad_requests(local, job_ids):
+    assert get_statuses(job_ids)['statusCode'] == 400
+    assert local.table.calls == []
+
+
+def test_reader_splits_keys_into_batches_and_keeps_the_projection(local):
+    reader = DynamoReader(local.dynamo_client, 'BulkManager')
+    local.dynamo_client.batch_get_limit = 60
+    keys = [{'PK': 'job#' + job_id, 'SK': 'user#' + standins.USER_ID} for job_id in JOB_IDS] * 2
+    items = reader.batch_get_items(keys, ['PK', 'status'])
+    assert len(items) == 200 and all(item.keys() == {'PK', 'status'} for item in items)
+    assert local.dynamo_client.batch_gets == [60, 40, 60, 40]
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+import app
+from dataaccess.product_manager_data_access import ProductManagerDataAccess
+from tests import standins
+
+SUMMARY_KEY = ('job#' + standins.JOB_ID, 'summary')
+
+
+@pytest.fixture()
+def result_count():
+    return 0
+
+
+@pytest.fixture()
+def local(local, monkeypatch):
+    monkeypatch.setenv('job_summary_failure_count', '3')
+    return local
+
+
+def result_item(index, errors=(), status=None):
+    return {
+        'PK': 'result#' + str(index), 'SK': 'job#' + standins.JOB_ID, 'SK1': str(index).zfill(6),
+        'status': status or ('FAILED' if errors else 'SUCCESS'), 'errors': json.dumps(list(errors)),
+        'warnings': '[]', 'data': json.dumps({'id': 'gid://shopify/Product/' + str(index), 'title': 'Product ' + str(index)})
+    }
+
+
+RESULTS = [result_item(index) for index in range(6)] + [
+    result_item(6, ['Price is not valid']),
+    result_item(7, [{'code': 'INVALID_SKU', 'message': 'SKU is taken'}, 'Price is not valid']),
+    result_item(8, ['Price is not valid']),
+    result_item(9, [{'code': 'INVALID_SKU', 'message': 'SKU is taken'}]),
+]
+
+
+def get_job(**query_params):
+    event = standins.load_event('get_job_details.json', queryStringParameters=query_params or None)
+    response = app.lambda_handler(event, None)
+    assert response['statusCode'] == 200
+    return standins.response_json(response)
+
+
+def test_summary_counts_results_by_status_and_error(local):
+    local.table.add(*RESULTS)
+
+    summary = ProductManagerDataAccess().build_job_summary(standins.JOB_ID)
+    assert summary == ProductManagerDataAccess().get_job_summary(standins.JOB_ID)
+    assert summary['total'] == 10
+    assert summary['status_counts'] == {'SUCCESS': 6, 'FAILED': 4}
+    assert summary['error_codes'] == {'Price is not valid': 3, 'INVALID_SKU': 2}
+    assert [failure['id'] for failure in summary['failures']] == ['6', '7', '8']
+    assert summary['failures'][0] == {
+        'id': '6', 'status': 'FAILED', 'messages': ['Price is not valid'],
+        'product_id': '6', 'product_title': 'Product 6'
+    }
+
+
+def test_job_details_read_only_the_job_and_its_summary(local):
+    local.table.add(*RESULTS)
+    ProductManagerDataAccess().build_job_summary(standins.JOB_ID)
+    local.table.calls.clear()
+
+    job = get_job()
+    assert job['summary']['total'] == 10
+    assert 'results' not in job
+    assert local.table.calls == ['get_item', 'get_item']
+
+
+def test_results_are_loaded_when_asked_for(local):
+    local.table.add(*RESULTS)
+    job = get_job(results='true')
+    assert [result['id'] for result in job['results']] == [str(index) for index in range(10)]
+
+
+def test_summary_of_a_job_without_one_is_built_once(local):
+    local.table.add(*RESULTS)
+    summary = get_job()['summary']
+    assert summary['total'] == 10
+    assert summary['error_codes'] == {'Price is not valid': 3, 'INVALID_SKU': 2}
+    assert len(summary['failures']) == 3
+    assert SUMMARY_KEY in local.table.items
+
+    local.table.calls.clear()
+    assert get_job()['summary'] == summary
+    assert 'query' not in local.table.calls
+
+
+def test_running_job_without_a_summary_is_not_summarized(local):
+    local.table.items[('job#' + standins.JOB_ID, 'user#' + standins.USER_ID)]['status'] = 'RUNNING'
+    local.table.add(*RESULTS)
+
+    assert get_job()['summary'] is None
+    assert 'query' not in local.table.calls
+    assert SUMMARY_KEY not in local.table.items
+
+
+def test_summary_saved_while_building_is_kept(local):
+    data_access = ProductManagerDataAccess()
+    local.table.add(*RESULTS[:1])
+    data_access.build_job_summary(standins.JOB_ID)
+    local.table.add(*RESULTS[1:])
+
+    assert data_access.build_job_summary(standins.JOB_ID)['total'] == 1
+
+
+def test_summary_is_not_rebuilt_for_job_counters_it_does_not_match(local):
+    #e.g. the counters count results that could not be saved
+    local.table.add(*RESULTS)
+    job = local.table.items[('job#' + standins.JOB_ID, 'user#' + standins.USER_ID)]
+    job.update({'total_products': 12, 'total_success': 7, 'total_failed': 5})
+
+    assert get_job()['summary']['total'] == 10
+    local.table.calls.clear()
+    assert get_job()['summary']['total'] == 10
+    assert 'query' not in local.table.calls
+
+
+def test_jobs_created_through_run_are_summarized_from_their_results(local, monkeypatch):
+    monkeypatch.setenv('s3_file_upload_bucket', 'local-upload-bucket')
+    monkeypatch.setenv('import_topic_arn', 'arn:aws:sns:us-east-2:000000000000:local')
+    monkeypatch.setenv('shopify_api_version', '2021-07')
+    response = app.lambda_handler(standins.load_event('import-event.json'), None)
+    assert response['statusCode'] == 200
+    job_id = standins.response_json(response)['jobId']
+    assert ('job#' + job_id, 'summary') not in local.table.items
+
+    #the product generator saves the results and the job counters, not the summary
+    for result in RESULTS[:3]:
+        local.table.add(dict(result, SK='job#' + job_id))
+    local.table.items[('job#' + job_id, 'user#' + standins.USER_ID)].update(
+        {'status': 'COMPLETED', 'total_products': 3, 'total_success': 3, 'total_failed': 0}
+    )
+
+    event = standins.load_event('get_job_details.json', pathParameters={'jobId': job_id})
+    summary = standins.response_json(app.lambda_handler(event, None))['summary']
+    assert summary['total'] == 3 and summary['status_counts'] == {'SUCCESS': 3}
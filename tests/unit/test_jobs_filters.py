@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+import app
+from tests import standins
+
+JOBS = [
+    #(id, type, status, start time)
+    ('create-old', 'IMPORT_CREATE', 'COMPLETED', '2021-08-01T09:00:00.000000Z'),
+    ('edit-old', 'IMPORT_EDIT', 'FAILED', '2021-08-01T10:00:00.000000Z'),
+    ('create-running', 'IMPORT_CREATE', 'RUNNING', '2021-08-02T08:00:00.000000Z'),
+    ('bulk-running', 'BULK_EDIT', 'RUNNING', '2021-08-02T09:30:00.000000Z'),
+    ('create-new', 'IMPORT_CREATE', 'COMPLETED', '2021-08-02T11:00:00.000000Z'),
+    ('edit-new', 'IMPORT_EDIT', 'RUNNING', '2021-08-03T07:00:00.000000Z'),
+]
+
+
+@pytest.fixture()
+def local(local):
+    del local.table.items[('job#' + standins.JOB_ID, 'user#' + standins.USER_ID)]
+    for job_id, task_type, status, start_time in JOBS:
+        local.table.add({
+            'PK': 'job#' + job_id, 'SK': 'user#' + standins.USER_ID, 'SK1': start_time,
+            'SK2': task_type + '#' + start_time, 'status': status
+        })
+    return local
+
+
+def get_jobs(**query_params):
+    event = standins.load_event('get_jobs_event.json', queryStringParameters=query_params)
+    return app.lambda_handler(event, None)
+
+
+def job_ids(**query_params):
+    response = get_jobs(**query_params)
+    assert response['statusCode'] == 200
+    return [job['id'] for job in standins.response_json(response)['jobs']]
+
+
+def test_type_filter_is_a_key_condition(local):
+    assert job_ids(taskType='IMPORT_CREATE') == ['create-new', 'create-running', 'create-old']
+    assert local.table.queries[-1] == {'IndexName': 'GSI2', 'ScannedCount': 3}
+
+
+def test_type_and_time_range(local):
+    ids = job_ids(taskType='IMPORT_CREATE', startTimeFrom='2021-08-02T00:00:00Z')
+    assert ids == ['create-new', 'create-running']
+
+    ids = job_ids(taskType='IMPORT_EDIT', startTimeFrom='2021-08-01', startTimeTo='2021-08-02T00:00:00+00:00')
+    assert ids == ['edit-old']
+    assert local.table.queries[-1] == {'IndexName': 'GSI2', 'ScannedCount': 1}
+
+
+def test_time_range_uses_the_start_time_index(local):
+    ids = job_ids(startTimeFrom='2021-08-02T09:00:00Z', startTimeTo='2021-08-02T12:00:00Z')
+    assert ids == ['create-new', 'bulk-running']
+    assert local.table.queries[-1] == {'IndexName': 'GSI1', 'ScannedCount': 2}
+
+    assert job_ids(startTimeTo='2021-08-01T09:30:00Z') == ['create-old']
+    #offsets are converted to utc
+    assert job_ids(startTimeFrom='2021-08-03T08:00:00+02:00') == ['edit-new']
+
+
+def test_running_jobs_in_the_last_day(local):
+    ids = job_ids(status='RUNNING', startTimeFrom='2021-08-02T07:00:00Z')
+    assert ids == ['edit-new', 'bulk-running', 'create-running']
+    #only the jobs of the time range are read
+    assert local.table.queries[-1] == {'IndexName': 'GSI1', 'ScannedCount': 4}
+
+
+def test_status_filter_keeps_paging(local):
+    response = get_jobs(status='FAILED,RUNNING', pageSize='2')
+    page = standins.response_json(response)
+    assert [job['id'] for job in page['jobs']] == ['edit-new']
+    assert page['nextToken'] is not None
+
+    ids, token = [job['id'] for job in page['jobs']], page['nextToken']
+    while token is not None:
+        page = standins.response_json(get_jobs(status='FAILED,RUNNING', pageSize='2', nextToken=token))
+        ids.extend(job['id'] for job in page['jobs'])
+        token = page['nextToken']
+    assert ids == ['edit-new', 'bulk-running', 'create-running', 'edit-old']
+
+
+def test_jobs_of_every_type_are_in_start_time_order(local):
+    assert job_ids() == [job[0] for job in reversed(JOBS)]
+
+
+@pytest.mark.parametrize('status', ['PARTIAL_COMPLETE', 'PARTIALLY COMPLETED'])
+def test_status_names_filter_on_the_saved_status_values(local, status):
+    local.table.add({
+        'PK': 'job#create-partial', 'SK': 'user#' + standins.USER_ID, 'SK1': '2021-08-03T08:00:00.000000Z',
+        'SK2': 'IMPORT_CREATE#2021-08-03T08:00:00.000000Z', 'status': 'PARTIALLY COMPLETED'
+    })
+    assert job_ids(status=status) == ['create-partial']
+    assert job_ids(status='COMPLETED,' + status) == ['create-partial', 'create-new', 'create-old']
+
+
+def test_filters_are_read_from_the_body(local):
+    event = standins.load_event(
+        'get_jobs_event.json', body=json.dumps({'taskType': 'BULK_EDIT', 'status': ['RUNNING']})
+    )
+    response = app.lambda_handler(event, None)
+    assert [job['id'] for job in standins.response_json(response)['jobs']] == ['bulk-running']
+
+
+@pytest.mark.parametrize('query_params', [
+    {'taskType': 'IMPORT'},
+    {'status': 'RUNNING,DONE'},
+    {'startTimeFrom': 'yesterday'},
+    {'startTimeFrom': '2021-08-03T00:00:00Z', 'startTimeTo': '2021-08-02T00:00:00Z'},
+])
+def test_invalid_filters_are_a_bad_request(local, query_params):
+    assert get_jobs(**query_params)['statusCode'] == 400
+
+
+def test_token_of_other_filters_is_a_bad_request(local):
+    page = standins.response_json(get_jobs(taskType='IMPORT_CREATE', pageSize='1'))
+    response = get_jobs(startTimeFrom='2021-08-01T00:00:00Z', pageSize='1', nextToken=page['nextToken'])
+    assert response['statusCode'] == 400
@@ -0,0 +1,102 @@
+import json
+from decimal import Decimal
+
+import pytest
+
+import app
+from datamodel.custom_exceptions import IllegalArgumentError
+from tests import standins
+from utility import pagination
+
+JOB_COUNT = 60
+
+
+@pytest.fixture()
+def local(local):
+    for index in range(JOB_COUNT):
+        start_time = '2021-08-{:02d}T10:{:02d}:00.000Z'.format(index // 30 + 1, index % 30)
+        local.table.add({
+            'PK': 'job#job-' + str(index), 'SK': 'user#' + standins.USER_ID, 'SK1': start_time,
+            'SK2': 'IMPORT_CREATE#' + start_time, 'status': 'COMPLETED'
+        })
+    #a job of another user, which must never show up
+    local.table.add({
+        'PK': 'job#other', 'SK': 'user#someone-else', 'SK1': '2021-08-01T10:00:00.000Z',
+        'SK2': 'IMPORT_CREATE#2021-08-01T10:00:00.000Z', 'status': 'COMPLETED'
+    })
+    return local
+
+
+def get_jobs(query_params=None, body=None):
+    event = standins.load_event(
+        'get_jobs_event.json', queryStringParameters=query_params, body=json.dumps(body) if body else None
+    )
+    return app.lambda_handler(event, None)
+
+
+def get_page(query_params=None, body=None):
+    response = get_jobs(query_params, body)
+    assert response['statusCode'] == 200
+    return standins.response_json(response)
+
+
+def test_jobs_are_paged_with_a_continuation_token(local):
+    job_ids, pages, query_params = [], [], None
+    while True:
+        page = get_page(query_params)
+        pages.append(len(page['jobs']))
+        job_ids.extend(job['id'] for job in page['jobs'])
+        if page['nextToken'] is None:
+            break
+        query_params = {'nextToken': page['nextToken']}
+
+    assert pages == [25, 25, 11]
+    assert len(set(job_ids)) == JOB_COUNT + 1
+    assert 'other' not in job_ids
+    #newest first
+    assert job_ids[0] == 'job-' + str(JOB_COUNT - 1)
+    assert local.table.calls.count('query') == 3
+
+
+def test_page_size_from_query_string_or_body(local):
+    assert len(get_page({'pageSize': '10'})['jobs']) == 10
+    page = get_page(body={'pageSize': 40})
+    assert len(page['jobs']) == 40
+
+    page = get_page(body={'pageSize': 40, 'nextToken': page['nextToken']})
+    assert len(page['jobs']) == 21
+    assert page['nextToken'] is None
+
+
+@pytest.mark.parametrize('page_size', ['0', '101', 'ten', '-5'])
+def test_page_size_out_of_bounds_is_a_bad_request(local, page_size):
+    assert get_jobs({'pageSize': page_size})['statusCode'] == 400
+
+
+@pytest.mark.parametrize('token', ['not a token', 'bm90IGpzb24', pagination.encode_token(['PK']).rstrip('=')])
+def test_malformed_token_is_a_bad_request(local, token):
+    assert get_jobs({'nextToken': token})['statusCode'] == 400
+
+
+def test_token_of_another_user_is_a_bad_request(local):
+    token = pagination.encode_token({
+        'PK': 'job#other', 'SK': 'user#someone-else', 'SK2': 'IMPORT_CREATE#2021-08-01T10:00:00.000Z'
+    })
+    assert get_jobs({'nextToken': token})['statusCode'] == 400
+
+
+def test_token_round_trip():
+    key = {'PK': 'job#1', 'SK': 'user#1', 'SK1': '2021-08-01T10:00:00.000Z', 'count': Decimal(3)}
+    token = pagination.encode_token(key)
+
+    assert all(character.isalnum() or character in '-_' for character in token)
+    assert pagination.decode_token(token) == key
+    assert pagination.encode_token(None) is None
+    assert pagination.decode_token(None) is None
+
+
+def test_page_size_limits():
+    assert pagination.get_page_size(None, 25, 100) == 25
+    assert pagination.get_page_size('100', 25, 100) == 100
+    with pytest.raises(IllegalArgumentError):
+        pagination.get_page_size(101, 25, 100)
@@ -0,0 +1,76 @@
+import json
+
+import app
+from service import product_manager_service
+from tests import standins
+
+WAREHOUSE = {'id': 'gid://shopify/Location/1', 'name': 'Main Warehouse'}
+STORE = {'id': 'gid://shopify/Location/123', 'name': 'Store'}
+
+
+def upload_locations():
+    response = app.lambda_handler(standins.load_event('upload-event.json'), None)
+    assert response['statusCode'] == 200
+    return standins.response_json(response)['locations']
+
+
+def locations_item(local):
+    return local.table.items[('shop#test-shop.myshopify.com', 'locations')]
+
+
+def test_locations_are_fetched_once_per_shop(local):
+    assert upload_locations() == [WAREHOUSE]
+    assert upload_locations() == [WAREHOUSE]
+
+    assert len(local.shopify.requests) == 1
+    assert json.loads(locations_item(local)['locations']) == [WAREHOUSE]
+
+
+def test_cold_container_reads_locations_from_the_table(local):
+    upload_locations()
+    product_manager_service._locations_cache.clear()
+    local.shopify.locations = [WAREHOUSE, STORE]
+
+    assert upload_locations() == [WAREHOUSE]
+    assert len(local.shopify.requests) == 1
+
+
+def test_expired_locations_are_fetched_again(local):
+    upload_locations()
+    product_manager_service._locations_cache.clear()
+    locations_item(local)['expires_at'] = 1
+    local.shopify.locations = [WAREHOUSE, STORE]
+
+    assert upload_locations() == [WAREHOUSE, STORE]
+    assert len(local.shopify.requests) == 2
+
+
+def test_job_mapped_to_unknown_location_keeps_the_cache(local, caplog):
+    upload_locations()
+    local.shopify.locations = [WAREHOUSE, STORE]
+
+    response = app.lambda_handler(standins.load_event('import-event.json'), None)
+
+    assert response['statusCode'] == 200
+    assert 'Quantity mapped to locations the shop does not have' in caplog.text
+    assert len(local.shopify.requests) == 1
+    assert upload_locations() == [WAREHOUSE]
+
+
+def test_job_is_created_when_its_locations_can_not_be_checked(local):
+    local.shopify.responses = [standins.LocalShopifyResponse(401, {})]
+
+    response = app.lambda_handler(standins.load_event('import-event.json'), None)
+
+    assert response['statusCode'] == 200
+    assert len(local.shopify.requests) == 1
+    assert any(key[0].startswith('job#') for key in local.table.items)
+
+
+def test_job_mapped_to_known_location_uses_the_cache(local):
+    local.shopify.locations = [WAREHOUSE, STORE]
+    upload_locations()
+
+    app.lambda_handler(standins.load_event('import-event.json'), None)
+
+    assert len(local.shopify.requests) == 1
@@ -0,0 +1,72 @@
+import base64
+import json
+
+import boto3
+from botocore.stub import Stubber
+
+import app
+from tests import standins
+from utility import metrics
+
+
+def metric_lines(capsys):
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_sampled_upload_writes_one_line_with_its_stages(local, monkeypatch, capsys):
+    monkeypatch.setenv('metrics_sample_rate', '1')
+    event = standins.load_event('upload-event.json')
+    response = app.lambda_handler(event, None)
+    assert response['statusCode'] == 200
+
+    lines = metric_lines(capsys)
+    assert len(lines) == 1
+    line = lines[0]
+    directive = line['_aws']['CloudWatchMetrics'][0]
+    assert directive['Namespace'] == metrics.NAMESPACE and directive['Dimensions'] == [['Route']]
+    assert line['Route'] == 'POST /upload' and line['StatusCode'] == 200
+    units = {metric['Name']: metric['Unit'] for metric in directive['Metrics']}
+    for stage in ('Duration', 'upload.base64_decode', 'upload.multipart_parse', 'upload.file_reader',
+                  'service.get_file_details', 'dataaccess.save_to_s3', 'dataaccess.get_locations'):
+        assert units[stage] == 'Milliseconds' and line[stage] >= 0
+    assert line['upload.request_bytes'] == len(base64.b64decode(event['body']))
+    assert units['upload.file_bytes'] == 'Bytes'
+    assert line['upload.rows'] == standins.response_json(response)['actualRowCount']
+
+
+def test_requests_that_are_not_sampled_write_nothing(local, monkeypatch, capsys):
+    monkeypatch.setenv('metrics_sample_rate', '0')
+    assert app.lambda_handler(standins.load_event('get_job_details.json'), None)['statusCode'] == 200
+    assert metric_lines(capsys) == []
+    assert not metrics.is_sampled()
+
+
+def test_failed_requests_are_written_with_their_status(local, monkeypatch, capsys):
+    monkeypatch.setenv('metrics_sample_rate', '1')
+    event = standins.load_event('get_job_details.json', pathParameters={'jobId': 'missing'})
+    assert app.lambda_handler(event, None)['statusCode'] == 400
+    assert metric_lines(capsys)[0]['StatusCode'] == 400
+
+
+def test_aws_calls_are_timed_with_their_consumed_capacity(capsys):
+    session = boto3.session.Session(aws_access_key_id='local', aws_secret_access_key='local', region_name='us-east-2')
+    metrics.register_aws_hooks(session.events)
+    client = session.client('dynamodb')
+    key = {'PK': {'S': 'job#1'}, 'SK': {'S': 'summary'}}
+
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            'get_item', {'Item': key, 'ConsumedCapacity': {'TableName': 'BulkManager', 'CapacityUnits': 0.5}},
+            {'TableName': 'BulkManager', 'Key': key, 'ReturnConsumedCapacity': 'TOTAL'}
+        )
+        stubber.add_response('get_item', {'Item': key}, {'TableName': 'BulkManager', 'Key': key})
+
+        metrics.start_request('GET /jobs/{jobId}', sample_rate=1)
+        client.get_item(TableName='BulkManager', Key=key)
+        metrics.finish_request()
+        #capacity is only asked for while a request is sampled
+        client.get_item(TableName='BulkManager', Key=key)
+
+    line = metric_lines(capsys)[0]
+    assert line['dynamodb.ConsumedCapacity'] == 0.5
+    assert line['aws.dynamodb.GetItem'] >= 0
@@ -0,0 +1,68 @@
+import base64
+import email
+
+import pytest
+
+from datamodel.custom_exceptions import IllegalArgumentError
+from tests import standins
+from utility import multipart_parser
+
+BOUNDARY = '--------------------------568728649640937823699218'
+CONTENT_TYPE = 'multipart/form-data; boundary=' + BOUNDARY
+
+
+def email_parser_form_content(body, content_type):
+    """What the upload path used to build with the stdlib email parser"""
+
+    form_data = email.message_from_bytes(('Content-Type: ' + content_type + '\n').encode() + body)
+    form_content = {}
+    for part in form_data.get_payload():
+        name = part.get_param('name', header='content-disposition')
+        form_content[name] = {
+            'content': part.get_payload(decode=name == 'file'),
+            'content_type': part.get_content_type()
+        }
+        if name == 'file':
+            form_content[name]['file_name'] = part.get_filename()
+    return form_content
+
+
+def test_parse_form_data_matches_email_parser_on_upload_event():
+    body = base64.b64decode(standins.load_event('upload-event.json')['body'])
+
+    form_content = multipart_parser.parse_form_data(body, CONTENT_TYPE)
+
+    expected = email_parser_form_content(body, CONTENT_TYPE)
+    assert isinstance(form_content['file']['content'], memoryview)
+    assert bytes(form_content['file']['content']) == expected['file']['content']
+    assert form_content['file']['file_name'] == 'csv_first_row.csv'
+    for name, part in expected.items():
+        assert form_content[name]['content_type'] == part['content_type']
+        if name != 'file':
+            assert form_content[name]['content'] == part['content']
+
+
+def test_parse_form_data_keeps_binary_file_content_intact():
+    file_content = b'PK\x03\x04\r\n--not-a-boundary\r\n\x00\xff' * 100
+    body = b''.join([
+        b'--' + BOUNDARY.encode(), b'\r\n',
+        b'Content-Disposition: form-data; name="file"; filename="products.xlsx"\r\n',
+        b'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n',
+        file_content, b'\r\n',
+        b'--' + BOUNDARY.encode(), b'\r\n',
+        b'Content-Disposition: form-data; name="header-option"\r\n\r\n',
+        b'FIND\r\n',
+        b'--' + BOUNDARY.encode(), b'--\r\n'
+    ])
+
+    form_content = multipart_parser.parse_form_data(body, 'multipart/form-data; boundary="' + BOUNDARY + '"')
+
+    assert form_content['file']['content'].tobytes() == file_content
+    assert form_content['header-option']['content'] == 'FIND'
+    assert form_content['header-option']['content_type'] == 'text/plain'
+
+
+@pytest.mark.parametrize('content_type', [None, 'application/json', 'multipart/form-data'])
+def test_parse_form_data_rejects_non_multipart_requests(content_type):
+    with pytest.raises(IllegalArgumentError):
+        multipart_parser.parse_form_data(b'{}', content_type)
@@ -0,0 +1,122 @@
+import datetime
+import io
+import json
+
+import openpyxl
+
+import app
+from dataaccess.product_manager_data_access import ProductManagerDataAccess
+from datamodel.custom_exceptions import DataAccessError
+from tests import standins
+
+EXCEL_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+CSV_FILE = (
+    b'title,body html,price\r\n'
+    b'a big cup,a very big cup,5\r\n'
+    b'a green skirt,a skirt with pockets,23\r\n'
+)
+
+
+def api_event(resource, method, body=None, path_params=None):
+    return standins.load_event(
+        'get_jobs_event.json', resource=resource, httpMethod=method,
+        body=json.dumps(body) if body is not None else None, pathParameters=path_params
+    )
+
+
+def s3_event(key):
+    return {'Records': [{
+        'eventSource': 'aws:s3',
+        's3': {'bucket': {'name': 'local-upload-bucket'}, 'object': {'key': key}}
+    }]}
+
+
+def test_presigned_upload_is_analysed_when_the_object_lands(local):
+    response = app.lambda_handler(api_event('/upload/presigned', 'POST', {'fileName': 'my products.csv'}), None)
+    assert response['statusCode'] == 200
+    upload = standins.response_json(response)
+    file_id = upload['fileId']
+    s3_key = upload['upload']['fields']['key']
+    assert s3_key == file_id + '_my products.csv'
+
+    poll = app.lambda_handler(api_event('/files/{fileId}', 'GET', path_params={'fileId': file_id}), None)
+    assert standins.response_json(poll) == {'fileId': file_id, 'status': 'PENDING'}
+
+    local.s3.objects[('local-upload-bucket', s3_key)] = CSV_FILE
+    app.lambda_handler(s3_event(s3_key.replace(' ', '+')), None)
+
+    poll = app.lambda_handler(api_event('/files/{fileId}', 'GET', path_params={'fileId': file_id}), None)
+    file_details = standins.response_json(poll)
+    assert file_details['status'] == 'COMPLETED'
+    assert file_details['fileType'] == 'CSV'
+    assert file_details['actualRowCount'] == 2
+    assert [column['name'] for column in file_details['columnDetails']] == ['title', 'body html', 'price']
+    assert file_details['locations'] == [{'id': 'gid://shopify/Location/1', 'name': 'Main Warehouse'}]
+
+
+def test_failed_analysis_is_reported_to_the_poller(local):
+    body = {'fileName': 'products.csv', 'headerOption': 'FIND', 'columnName': 'handle'}
+    upload = standins.response_json(app.lambda_handler(api_event('/upload/presigned', 'POST', body), None))
+    local.s3.objects[('local-upload-bucket', upload['upload']['fields']['key'])] = CSV_FILE
+
+    app.lambda_handler(s3_event(upload['upload']['fields']['key']), None)
+
+    poll = app.lambda_handler(api_event('/files/{fileId}', 'GET', path_params={'fileId': upload['fileId']}), None)
+    assert standins.response_json(poll) == {'fileId': upload['fileId'], 'status': 'FAILED', 'errorCode': 'HEADER_NOT_FOUND'}
+
+
+def presigned_upload(local, file_name, content):
+    response = app.lambda_handler(api_event('/upload/presigned', 'POST', {'fileName': file_name}), None)
+    upload = standins.response_json(response)
+    local.s3.objects[('local-upload-bucket', upload['upload']['fields']['key'])] = content
+    return upload
+
+
+def poll_status(upload):
+    poll = app.lambda_handler(api_event('/files/{fileId}', 'GET', path_params={'fileId': upload['fileId']}), None)
+    return standins.response_json(poll)
+
+
+def test_unreadable_files_fail_without_stopping_the_other_records(local, monkeypatch):
+    corrupt = presigned_upload(local, 'products.xlsx', b'PK\x03\x04 not a workbook')
+    malformed = presigned_upload(local, 'products.csv', b'title,price\r\n"a cup,5\r\nplate,1,2,3\r\n')
+    unwritable = presigned_upload(local, 'products.csv', CSV_FILE)
+    valid = presigned_upload(local, 'products.csv', CSV_FILE)
+    keys = [upload['upload']['fields']['key'] for upload in (corrupt, malformed, unwritable, valid)]
+
+    basic_file_update = ProductManagerDataAccess.basic_file_update
+    def update(data_access, updated_file):
+        if updated_file['id'] == unwritable['fileId'] and updated_file['analysis_status'] == 'COMPLETED':
+            raise DataAccessError('update failed')
+        return basic_file_update(data_access, updated_file)
+    monkeypatch.setattr(ProductManagerDataAccess, 'basic_file_update', update)
+
+    event = {'Records': s3_event(keys[0])['Records'] + [s3_event(key)['Records'][0] for key in keys[1:]]}
+    results = app.lambda_handler(event, None)
+
+    assert results[2]['analysis_status'] == 'FAILED' and results[3]['analysis_status'] == 'COMPLETED'
+    for upload in (corrupt, malformed, unwritable):
+        assert poll_status(upload) == {'fileId': upload['fileId'], 'status': 'FAILED', 'errorCode': 'ANALYSIS_FAILED'}
+    assert poll_status(valid)['status'] == 'COMPLETED'
+
+
+def test_date_samples_are_saved_with_the_analysis(local):
+    content = io.BytesIO()
+    workbook = openpyxl.Workbook()
+    workbook.active.append(['title', 'Released'])
+    workbook.active.append(['a big cup', datetime.datetime(2021, 7, 1, 8, 30)])
+    workbook.save(content)
+    upload = presigned_upload(local, 'products.xlsx', content.getvalue())
+
+    app.lambda_handler(s3_event(upload['upload']['fields']['key']), None)
+
+    file_details = poll_status(upload)
+    assert file_details['status'] == 'COMPLETED'
+    assert file_details['columnDetails'][1]['sampleData'] == ['2021-07-01 08:30:00']
+
+
+def test_presigned_upload_rejects_unsupported_files(local):
+    response = app.lambda_handler(api_event('/upload/presigned', 'POST', {'fileName': 'products.pdf'}), None)
+
+    assert response['statusCode'] == 400
+    assert standins.response_json(response) == {'errorCode': 'WRONG_FILE_FORMAT'}
@@ -0,0 +1,83 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+import app
+from tests import standins
+from utility import response_body
+
+
+@pytest.fixture()
+def result_count():
+    return 200
+
+
+@pytest.mark.parametrize('library', ['json', 'orjson'])
+def test_bodies_serialize_alike_with_either_library(monkeypatch, library):
+    if library == 'orjson':
+        pytest.importorskip('orjson')
+    monkeypatch.setenv('json_library', library)
+    assert response_body.json_library() == library
+    value = {'jobs': [{'id': 'é', 'count': 3, 'ratio': 0.25, 'done': None, 'tags': []}], 'nextToken': None}
+    assert json.loads(response_body.dumps(value)) == value
+    #integer keys and integers over 64 bits
+    assert json.loads(response_body.dumps({1: 2 ** 70})) == {'1': 2 ** 70}
+
+
+@pytest.mark.parametrize('accept_encoding, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip, deflate', 'gzip'),
+    ('GZIP;q=0.5', 'gzip'),
+    ('gzip;q=0', None),
+    ('*', 'br' if response_body.brotli else 'gzip'),
+    ('*;q=0.5, gzip;q=0', 'br' if response_body.brotli else None),
+    ('gzip;q=1.0, br;q=0.2', 'gzip'),
+    ('br', 'br' if response_body.brotli else None),
+])
+def test_coding_is_negotiated_from_accept_encoding(accept_encoding, expected):
+    assert response_body.negotiate(accept_encoding) == expected
+
+
+def test_large_bodies_are_compressed_for_clients_that_accept_it(monkeypatch):
+    monkeypatch.setenv('response_compression_min_size', '100')
+    body = response_body.dumps([{'id': str(index)} for index in range(50)])
+    response = response_body.encode(
+        {'statusCode': 200, 'headers': {'ETag': '"1"'}, 'body': body}, {'accept-encoding': 'gzip'}
+    )
+    assert response['isBase64Encoded']
+    assert response['headers'] == {'ETag': 'W/"1"', 'Vary': 'Accept-Encoding', 'Content-Encoding': 'gzip'}
+    assert gzip.decompress(base64.b64decode(response['body'])).decode() == body
+
+    response = response_body.encode({'statusCode': 200, 'body': body}, {})
+    assert response == {'statusCode': 200, 'headers': {'Vary': 'Accept-Encoding'}, 'body': body}
+
+
+@pytest.mark.parametrize('min_size', ['100000', '-1'])
+def test_small_bodies_and_compression_turned_off_are_sent_as_is(monkeypatch, min_size):
+    monkeypatch.setenv('response_compression_min_size', min_size)
+    response = {'statusCode': 200, 'headers': {}, 'body': '{"jobs":[]}' * 100}
+    assert response_body.encode(dict(response), {'Accept-Encoding': 'gzip'}) == response
+
+
+def test_compression_is_off_by_default(local):
+    event = standins.load_event('results-event.json')
+    response = app.lambda_handler(event, None)
+    assert 'Content-Encoding' not in response['headers'] and not response.get('isBase64Encoded')
+
+
+def test_job_results_are_sent_compressed(local, monkeypatch):
+    monkeypatch.setenv('response_compression_min_size', '1024')
+    event = standins.load_event('results-event.json')
+    event['headers'] = dict(event.get('headers') or {}, **{'Accept-Encoding': 'gzip'})
+    compressed = app.lambda_handler(event, None)
+    assert compressed['headers']['Content-Encoding'] == 'gzip'
+
+    event['headers']['Accept-Encoding'] = 'identity'
+    plain = app.lambda_handler(event, None)
+    assert 'Content-Encoding' not in plain['headers'] and not plain.get('isBase64Encoded')
+    assert standins.response_json(compressed) == json.loads(plain['body'])
+    assert len(compressed['body']) < len(plain['body']) / 3
@@ -0,0 +1,82 @@
+import base64
+
+import pytest
+
+import app
+from controller import product_manager_controller
+from tests import standins
+
+
+@pytest.fixture()
+def services(monkeypatch):
+    """Records the services the controller builds"""
+
+    built = []
+    service_class = product_manager_controller.ProductManagerService
+
+    def build(request):
+        built.append(request)
+        return service_class(request)
+    monkeypatch.setattr(product_manager_controller, 'ProductManagerService', build)
+    return built
+
+
+@pytest.mark.parametrize('resource, method', [('/nowhere', 'GET'), ('/jobs', 'GET'), ('/upload', 'DELETE')])
+def test_unknown_routes_build_no_service(local, services, resource, method):
+    event = standins.load_event('get_jobs_event.json', resource=resource, httpMethod=method)
+    response = app.lambda_handler(event, None)
+    assert response['statusCode'] == 404
+    assert response['headers'] == product_manager_controller.DEFAULT_HEADERS
+    assert services == [] and local.table.calls == []
+
+
+def test_requests_without_the_route_context_are_bad_requests(local, services):
+    event = standins.load_event('get_job_details.json', pathParameters=None)
+    assert app.lambda_handler(event, None)['statusCode'] == 400
+
+    event = standins.load_event('get_jobs_event.json')
+    del event['requestContext']['authorizer']
+    assert app.lambda_handler(event, None)['statusCode'] == 400
+    assert services == []
+
+
+def test_errors_are_mapped_by_the_route(local, services):
+    local.table.items[('user#' + standins.USER_ID, 'user')]['active'] = False
+    event = standins.load_event('get_user_event.json', resource='/users')
+    assert app.lambda_handler(event, None)['statusCode'] == 401
+    assert len(services) == 1
+
+    #errors a route does not map are internal errors
+    local.table.get_item = None
+    assert app.lambda_handler(event, None)['statusCode'] == 500
+
+
+def test_error_codes_are_sent_in_the_body(local, services):
+    event = standins.upload_event('products.pdf', 'application/pdf', b'%PDF-1.4')
+    response = app.lambda_handler(event, None)
+    assert response['statusCode'] == 400
+    assert standins.response_json(response) == {'errorCode': 'WRONG_FILE_FORMAT'}
+
+
+def base64_event(name, body, **overrides):
+    return standins.load_event(
+        name, body=base64.b64encode(body.encode('utf-8')).decode('ascii'), isBase64Encoded=True, **overrides
+    )
+
+
+def test_bodies_the_api_gateway_base64_encoded_are_decoded(local, monkeypatch):
+    monkeypatch.setenv('s3_file_upload_bucket', 'local-upload-bucket')
+    event = base64_event('get_job_statuses_event.json', '{"jobIds": ["%s"]}' % standins.JOB_ID)
+    response = app.lambda_handler(event, None)
+    assert [job['id'] for job in standins.response_json(response)['jobs']] == [standins.JOB_ID]
+
+    event = base64_event('get_jobs_event.json', '{"fileName": "products.csv"}', resource='/upload/presigned')
+    assert 'fileId' in standins.response_json(app.lambda_handler(event, None))
+
+    #the upload route parses the encoded multipart body itself
+    assert app.lambda_handler(standins.load_event('upload-event.json'), None)['statusCode'] == 200
+
+
+def test_bodies_that_are_not_base64_are_bad_requests(local):
+    event = standins.load_event('get_job_statuses_event.json', isBase64Encoded=True)
+    assert app.lambda_handler(event, None)['statusCode'] == 400
@@ -0,0 +1,104 @@
+import pytest
+import requests
+
+from dataaccess import shopify_client
+from dataaccess.shopify_client import ShopifyClient
+from datamodel.custom_exceptions import DataAccessError
+from datamodel.custom_exceptions import ShopifyUnauthorizedError
+from tests import standins
+
+QUERY = 'query { shop { name } }'
+SHOP = {'data': {'shop': {'name': 'Test Shop'}}}
+
+
+def throttled(requested, available, restore_rate=50.0):
+    return {
+        'errors': [{'message': 'Throttled', 'extensions': {'code': 'THROTTLED'}}],
+        'extensions': {'cost': {
+            'requestedQueryCost': requested, 'actualQueryCost': None,
+            'throttleStatus': {'maximumAvailable': 1000.0, 'currentlyAvailable': available, 'restoreRate': restore_rate}
+        }}
+    }
+
+
+@pytest.fixture()
+def shopify(monkeypatch):
+    local = standins.install()
+    sleeps = []
+    monkeypatch.setattr(shopify_client.time, 'sleep', sleeps.append)
+    monkeypatch.setattr(shopify_client.random, 'uniform', lambda low, high: high)
+    local.shopify.sleeps = sleeps
+    return local.shopify
+
+
+def client():
+    return ShopifyClient('test-shop.myshopify.com', 'shpat_local', '2021-07')
+
+
+def test_throttled_query_waits_for_the_cost_it_needs(shopify):
+    shopify.responses = [
+        standins.LocalShopifyResponse(200, throttled(requested=120, available=20)),
+        standins.LocalShopifyResponse(200, SHOP)
+    ]
+
+    shopify_client_instance = client()
+    assert shopify_client_instance.graphql(QUERY) == SHOP
+    assert shopify.sleeps == [100 / 50.0 + shopify_client.BACKOFF_BASE]
+    assert shopify_client_instance.last_call['attempts'] == 2
+    assert shopify_client_instance.last_call['statusCode'] == 200
+
+
+def test_rate_limited_call_respects_retry_after(shopify):
+    shopify.responses = [standins.LocalShopifyResponse(429, {}, {'Retry-After': '2.0'}), standins.LocalShopifyResponse(200, SHOP)]
+
+    assert client().graphql(QUERY) == SHOP
+    assert shopify.sleeps == [2.0 + shopify_client.BACKOFF_BASE]
+
+
+def test_unavailable_shopify_is_retried_with_backoff_then_fails(shopify, monkeypatch):
+    monkeypatch.setenv('shopify_max_retries', '2')
+    shopify.responses = [
+        standins.LocalShopifyResponse(503, {}), requests.exceptions.ConnectTimeout('timed out'),
+        standins.LocalShopifyResponse(502, {})
+    ]
+
+    with pytest.raises(DataAccessError, match='after 3 attempts. Status Code: 502'):
+        client().graphql(QUERY)
+    assert shopify.sleeps == [0.25, 0.5]
+
+
+def test_unauthorized_call_is_not_retried(shopify):
+    shopify.responses = [standins.LocalShopifyResponse(401, {})]
+
+    with pytest.raises(ShopifyUnauthorizedError):
+        client().graphql(QUERY)
+    assert len(shopify.requests) == 1
+    assert shopify.sleeps == []
+
+
+def test_query_still_throttled_after_retries_fails(shopify, monkeypatch):
+    monkeypatch.setenv('shopify_max_retries', '1')
+    shopify.responses = [standins.LocalShopifyResponse(200, throttled(10, 0))] * 2
+
+    with pytest.raises(DataAccessError, match='throttled'):
+        client().graphql(QUERY)
+    assert len(shopify.requests) == 2
+
+
+def test_retry_that_would_not_be_over_in_time_fails_without_waiting(shopify, monkeypatch):
+    monkeypatch.setenv('shopify_max_retry_time', '15')
+    shopify.responses = [standins.LocalShopifyResponse(429, {}, {'Retry-After': '30'})]
+
+    with pytest.raises(DataAccessError, match='after 1 attempts: retrying would take longer than 15.0 seconds'):
+        client().graphql(QUERY)
+    assert shopify.sleeps == []
+
+
+def test_retries_read_for_the_time_left_at_most(shopify, monkeypatch):
+    monkeypatch.setenv('shopify_max_retry_time', '5')
+    shopify.responses = [standins.LocalShopifyResponse(503, {}), standins.LocalShopifyResponse(200, SHOP)]
+
+    assert client().graphql(QUERY) == SHOP
+    first, retry = shopify.timeouts
+    assert first == (3.05, 10.0)
+    assert retry[0] == 3.05 and 4.5 < retry[1] <= 5 - shopify_client.BACKOFF_BASE
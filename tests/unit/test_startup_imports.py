@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from tests.benchmark.route_startup import HEAVY_MODULES
+from tests.benchmark.route_startup import ROUTE_EVENTS
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_in_new_interpreter(path, method):
+    process = subprocess.run(
+        [sys.executable, '-m', 'tests.benchmark.route_startup', path, method],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(process.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize('path, method', [route for route in ROUTE_EVENTS if route[0] != '/upload'])
+def test_route_does_not_import_heavy_modules(path, method):
+    result = run_in_new_interpreter(path, method)
+
+    assert result['statusCode'] == 200
+    assert result['modules'] == []
+
+
+def test_upload_route_imports_file_reader_dependencies():
+    result = run_in_new_interpreter('/upload', 'POST')
+
+    assert result['statusCode'] == 200
+    assert 'pandas' in result['modules']
+    assert set(result['modules']) <= set(HEAVY_MODULES)
@@ -0,0 +1,62 @@
+import base64
+import threading
+
+import pytest
+
+import app
+from datamodel.custom_exceptions import DataAccessError
+from tests import standins
+from utility.task_graph import TaskGraph
+
+
+def test_task_runs_with_results_of_required_tasks():
+    graph = TaskGraph()
+    started = threading.Event()
+    graph.add('user', lambda: started.wait(1) and {'domain': 'shop'})
+    graph.add('settings', lambda: 'settings')
+    graph.add('locations', lambda user, settings: (user['domain'], settings), requires=('user', 'settings'))
+
+    started.set()
+
+    assert graph.result('locations') == ('shop', 'settings')
+
+
+def test_failure_reaches_dependent_tasks_and_caller():
+    graph = TaskGraph()
+    calls = []
+
+    def fail():
+        raise DataAccessError('table unavailable')
+    graph.add('user', fail)
+    graph.add('locations', lambda user: calls.append(user), requires=('user',))
+    graph.wait()
+
+    with pytest.raises(DataAccessError):
+        graph.result('locations')
+    assert calls == []
+
+
+def test_shopify_failure_during_upload_is_mapped_by_controller(local):
+    def unauthorized(url, **kwargs):
+        return standins.LocalShopifyResponse(401, {})
+    local.shopify.post = unauthorized
+
+    response = app.lambda_handler(standins.load_event('upload-event.json'), None)
+
+    assert response['statusCode'] == 503
+    assert ('file#' + standins.FILE_ID, 'file') in local.table.items
+    assert len([key for key in local.table.items if key[1] == 'file']) == 1
+    #nothing is left of the upload: its file, snapshot and hash item
+    assert local.s3.objects == {}
+    assert not [key for key in local.table.items if key[1].startswith('hash#')]
+
+
+def test_file_saved_for_unreadable_upload_is_removed(local):
+    event = standins.load_event('upload-event.json')
+    body = base64.b64decode(event['body']).replace(b'DEFAULT', b'FIND').replace(b'\r\n\r\nTitle', b'\r\n\r\nhandle')
+    event['body'] = base64.b64encode(body).decode()
+
+    response = app.lambda_handler(event, None)
+
+    assert standins.response_json(response) == {'errorCode': 'HEADER_NOT_FOUND'}
+    assert local.s3.objects == {}
@@ -0,0 +1,83 @@
+import base64
+
+import app
+from dataaccess.product_manager_data_access import ProductManagerDataAccess
+from datamodel.custom_exceptions import DataAccessError
+from tests import standins
+from utility.file_reader_util import FileReader
+
+BOUNDARY = '--------------------------568728649640937823699218'
+
+
+def upload(header_option=None):
+    event = standins.load_event('upload-event.json')
+    if header_option is not None:
+        body = base64.b64decode(event['body'])
+        body = body.replace(
+            b'name="header-option"\r\n\r\nDEFAULT', b'name="header-option"\r\n\r\n' + header_option.encode()
+        )
+        event['body'] = base64.b64encode(body).decode()
+    response = app.lambda_handler(event, None)
+    assert response['statusCode'] == 200
+    return standins.response_json(response)
+
+
+def file_items(local):
+    return [item for key, item in local.table.items.items() if key[1] == 'file' and key[0] != 'file#' + standins.FILE_ID]
+
+
+def test_repeat_upload_reuses_analysis_and_s3_object(local, monkeypatch):
+    first = upload()
+    saved_objects = dict(local.s3.objects)
+
+    def fail(self):
+        raise AssertionError('file was parsed again')
+    monkeypatch.setattr(FileReader, 'get_file_details', fail)
+    second = upload()
+
+    assert second['fileId'] != first['fileId']
+    assert {key: value for key, value in second.items() if key != 'fileId'} == \
+        {key: value for key, value in first.items() if key != 'fileId'}
+    assert local.s3.objects == saved_objects
+    first_item, second_item = sorted(file_items(local), key=lambda item: item['PK'] != 'file#' + first['fileId'])
+    for field in ('s3_key', 'header_row', 'actual_row_count', 'file_type'):
+        assert second_item[field] == first_item[field]
+
+
+def test_upload_goes_on_when_its_hash_can_not_be_saved(local, monkeypatch):
+    def fail(self, cached_upload):
+        raise DataAccessError('hash item not saved')
+    monkeypatch.setattr(ProductManagerDataAccess, 'put_upload_hash', fail)
+
+    uploaded = upload()
+    assert [item['PK'] for item in file_items(local)] == ['file#' + uploaded['fileId']]
+    assert not any(key[1].startswith('hash#') for key in local.table.items)
+
+
+def test_upload_with_another_header_option_is_parsed_again(local):
+    upload()
+
+    upload('FIND')
+
+    assert len({item['s3_key'] for item in file_items(local)}) == 2
+
+
+def test_expired_analysis_is_not_reused(local):
+    upload()
+    for key, item in local.table.items.items():
+        if key[1].startswith('hash#'):
+            item['expires_at'] = 1
+
+    upload()
+
+    assert len({item['s3_key'] for item in file_items(local)}) == 2
+
+
+def test_cache_is_off_with_zero_ttl(local, monkeypatch):
+    monkeypatch.setenv('file_analysis_cache_ttl', '0')
+
+    upload()
+    upload()
+
+    assert not [key for key in local.table.items if key[1].startswith('hash#')]
+    assert len({item['s3_key'] for item in file_items(local)}) == 2
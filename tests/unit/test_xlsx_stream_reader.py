@@ -0,0 +1,128 @@
+import datetime
+import io
+
+import openpyxl
+import pytest
+
+from datamodel.custom_enums import FileReaderEngine
+from datamodel.custom_enums import FileType
+from datamodel.custom_enums import HeaderOption
+from utility.file_reader_util import FileReader
+from utility.xlsx_stream_reader import XlsxStreamReader
+
+HEADER = ['title', 'body', 'vendor', 'type', 'price', 'sku', 'barcode', 'tags', 'status']
+
+
+def workbook_bytes(rows, number_formats=None):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    for row in rows:
+        sheet.append(row)
+    for reference, number_format in (number_formats or {}).items():
+        sheet[reference].number_format = number_format
+    content = io.BytesIO()
+    workbook.save(content)
+    return content.getvalue()
+
+
+def product_rows(count):
+    return [['title ' + str(i), 'body', None, 'shirt', i * 1.5, 'sku-' + str(i), None, None, 'ACTIVE']
+            for i in range(count)]
+
+
+def file_details(content, engine, option=HeaderOption.DEFAULT, value=None):
+    return FileReader(file_reader_info={
+        'file': content,
+        'type': FileType.EXCEL,
+        'header': {'option': option, 'value': value},
+        'engine': engine
+    }).get_file_details()
+
+
+WORKBOOKS = {
+    'plain': ([HEADER] + product_rows(10), HeaderOption.DEFAULT, None),
+    'preamble': ([['Supplier export'], [None], ['Generated', 2021], [None], HEADER] + product_rows(10),
+                 HeaderOption.FIND, 'price'),
+    'exact': ([['Supplier export'], [None], HEADER] + product_rows(10), HeaderOption.EXACT, 2),
+    'unnamed': ([[None] * 9, HEADER] + product_rows(10), HeaderOption.DEFAULT, None),
+    'gaps': ([HEADER] + [row if i % 3 == 0 else [None] * 9 for i, row in enumerate(product_rows(300))],
+             HeaderOption.DEFAULT, None),
+    'late_column': ([HEADER] + product_rows(499) + [product_rows(1)[0] + ['late value']],
+                    HeaderOption.DEFAULT, None),
+    'booleans': ([HEADER + ['taxable']] + [row + [i % 2 == 0] for i, row in enumerate(product_rows(10))],
+                 HeaderOption.DEFAULT, None),
+    'numeric_header': ([[2, 'title', None, 'price', 2]] + [[i, 'title ' + str(i), 'sku-' + str(i), i * 1.5, i * 1.5]
+                                                          for i in range(10)],
+                       HeaderOption.DEFAULT, None),
+    'found_numeric_header': ([['Supplier export'], [None], ['price', 2021, 7]] + [[i, i * 1.5, 'x'] for i in range(10)],
+                             HeaderOption.FIND, 'price'),
+}
+
+
+@pytest.mark.parametrize('name', sorted(WORKBOOKS))
+def test_stream_engine_matches_pandas_engine(name):
+    rows, option, value = WORKBOOKS[name]
+    content = workbook_bytes(rows)
+
+    streamed = file_details(content, FileReaderEngine.STREAM, option, value)
+
+    assert streamed == file_details(content, FileReaderEngine.PANDAS, option, value)
+
+
+@pytest.mark.parametrize('engine', [FileReaderEngine.STREAM, FileReaderEngine.PANDAS])
+def test_numeric_header_cells_are_whole_numbers(engine):
+    rows, option, value = WORKBOOKS['numeric_header']
+    column_details = file_details(workbook_bytes(rows), engine, option, value)['columnDetails']
+
+    assert [column['name'] for column in column_details] == [2, 'title', 'Column 3', 'price', '2.1']
+    assert [column['sampleData'][:2] for column in column_details] == [
+        [0, 1], ['title 0', 'title 1'], ['sku-0', 'sku-1'], [0.0, 1.5], [0.0, 1.5]
+    ]
+
+    #a header found below the first row is read from a float column
+    rows, option, value = WORKBOOKS['found_numeric_header']
+    column_details = file_details(workbook_bytes(rows), engine, option, value)['columnDetails']
+
+    assert [column['name'] for column in column_details] == ['price', 2021, 7]
+    assert [type(column['name']) for column in column_details] == [str, int, int]
+
+
+def test_stream_engine_reads_dates_like_pandas_engine():
+    rows = [HEADER + ['published']] + [row + [datetime.datetime(2021, 7, i + 1, 8, 30)]
+                                       for i, row in enumerate(product_rows(6))]
+    content = workbook_bytes(rows, {'J2': 'dd/mm/yyyy hh:mm', 'J3': 'yyyy-mm-dd'})
+
+    streamed = file_details(content, FileReaderEngine.STREAM)
+
+    assert streamed == file_details(content, FileReaderEngine.PANDAS)
+
+
+def test_iter_rows_keeps_missing_rows_and_trims_trailing_cells():
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet['A1'] = 'title'
+    sheet['C1'] = 'price'
+    sheet['A4'] = 'shirt'
+    sheet['B4'] = 12
+    sheet['C4'] = None
+    content = io.BytesIO()
+    workbook.save(content)
+
+    reader = XlsxStreamReader(io.BytesIO(content.getvalue()))
+    try:
+        rows = list(reader.iter_rows())
+    finally:
+        reader.close()
+
+    assert rows == [['title', None, 'price'], [], [], ['shirt', 12]]
+
+
+@pytest.mark.parametrize('engine', [FileReaderEngine.STREAM, FileReaderEngine.PANDAS])
+def test_sample_data_keeps_the_types_of_the_whole_sheet(engine):
+    rows = [['title', 'sku', 'price', 'barcode']] + [['title ' + str(i), i, i, i] for i in range(100)]
+    rows[80][1:] = ['SKU-79', None, 79.5]
+
+    columns = file_details(workbook_bytes(rows), engine)['columnDetails']
+
+    assert [column['sampleData'] for column in columns[1:]] == [[0, 1, 2, 3, 4]] + [[0.0, 1.0, 2.0, 3.0, 4.0]] * 2
+    assert [type(value) for column in columns[1:] for value in column['sampleData']] == [int] * 5 + [float] * 10